@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import random
+from array import array
+from dataclasses import dataclass, field
+from typing import Callable, Collection, Dict, List, Optional, Sequence, Tuple
+
+from .catalog import SongCatalog
+
+
+@dataclass(frozen=True)
+class BacktimeRules:
+    """How the end of a show is fitted to its target length, in seconds."""
+
+    # Length of the closing stretch the solver plans (rotation stops before it).
+    window: int = 900
+    max_songs: int = 4
+    # The closing song may be faded out this much early ...
+    max_fade: int = 20
+    # ... and the outro moderation may run this far into it.
+    max_talk_over: int = 10
+
+
+@dataclass
+class BacktimePlan:
+    """Closing stretch: ``songs`` (the last one closes the show) with a jingle after each other song.
+
+    ``error`` is how far the planned end misses the target (positive:
+    overrun); it is 0 whenever an exact fit exists. A plan without songs
+    still airs the closing moderation.
+    """
+
+    songs: List[int] = field(default_factory=list)
+    jingles: List[int] = field(default_factory=list)
+    fade: int = 0
+    talk_over: int = 0
+    error: int = 0
+
+
+class Backtimer:
+    """Picks closing songs and jingles whose durations add up to the second.
+
+    Reachable totals are bitsets (Python ints) per number of songs, so the
+    subset-sum over a few thousand candidate songs costs a few thousand
+    shift-or operations. Candidates are at most ``max_songs`` songs per
+    distinct duration, which keeps the work independent of catalog size.
+    """
+
+    def __init__(self, catalog: SongCatalog, rules: Optional[BacktimeRules] = None) -> None:
+        self.catalog = catalog
+        self.rules = rules or BacktimeRules()
+        self._by_duration: Optional[Dict[int, array]] = None
+
+    def solve(
+        self,
+        seconds: int,
+        *,
+        song_overhead: int,
+        closing_overhead: int,
+        jingles: Sequence[int],
+        exclude: Collection[int] = (),
+        allowed: Optional[Callable[[int], bool]] = None,
+        rng: Optional[random.Random] = None,
+    ) -> BacktimePlan:
+        """Fills ``seconds`` with songs, jingles and fixed moderation time.
+
+        Each song but the last is followed by ``song_overhead`` seconds of
+        moderation and one of the ``jingles`` (durations); the last song is
+        preceded by ``closing_overhead``. Songs in ``exclude`` and songs
+        ``allowed`` rejects are only used if no exact fit exists without them.
+        """
+
+        plan = self._solve(seconds, song_overhead, closing_overhead, jingles, exclude, allowed, rng)
+        for relaxed_exclude, relaxed_allowed in (((), allowed), ((), None)):
+            if not plan.error:
+                break
+            if (relaxed_exclude, relaxed_allowed) == (exclude, allowed):
+                continue
+            fallback = self._solve(seconds, song_overhead, closing_overhead, jingles, relaxed_exclude, relaxed_allowed, rng)
+            if abs(fallback.error) < abs(plan.error):
+                plan = fallback
+        return plan
+
+    def _solve(
+        self,
+        seconds: int,
+        song_overhead: int,
+        closing_overhead: int,
+        jingles: Sequence[int],
+        exclude: Collection[int],
+        allowed: Optional[Callable[[int], bool]],
+        rng: Optional[random.Random],
+    ) -> BacktimePlan:
+        rules = self.rules
+        slack = rules.max_fade + rules.max_talk_over
+        # Without songs only the closing moderation airs.
+        empty = BacktimePlan(error=closing_overhead - seconds)
+        items = self._candidates(exclude, allowed, rng)
+        if not items or seconds <= closing_overhead:
+            return empty
+        limit = seconds + slack + max(duration for duration, _ in items) + 1
+        mask = (1 << limit) - 1
+
+        # history[i][c]: totals reachable with exactly c of the first i items.
+        levels = [1] + [0] * rules.max_songs
+        history = [tuple(levels)]
+        for duration, _ in items:
+            for count in range(rules.max_songs, 0, -1):
+                levels[count] |= (levels[count - 1] << duration) & mask
+            history.append(tuple(levels))
+
+        jingle_sums: Dict[int, List[int]] = {0: []}
+        # (rank, songs, song total, jingles, adjustment, error)
+        best: Optional[Tuple[Tuple[int, int, int], int, int, List[int], int, int]] = None
+        for count in range(1, rules.max_songs + 1):
+            if count > 1:
+                jingle_sums = _extend(jingle_sums, jingles)
+            reachable = levels[count]
+            if not reachable:
+                break
+            for jingle_total, chosen in jingle_sums.items():
+                need = seconds - closing_overhead - (count - 1) * song_overhead - jingle_total
+                total, adjust, error = _closest(reachable, need, slack)
+                if total is None:
+                    continue
+                rank = (abs(error), adjust, count)
+                if best is None or rank < best[0]:
+                    best = (rank, count, total, chosen, adjust, error)
+            if best is not None and best[0][:2] == (0, 0):
+                break
+        if best is None or abs(best[5]) > abs(empty.error):
+            return empty
+
+        _, count, total, chosen, adjust, error = best
+        songs = _reconstruct(items, history, count, total)
+        energies = self.catalog.energies
+        songs.sort(key=lambda song_id: energies[song_id])
+        # Highest energy closes the show; the others keep a random order.
+        closing = songs.pop()
+        if rng is not None:
+            rng.shuffle(songs)
+        talk_over = min(adjust, rules.max_talk_over)
+        return BacktimePlan(
+            songs=songs + [closing],
+            jingles=list(chosen),
+            fade=adjust - talk_over,
+            talk_over=talk_over,
+            error=error,
+        )
+
+    def _candidates(
+        self,
+        exclude: Collection[int],
+        allowed: Optional[Callable[[int], bool]],
+        rng: Optional[random.Random],
+    ) -> List[Tuple[int, int]]:
+        """Up to ``max_songs`` usable (duration, song id) pairs per duration."""
+
+        if self._by_duration is None:
+            self._by_duration = {}
+            for song_id, duration in enumerate(self.catalog.durations):
+                bucket = self._by_duration.get(duration)
+                if bucket is None:
+                    bucket = self._by_duration[duration] = array("l")
+                bucket.append(song_id)
+        per_duration = self.rules.max_songs
+        items: List[Tuple[int, int]] = []
+        for duration, bucket in sorted(self._by_duration.items()):
+            if duration <= 0:
+                continue
+            first = rng.randrange(len(bucket)) if rng is not None else 0
+            taken = 0
+            for step in range(min(len(bucket), 4 * per_duration)):
+                song_id = bucket[(first + step) % len(bucket)]
+                if song_id in exclude or (allowed is not None and not allowed(song_id)):
+                    continue
+                items.append((duration, song_id))
+                taken += 1
+                if taken == per_duration:
+                    break
+        return items
+
+
+def _extend(sums: Dict[int, List[int]], jingles: Sequence[int]) -> Dict[int, List[int]]:
+    """Jingle totals with one more jingle, keeping one combination per total."""
+
+    extended: Dict[int, List[int]] = {}
+    for total, chosen in sums.items():
+        for index, duration in enumerate(jingles):
+            extended.setdefault(total + duration, chosen + [index])
+    return extended
+
+
+def _closest(reachable: int, need: int, slack: int) -> Tuple[Optional[int], int, int]:
+    """Reachable total nearest to ``[need, need + slack]`` as (total, adjustment, error).
+
+    Totals inside the range fit exactly after fading/talking over by the
+    adjustment; otherwise the error is the remaining over- or underrun.
+    """
+
+    low = max(need, 0)
+    window = reachable >> low
+    if window:
+        total = low + (window & -window).bit_length() - 1
+        if total <= need + slack:
+            return total, total - need, 0
+        above: Optional[int] = total
+    else:
+        above = None
+    below_bits = reachable & ((1 << low) - 1) if low > 0 else 0
+    below = below_bits.bit_length() - 1 if below_bits else None
+    candidates = []
+    if above is not None:
+        candidates.append((above - need - slack, above, slack))
+    if below is not None:
+        candidates.append((below - need, below, 0))
+    if not candidates:
+        return None, 0, 0
+    error, total, adjust = min(candidates, key=lambda entry: abs(entry[0]))
+    return total, adjust, error
+
+
+def _reconstruct(items: Sequence[Tuple[int, int]], history: Sequence[Tuple[int, ...]], count: int, total: int) -> List[int]:
+    songs: List[int] = []
+    for index in range(len(items), 0, -1):
+        if not count:
+            break
+        if (history[index - 1][count] >> total) & 1:
+            continue
+        duration, song_id = items[index - 1]
+        songs.append(song_id)
+        total -= duration
+        count -= 1
+    return songs
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import serialization
+from .generator import ShowGenerator, slugify
+from .showcache import ShowCache
+from .templates import load_phrasebook
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    """One (station, hour) show of a batch run."""
+
+    station: str
+    host: str
+    hour: int
+    start: datetime
+    seed: int
+    output: str
+    templates: Optional[str] = None
+    cache: Optional[str] = None
+
+
+def derive_seed(base_seed: int, station: str, hour: int) -> int:
+    """Stable per-job seed, independent of scheduling order and worker count."""
+
+    digest = hashlib.blake2b(f"{base_seed}:{station}:{hour}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def load_stations(path: Path) -> List[dict]:
+    with path.open(encoding="utf-8") as handle:
+        data = json.load(handle)
+    if isinstance(data, dict):
+        data = data.get("stations", [])
+    stations = []
+    for entry in data:
+        if isinstance(entry, str):
+            entry = {"station": entry}
+        if "station" not in entry:
+            raise ValueError(f"station entry without 'station' name: {entry!r}")
+        stations.append(entry)
+    return stations
+
+
+def plan_jobs(
+    stations: Iterable[dict],
+    *,
+    hours: int,
+    day_start: datetime,
+    output_dir: Path,
+    base_seed: int = 0,
+    cache: Optional[str] = None,
+) -> List[BatchJob]:
+    """One job per station and hour; stations whose names slug alike are rejected."""
+
+    jobs: List[BatchJob] = []
+    slugs: Dict[str, str] = {}
+    for entry in stations:
+        station = entry["station"]
+        slug = slugify(station) or "station"
+        if slug in slugs:
+            raise ValueError(f"stations {slugs[slug]!r} and {station!r} would share the output name {slug!r}")
+        slugs[slug] = station
+        host = entry.get("host", "Alex")
+        seed = int(entry.get("seed", base_seed))
+        for hour in range(hours):
+            jobs.append(
+                BatchJob(
+                    station=station,
+                    host=host,
+                    hour=hour,
+                    start=day_start + timedelta(hours=hour),
+                    seed=derive_seed(seed, station, hour),
+                    output=str(output_dir / f"{slug}-{hour:03d}.json"),
+                    templates=entry.get("templates"),
+                    cache=cache,
+                )
+            )
+    return jobs
+
+
+def run_job(job: BatchJob) -> Tuple[str, int]:
+    phrases = load_phrasebook(job.templates) if job.templates else None
+    generator = ShowGenerator(station=job.station, host=job.host, seed=job.seed, phrases=phrases)
+    key = generator.cache_key(start=job.start) if job.cache else None
+    if key is None:
+        show = generator.build_show(duration_minutes=60, start=job.start)
+        document = show.as_dict()
+    else:
+        cache = _cache(job.cache)
+        body = cache.fetch(key, lambda: generator.build_show(duration_minutes=60, start=job.start).to_json())
+        document = json.loads(body)
+    encoded = json.dumps(document, ensure_ascii=False, indent=2).encode("utf-8")
+    Path(job.output).write_bytes(encoded)
+    return job.output, len(document["segments"])
+
+
+_CACHES: Dict[str, ShowCache] = {}
+
+
+def _cache(directory: str) -> ShowCache:
+    # One per worker process, so the directory is indexed once, not per job.
+    cache = _CACHES.get(directory)
+    if cache is None:
+        cache = _CACHES[directory] = ShowCache(directory, max_bytes=0)
+    return cache
+
+
+def run_batch(jobs: List[BatchJob], *, workers: int = 1) -> List[Tuple[str, int]]:
+    if workers <= 1:
+        return [run_job(job) for job in jobs]
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_job, jobs, chunksize=chunksize))
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="radio_gpt batch",
+        description="Generiert Sendestunden für mehrere Stationen parallel.",
+    )
+    parser.add_argument("--stations", type=Path, required=True, help="JSON-Datei mit Stationen (station, host, seed, templates)")
+    parser.add_argument("--hours", type=int, default=24, help="Anzahl der Sendestunden pro Station (Standard: 24)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Anzahl paralleler Prozesse")
+    parser.add_argument("--output", type=Path, default=Path("schedules"), help="Zielverzeichnis für die Sendepläne")
+    parser.add_argument("--seed", type=int, default=0, help="Basis-Seed für Stationen ohne eigenen Seed")
+    parser.add_argument(
+        "--cache",
+        type=str,
+        default=None,
+        metavar="VERZEICHNIS",
+        help="Sendungen im Verzeichnis zwischenspeichern; unveränderte Stunden werden nicht neu generiert",
+    )
+    parser.add_argument(
+        "--start",
+        type=serialization.parse_time,
+        default=None,
+        help="Startzeitpunkt der ersten Stunde (ISO 8601, Standard: nächster Tag 00:00 UTC)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.hours <= 0:
+        raise SystemExit("--hours must be positive")
+    day_start = args.start or _next_midnight()
+
+    try:
+        jobs = plan_jobs(
+            load_stations(args.stations),
+            hours=args.hours,
+            day_start=day_start,
+            output_dir=args.output,
+            base_seed=args.seed,
+            cache=args.cache,
+        )
+    except (OSError, ValueError) as exc:
+        raise SystemExit(str(exc))
+    # Check the phrase banks here rather than in every worker.
+    for templates in sorted({job.templates for job in jobs if job.templates}):
+        try:
+            load_phrasebook(templates)
+        except (OSError, ValueError) as exc:
+            raise SystemExit(f"Vorlagen aus {templates} können nicht geladen werden: {exc}")
+    args.output.mkdir(parents=True, exist_ok=True)
+
+    started = time.perf_counter()
+    results = run_batch(jobs, workers=args.workers)
+    elapsed = time.perf_counter() - started
+
+    segments = sum(count for _, count in results)
+    rate = len(results) / elapsed if elapsed else float("inf")
+    print(
+        f"{len(results)} Sendungen ({segments} Segmente) in {elapsed:.2f}s "
+        f"mit {args.workers} Worker(n) — {rate:.1f} shows/sec",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def _next_midnight() -> datetime:
+    now = datetime.now(timezone.utc)
+    return datetime(now.year, now.month, now.day, tzinfo=timezone.utc) + timedelta(days=1)
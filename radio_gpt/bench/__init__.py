@@ -0,0 +1,82 @@
+"""Micro-benchmarks for RadioGPT components."""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+import tracemalloc
+from datetime import timedelta
+from typing import Callable, List
+
+from ..playlist import Song
+
+TAG_POOL: List[str] = [
+    "synth", "pop", "indie", "feelgood", "electro", "night", "chill", "ambient",
+    "roadtrip", "melodic", "dance", "upbeat", "warm", "soul", "groove", "late-night",
+    "festival", "guitar", "club", "folk", "acoustic", "anthem", "rock", "jazz",
+]
+PLATFORMS: List[str] = ["YOUTUBE", "SOUNDCLOUD", "INTERNAL"]
+
+
+def synthetic_library(size: int, *, seed: int = 0) -> List[Song]:
+    """Builds a reproducible catalog of ``size`` fake songs."""
+
+    rng = random.Random(seed)
+    songs: List[Song] = []
+    for idx in range(size):
+        songs.append(
+            Song(
+                f"Track {idx}",
+                f"Artist {idx % max(1, size // 8)}",
+                timedelta(seconds=rng.randint(150, 300)),
+                round(rng.random(), 3),
+                rng.sample(TAG_POOL, rng.randint(1, 3)),
+                rng.choice(PLATFORMS),
+                f"src-{idx}",
+            )
+        )
+    return songs
+
+
+def best_of(func: Callable[[], object], *, repeat: int = 5, number: int = 1) -> float:
+    """Returns the fastest of ``repeat`` runs, in seconds per call."""
+
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best
+
+
+def measure(func: Callable[[], object], *, repeat: int = 5) -> dict:
+    """Wall time over ``repeat`` runs plus one traced run for memory figures."""
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        blocks_before = sys.getallocatedblocks()
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = func()
+        current, peak = tracemalloc.get_traced_memory()
+        blocks_after = sys.getallocatedblocks()
+    finally:
+        tracemalloc.stop()
+    del result
+
+    return {
+        "best_seconds": min(timings),
+        "mean_seconds": sum(timings) / len(timings),
+        "repeat": repeat,
+        "peak_bytes": peak - baseline,
+        "retained_bytes": current - baseline,
+        "allocated_blocks": blocks_after - blocks_before,
+    }
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Optional
+
+from . import catalog, suite
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m radio_gpt.bench",
+        description="Benchmarks für RadioGPT-Komponenten.",
+    )
+    parser.add_argument("--quick", action="store_true", help="Kleinere Größen für einen schnellen Durchlauf")
+    parser.add_argument("--only", type=str, default=None, help="Nur Fälle ausführen, deren Name diesen Text enthält")
+    parser.add_argument("--output", type=Path, default=None, help="Ergebnisse als JSON speichern")
+    parser.add_argument("--compare", type=Path, default=None, help="Mit früheren JSON-Ergebnissen vergleichen")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Relative Verschlechterung, ab der eine Regression gemeldet wird (Standard: 0.10)",
+    )
+    parser.add_argument(
+        "--catalog",
+        type=int,
+        nargs="*",
+        default=None,
+        metavar="SIZE",
+        help="Indexierten Songkatalog gegen lineare Suche vergleichen (Standard: 1000 100000 1000000)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.catalog is not None:
+        print(catalog.render(catalog.run(args.catalog or (1_000, 100_000, 1_000_000))))
+        return 0
+
+    report = suite.run_suite(
+        suite.default_cases(quick=args.quick),
+        only=args.only,
+        progress=lambda name: print(f"… {name}", file=sys.stderr),
+    )
+    print(suite.render(report))
+    if args.output:
+        suite.save(report, args.output)
+
+    if args.compare:
+        regressions = suite.compare(report, suite.load(args.compare), threshold=args.threshold)
+        for item in regressions:
+            print(
+                f"REGRESSION {item['case']} {item['metric']}: "
+                f"{item['before']:.6g} -> {item['after']:.6g} ({item['change']:+.1%})",
+                file=sys.stderr,
+            )
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
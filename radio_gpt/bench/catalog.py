@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import time
+from typing import Iterable, List, Tuple
+
+from ..catalog import SongCatalog
+from ..playlist import Song
+from . import best_of, synthetic_library
+
+
+def _scan_min_energy(songs: List[Song], min_energy: float) -> List[Song]:
+    return [song for song in songs if song.energy >= min_energy]
+
+
+def _scan_tag(songs: List[Song], tag: str) -> List[Song]:
+    lowered = tag.lower()
+    return [song for song in songs if lowered in (t.lower() for t in song.tags)]
+
+
+def _scan_combined(songs: List[Song], min_energy: float, tags: Iterable[str]) -> List[Song]:
+    wanted = {tag.lower() for tag in tags}
+    return [
+        song
+        for song in songs
+        if song.energy >= min_energy and wanted.intersection(t.lower() for t in song.tags)
+    ]
+
+
+def _uncached_min_energy(catalog: SongCatalog, min_energy: float) -> Tuple[Song, ...]:
+    catalog.clear_bands()
+    return catalog.with_min_energy(min_energy)
+
+
+def run(sizes: Iterable[int] = (1_000, 100_000, 1_000_000)) -> List[dict]:
+    """Compares indexed catalog lookups with the linear library scans."""
+
+    results = []
+    for size in sizes:
+        songs = synthetic_library(size)
+        started = time.perf_counter()
+        catalog = SongCatalog(songs)
+        build = time.perf_counter() - started
+        repeat = 5 if size <= 100_000 else 2
+        cases = {
+            "min_energy": (
+                lambda: _scan_min_energy(songs, 0.7),
+                lambda: _uncached_min_energy(catalog, 0.7),
+            ),
+            "tag": (
+                lambda: _scan_tag(songs, "Indie"),
+                lambda: catalog.search("Indie"),
+            ),
+            "combined": (
+                lambda: _scan_combined(songs, 0.9, ["jazz", "soul"]),
+                lambda: catalog.query(min_energy=0.9, tags=["jazz", "soul"]),
+            ),
+        }
+        for name, (scan, indexed) in cases.items():
+            scan_seconds = best_of(scan, repeat=repeat)
+            indexed_seconds = best_of(indexed, repeat=repeat)
+            results.append(
+                {
+                    "size": size,
+                    "case": name,
+                    "build_seconds": build,
+                    "scan_seconds": scan_seconds,
+                    "indexed_seconds": indexed_seconds,
+                    "speedup": scan_seconds / indexed_seconds if indexed_seconds else float("inf"),
+                }
+            )
+    return results
+
+
+def render(results: List[dict]) -> str:
+    lines = [f"{'size':>9} {'case':<11} {'build':>9} {'scan':>11} {'indexed':>11} {'speedup':>9}"]
+    for row in results:
+        lines.append(
+            f"{row['size']:>9} {row['case']:<11} {row['build_seconds']:>8.3f}s "
+            f"{row['scan_seconds'] * 1e3:>9.3f}ms {row['indexed_seconds'] * 1e3:>9.3f}ms {row['speedup']:>8.1f}x"
+        )
+    return "\n".join(lines)
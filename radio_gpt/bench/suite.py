@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import json
+import platform
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .. import news
+from ..generator import ShowGenerator
+from ..catalog import SongCatalog
+from ..catalog_file import MappedCatalog, write_catalog
+from ..energy import EnergyCurve
+from ..news import NewsFeed, NewsItem, Newsroom
+from ..playlist import PlaylistPlanner
+from ..showcache import ShowCache
+from ..similarity import SimilarityIndex
+from . import measure, synthetic_library
+
+SHOW_START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass
+class BenchCase:
+    """A named benchmark; ``setup`` returns the callable that gets timed.
+
+    ``setup`` gets a scratch directory that is removed after the case.
+    """
+
+    name: str
+    setup: Callable[[Path], Callable[[], object]]
+    repeat: int = 5
+
+
+def _build_show(hours: int) -> Callable[[Path], Callable[[], object]]:
+    def setup(scratch: Path) -> Callable[[], object]:
+        def run() -> object:
+            return ShowGenerator(seed=1).build_show(duration_minutes=hours * 60, start=SHOW_START)
+
+        return run
+
+    return setup
+
+
+def _serialize(method: str, hours: int = 24) -> Callable[[Path], Callable[[], object]]:
+    def setup(scratch: Path) -> Callable[[], object]:
+        show = ShowGenerator(seed=1).build_show(duration_minutes=hours * 60, start=SHOW_START)
+        return getattr(show, method)
+
+    return setup
+
+
+def _cached_show(tier: str, hours: int = 24) -> Callable[[Path], Callable[[], object]]:
+    def setup(scratch: Path) -> Callable[[], object]:
+        directory = scratch if tier == "disk" else None
+        cache = ShowCache(directory)
+        key = ShowGenerator(seed=1).cache_key(duration_minutes=hours * 60, start=SHOW_START)
+        cache.put(key, ShowGenerator(seed=1).build_show(duration_minutes=hours * 60, start=SHOW_START).to_json())
+
+        def run() -> object:
+            # A disk hit is what a fresh CLI process sees: index the directory, then read.
+            lookup = ShowCache(directory) if directory is not None else cache
+            return lookup.get(ShowGenerator(seed=1).cache_key(duration_minutes=hours * 60, start=SHOW_START))
+
+        return run
+
+    return setup
+
+
+def _encode(mode: str, hours: int = 280) -> Callable[[Path], Callable[[], object]]:
+    def setup(scratch: Path) -> Callable[[], object]:
+        show = ShowGenerator(seed=1).build_show(duration_minutes=hours * 60, start=SHOW_START)
+        if mode == "pretty":
+            return lambda: json.dumps(show.as_dict(), ensure_ascii=False, indent=2)
+        if mode == "cold":
+
+            def cold() -> object:
+                show.store.clear_encoding_cache()
+                return show.to_json()
+
+            return cold
+        if mode == "ndjson":
+            return lambda: b"".join(show.iter_ndjson())
+        return show.to_json
+
+    return setup
+
+
+def _playlist(size: int, lookup: str) -> Callable[[Path], Callable[[], object]]:
+    def setup(scratch: Path) -> Callable[[], object]:
+        planner = PlaylistPlanner(seed=1, catalog=SongCatalog(synthetic_library(size)))
+        if lookup == "energy":
+            return lambda: [planner.pick_energy_song(min_energy=0.7) for _ in range(1_000)]
+        if lookup == "search":
+            return lambda: planner.search("indie")
+        return lambda: [planner.next_song() for _ in range(1_000)]
+
+    return setup
+
+
+def _plan_energy(size: int) -> Callable[[Path], Callable[[], object]]:
+    def setup(scratch: Path) -> Callable[[], object]:
+        planner = PlaylistPlanner(seed=1, catalog=SongCatalog(synthetic_library(size)))
+        overheads = [77, 74, 79, 75, 78]
+        curve = EnergyCurve()
+        planner.plan_block(60, overheads, curve=curve)  # builds the planner's indexes
+        return lambda: planner.plan_block(55 * 60, overheads, curve=curve)
+
+    return setup
+
+
+def _nearest(size: int) -> Callable[[Path], Callable[[], object]]:
+    def setup(scratch: Path) -> Callable[[], object]:
+        index = SimilarityIndex(SongCatalog(synthetic_library(size)))
+        queries = range(0, size, max(1, size // 100))
+        return lambda: [index.nearest(song_id, 3) for song_id in queries]
+
+    return setup
+
+
+def _open_catalog(size: int) -> Callable[[Path], Callable[[], object]]:
+    def setup(scratch: Path) -> Callable[[], object]:
+        path = scratch / f"catalog-{size}.rgcat"
+        write_catalog(synthetic_library(size), path)
+
+        def run() -> object:
+            catalog = MappedCatalog(path)
+            return [catalog[song_id] for song_id in catalog.band_ids(0.7)[:100]]
+
+        return run
+
+    return setup
+
+
+def _synthetic_news(size: int) -> List[NewsItem]:
+    categories = ["wirtschaft", "verkehr", "gesundheit", "sport", "umwelt", "lokal", "kultur"]
+    return [
+        NewsItem(
+            headline=f"Meldung {idx}",
+            summary=f"Zusammenfassung der Meldung {idx}.",
+            category=categories[idx % len(categories)],
+            relevance=((idx * 7919) % 1000) / 1000,
+        )
+        for idx in range(size)
+    ]
+
+
+def _compose_news(size: int) -> Callable[[Path], Callable[[], object]]:
+    def setup(scratch: Path) -> Callable[[], object]:
+        newsroom = Newsroom(seed=1)
+        items = _synthetic_news(size)
+
+        def run() -> object:
+            saved = news.GLOBAL_NEWS
+            news.GLOBAL_NEWS = items
+            try:
+                return newsroom.compose_news()
+            finally:
+                news.GLOBAL_NEWS = saved
+
+        return run
+
+    return setup
+
+
+def _feed_news(size: int) -> Callable[[Path], Callable[[], object]]:
+    def setup(scratch: Path) -> Callable[[], object]:
+        newsroom = Newsroom(seed=1, feed=NewsFeed(_synthetic_news(size), max_items=size))
+        return newsroom.compose_news
+
+    return setup
+
+
+def _ingest_news(size: int) -> Callable[[Path], Callable[[], object]]:
+    def setup(scratch: Path) -> Callable[[], object]:
+        items = _synthetic_news(size)
+        return lambda: NewsFeed(items, max_items=size)
+
+    return setup
+
+
+def default_cases(*, quick: bool = False) -> List[BenchCase]:
+    library_sizes = [1_000, 10_000] if quick else [1_000, 100_000, 1_000_000]
+    feed_sizes = [1_000, 10_000] if quick else [1_000, 100_000]
+    show_hours = [1, 24] if quick else [1, 24, 168]
+
+    cases = [BenchCase(f"build_show/{hours}h", _build_show(hours)) for hours in show_hours]
+    cases += [
+        BenchCase(f"serialize/{method}/24h", _serialize(method))
+        for method in ("as_dict", "as_timeline", "render_text", "prefetch_manifest")
+    ]
+    cases += [BenchCase(f"cache/{tier}/24h", _cached_show(tier)) for tier in ("memory", "disk")]
+    encode_hours = 24 if quick else 280
+    cases += [
+        BenchCase(f"encode/{mode}/{encode_hours}h", _encode(mode, encode_hours))
+        for mode in ("pretty", "cold", "warm", "ndjson")
+    ]
+    for size in library_sizes:
+        repeat = 3 if size >= 1_000_000 else 5
+        cases += [
+            BenchCase(f"playlist/{lookup}/{size}", _playlist(size, lookup), repeat=repeat)
+            for lookup in ("energy", "search", "next_song")
+        ]
+        cases.append(BenchCase(f"plan/energy/{size}", _plan_energy(size), repeat=repeat))
+        cases.append(BenchCase(f"catalog/open/{size}", _open_catalog(size), repeat=repeat))
+        cases.append(BenchCase(f"similarity/nearest/{size}", _nearest(size), repeat=repeat))
+    cases += [BenchCase(f"news/compose/{size}", _compose_news(size)) for size in feed_sizes]
+    cases += [BenchCase(f"news/feed/{size}", _feed_news(size)) for size in feed_sizes]
+    cases += [BenchCase(f"news/ingest/{size}", _ingest_news(size), repeat=3) for size in feed_sizes]
+    return cases
+
+
+def run_suite(
+    cases: List[BenchCase],
+    *,
+    only: Optional[str] = None,
+    progress: Optional[Callable[[str], None]] = None,
+) -> dict:
+    results: Dict[str, dict] = {}
+    for case in cases:
+        if only and only not in case.name:
+            continue
+        if progress:
+            progress(case.name)
+        with tempfile.TemporaryDirectory(prefix="radio-gpt-bench-") as scratch:
+            results[case.name] = measure(case.setup(Path(scratch)), repeat=case.repeat)
+    return {
+        "created": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, *, threshold: float = 0.10) -> List[dict]:
+    """Lists cases whose best time or peak memory grew by more than ``threshold``."""
+
+    regressions = []
+    for name, result in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        for metric in ("best_seconds", "peak_bytes"):
+            before, after = previous[metric], result[metric]
+            if before > 0 and (after - before) / before > threshold:
+                regressions.append(
+                    {"case": name, "metric": metric, "before": before, "after": after, "change": after / before - 1}
+                )
+    return regressions
+
+
+def render(report: dict) -> str:
+    lines = [f"{'case':<32} {'best':>11} {'mean':>11} {'peak':>11} {'blocks':>9}"]
+    for name, row in report["results"].items():
+        lines.append(
+            f"{name:<32} {row['best_seconds'] * 1e3:>9.3f}ms {row['mean_seconds'] * 1e3:>9.3f}ms "
+            f"{row['peak_bytes'] / 1024:>8.1f}KiB {row['allocated_blocks']:>9}"
+        )
+    return "\n".join(lines)
+
+
+def load(path: Path) -> dict:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save(report: dict, path: Path) -> None:
+    path.write_text(json.dumps(report, indent=2), encoding="utf-8")
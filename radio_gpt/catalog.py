@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import hashlib
+import sys
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, FrozenSet, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .playlog import song_key
+
+if TYPE_CHECKING:
+    from .playlist import Song
+
+
+def normalize_tag(tag: str) -> str:
+    return sys.intern(tag.strip().casefold())
+
+
+@dataclass(frozen=True)
+class CatalogIndex:
+    """Energy order and tag postings of a catalog, e.g. read from a catalog file."""
+
+    # Song ids in ascending energy order, and their energies.
+    energy_order: Sequence[int]
+    sorted_energies: Sequence[float]
+    # Normalized tag -> ids of the songs carrying it, ascending.
+    tag_postings: Dict[str, Sequence[int]]
+
+    @classmethod
+    def build(cls, songs: Sequence[Song]) -> "CatalogIndex":
+        order = sorted(range(len(songs)), key=lambda idx: songs[idx].energy)
+        postings: Dict[str, List[int]] = {}
+        for idx, song in enumerate(songs):
+            seen = set()
+            for tag in song.tags:
+                key = normalize_tag(tag)
+                if key in seen:
+                    continue
+                seen.add(key)
+                postings.setdefault(key, []).append(idx)
+        return cls(
+            energy_order=tuple(order),
+            sorted_energies=[songs[idx].energy for idx in order],
+            tag_postings={tag: tuple(ids) for tag, ids in postings.items()},
+        )
+
+
+class SongCatalog:
+    """Immutable song collection with prebuilt energy and tag indexes.
+
+    ``index`` skips building the indexes; ``songs`` must then be a sequence
+    that matches it and is used as is (``MappedCatalog`` passes lazy views).
+    """
+
+    _BAND_CACHE_SIZE = 32
+
+    def __init__(self, songs: Iterable[Song], *, index: Optional[CatalogIndex] = None) -> None:
+        if index is None:
+            self._songs: Sequence[Song] = tuple(songs)
+            index = CatalogIndex.build(self._songs)
+        else:
+            self._songs = songs if isinstance(songs, Sequence) else tuple(songs)
+        self._energy_order = index.energy_order
+        self._sorted_energies = index.sorted_energies
+        self._tag_postings = index.tag_postings
+        self._tag_sets: Dict[str, FrozenSet[int]] = {}
+        self._bands: Dict[float, Tuple[Song, ...]] = {}
+        self._id_bands: Dict[float, Tuple[int, ...]] = {}
+        self._ids: Optional[Dict[int, int]] = None
+        self._columns: Optional[Tuple[Sequence[float], Sequence[int]]] = None
+        self._fingerprint: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self._songs)
+
+    def __iter__(self) -> Iterator[Song]:
+        return iter(self._songs)
+
+    def __getitem__(self, index: int) -> Song:
+        return self._songs[index]
+
+    def index(self, song: Song) -> int:
+        """Catalog id of ``song`` (looked up by identity)."""
+
+        if self._ids is None:
+            self._ids = {id(entry): idx for idx, entry in enumerate(self._songs)}
+        try:
+            return self._ids[id(song)]
+        except KeyError:
+            raise ValueError(f"{song.title!r} is not in the catalog") from None
+
+    def fingerprint(self) -> str:
+        """Hash of every song's data; changes whenever the catalog content does."""
+
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            for song in self._songs:
+                fields = (song.title, song.artist, str(int(song.duration.total_seconds())), repr(song.energy), *song.tags)
+                digest.update("\0".join(fields).encode("utf-8"))
+                digest.update(f"\1{song.platform}\1{song.source_id}\2".encode("utf-8"))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    @property
+    def songs(self) -> Sequence[Song]:
+        return self._songs
+
+    @property
+    def energies(self) -> Sequence[float]:
+        """Energy per song id."""
+
+        return self._energy_columns()[0]
+
+    @property
+    def durations(self) -> Sequence[int]:
+        """Duration in whole seconds per song id."""
+
+        return self._energy_columns()[1]
+
+    def feature_columns(self) -> Tuple[Sequence[int], Sequence[int]]:
+        """Per song id, a tag bitmask and a platform code (equal platforms, equal codes)."""
+
+        bits = {tag: bit for bit, tag in enumerate(self.tags)}
+        platforms: Dict[str, int] = {}
+        masks = [0] * len(self._songs)  # ints, not an array: there may be more than 64 tags
+        codes = array("H", [0]) * len(self._songs)
+        for idx, song in enumerate(self._songs):
+            mask = 0
+            for tag in song.tags:
+                mask |= 1 << bits[normalize_tag(tag)]
+            masks[idx] = mask
+            codes[idx] = platforms.setdefault(song.platform, len(platforms))
+        return masks, codes
+
+    def track_keys(self) -> Iterator[str]:
+        """Per song id, its play log identity (``playlog.song_key``)."""
+
+        return (song_key(song) for song in self._songs)
+
+    def artist_keys(self) -> Sequence[Hashable]:
+        """Per song id, a key that is equal for songs of the same artist."""
+
+        return [song.artist.casefold() for song in self._songs]
+
+    @property
+    def tags(self) -> List[str]:
+        return sorted(self._tag_postings)
+
+    def count_min_energy(self, min_energy: float) -> int:
+        return len(self._sorted_energies) - bisect_left(self._sorted_energies, min_energy)
+
+    def ids_min_energy(self, min_energy: float) -> Sequence[int]:
+        """Song ids with ``energy >= min_energy``, in ascending energy order."""
+
+        cut = bisect_left(self._sorted_energies, min_energy)
+        return self._energy_order[cut:]
+
+    def ids_near_energy(self, energy: float, count: int) -> List[int]:
+        """Ids of the ``count`` songs whose energy is closest to ``energy``."""
+
+        energies = self._sorted_energies
+        right = bisect_left(energies, energy)
+        left = right - 1
+        found: List[int] = []
+        while len(found) < count and (left >= 0 or right < len(energies)):
+            if right >= len(energies) or (left >= 0 and energy - energies[left] <= energies[right] - energy):
+                found.append(self._energy_order[left])
+                left -= 1
+            else:
+                found.append(self._energy_order[right])
+                right += 1
+        return found
+
+    def band_ids(self, min_energy: float) -> Tuple[int, ...]:
+        """Ids of songs with ``energy >= min_energy`` in catalog order.
+
+        Bands are cached per threshold so repeated picks with the same
+        threshold cost a dictionary lookup.
+        """
+
+        band = self._id_bands.get(min_energy)
+        if band is None:
+            band = tuple(sorted(self.ids_min_energy(min_energy)))
+            _remember(self._id_bands, min_energy, band, self._BAND_CACHE_SIZE)
+        return band
+
+    def with_min_energy(self, min_energy: float) -> Tuple[Song, ...]:
+        """Songs with ``energy >= min_energy`` in catalog order."""
+
+        band = self._bands.get(min_energy)
+        if band is None:
+            band = tuple(self._songs[idx] for idx in self.band_ids(min_energy))
+            _remember(self._bands, min_energy, band, self._BAND_CACHE_SIZE)
+        return band
+
+    def clear_bands(self) -> None:
+        """Drops the cached energy bands, e.g. to time ``with_min_energy`` itself."""
+
+        self._bands.clear()
+        self._id_bands.clear()
+
+    def ids_for_tag(self, tag: str) -> Sequence[int]:
+        return self._tag_postings.get(normalize_tag(tag), ())
+
+    def search(self, tag: str) -> List[Song]:
+        return [self._songs[idx] for idx in self.ids_for_tag(tag)]
+
+    def query(
+        self,
+        *,
+        min_energy: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None,
+        match_all: bool = False,
+    ) -> List[Song]:
+        """Combined lookup such as ``energy >= x AND tag in {...}``.
+
+        With ``match_all`` every tag must be present, otherwise any of them
+        matches. Results are returned in catalog order.
+        """
+
+        candidates: Optional[FrozenSet[int]] = None
+        if tags is not None:
+            tag_sets = sorted(
+                (self._tag_set(normalize_tag(tag)) for tag in tags),
+                key=len,
+            )
+            if not tag_sets:
+                candidates = frozenset()
+            elif match_all:
+                candidates = tag_sets[0].intersection(*tag_sets[1:])
+            else:
+                candidates = tag_sets[0].union(*tag_sets[1:])
+
+        if min_energy is not None:
+            if candidates is None:
+                return list(self.with_min_energy(min_energy))
+            if len(candidates) <= self.count_min_energy(min_energy):
+                energies = self.energies
+                ids: Iterable[int] = (idx for idx in candidates if energies[idx] >= min_energy)
+            else:
+                ids = candidates.intersection(self.ids_min_energy(min_energy))
+            return [self._songs[idx] for idx in sorted(ids)]
+
+        if candidates is None:
+            return list(self._songs)
+        return [self._songs[idx] for idx in sorted(candidates)]
+
+    def _tag_set(self, key: str) -> FrozenSet[int]:
+        found = self._tag_sets.get(key)
+        if found is None:
+            found = self._tag_sets[key] = frozenset(self._tag_postings.get(key, ()))
+        return found
+
+    def _energy_columns(self) -> Tuple[Sequence[float], Sequence[int]]:
+        if self._columns is None:
+            self._columns = (
+                array("d", (song.energy for song in self._songs)),
+                array("l", (int(song.duration.total_seconds()) for song in self._songs)),
+            )
+        return self._columns
+
+
+def _remember(cache: dict, key: object, value: object, limit: int) -> None:
+    if len(cache) >= limit:
+        cache.pop(next(iter(cache)))
+    cache[key] = value
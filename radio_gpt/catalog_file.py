@@ -0,0 +1,426 @@
+"""Binary on-disk song catalog, opened via ``mmap``.
+
+Layout: an 8-byte magic, ``<II`` (format version, header length), a JSON
+header and 8-byte aligned sections. Per-song data lives in fixed-width
+columns (duration, energy, platform code and string ids for title, artist
+and source id); strings are stored once in a shared table. Tag names are
+interned in the header and each song points at its run of tag ids, so the
+number of distinct tags is not limited. The energy order and the tag
+postings are precomputed, so opening a file only parses the header.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import mmap
+import struct
+import sys
+import time
+from array import array
+from collections.abc import Sequence
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union, overload
+
+from .catalog import CatalogIndex, SongCatalog, normalize_tag
+from .playlist import Song
+from .playlog import track_key
+
+MAGIC = b"RGPTCAT\x00"
+VERSION = 2
+NO_STRING = 0xFFFFFFFF
+
+_PREAMBLE = struct.Struct("<II")
+_ALIGN = 8
+
+# section name -> array typecode
+_SECTIONS = {
+    "durations": "I",
+    "energies": "d",
+    "platforms": "B",
+    "tag_offsets": "I",
+    "tag_ids": "I",
+    "titles": "I",
+    "artists": "I",
+    "artist_groups": "I",
+    "sources": "I",
+    "energy_order": "I",
+    "sorted_energies": "d",
+    "postings": "I",
+    "string_offsets": "Q",
+    "strings": "B",
+}
+# Row fields ``song_from_row`` needs; null counts as missing.
+_REQUIRED_FIELDS = ("title", "artist", "duration", "energy")
+
+
+def write_catalog(songs: Iterable[Song], path: Union[str, Path]) -> int:
+    """Writes ``songs`` as a binary catalog; returns the number of songs."""
+
+    columns = {name: array(code) for name, code in _SECTIONS.items()}
+    columns["string_offsets"].append(0)
+    columns["tag_offsets"].append(0)
+    strings: Dict[str, int] = {}
+    blob = bytearray()
+    artist_groups: Dict[str, int] = {}
+    platforms: Dict[str, int] = {}
+    tag_ids: Dict[str, int] = {}
+    tag_names: List[str] = []
+    postings: List[List[int]] = []
+
+    def intern(value: str) -> int:
+        found = strings.get(value)
+        if found is None:
+            found = strings[value] = len(strings)
+            blob.extend(value.encode("utf-8"))
+            columns["string_offsets"].append(len(blob))
+        return found
+
+    for idx, song in enumerate(songs):
+        columns["durations"].append(int(song.duration.total_seconds()))
+        columns["energies"].append(song.energy)
+        platform = platforms.setdefault(song.platform, len(platforms))
+        if platform > 255:
+            raise ValueError("catalog files support at most 256 platforms")
+        columns["platforms"].append(platform)
+        seen = set()
+        for tag in song.tags:
+            key = normalize_tag(tag)
+            tag_id = tag_ids.get(key)
+            if tag_id is None:
+                tag_id = tag_ids[key] = len(tag_names)
+                tag_names.append(tag)
+                postings.append([])
+            if tag_id not in seen:
+                seen.add(tag_id)
+                postings[tag_id].append(idx)
+                columns["tag_ids"].append(tag_id)
+        columns["tag_offsets"].append(len(columns["tag_ids"]))
+        columns["titles"].append(intern(song.title))
+        artist = intern(song.artist)
+        columns["artists"].append(artist)
+        columns["artist_groups"].append(artist_groups.setdefault(song.artist.casefold(), artist))
+        columns["sources"].append(NO_STRING if song.source_id is None else intern(song.source_id))
+
+    energies = columns["energies"]
+    order = sorted(range(len(energies)), key=energies.__getitem__)
+    columns["energy_order"].extend(order)
+    columns["sorted_energies"].extend(energies[idx] for idx in order)
+    tags = []
+    for name, ids in zip(tag_names, postings):
+        tags.append([name, len(columns["postings"]), len(ids)])
+        columns["postings"].extend(ids)
+    columns["strings"].frombytes(bytes(blob))
+
+    header = {
+        "count": len(energies),
+        "byteorder": sys.byteorder,
+        "platforms": list(platforms),
+        "tags": tags,
+        "sections": {},
+    }
+    # Section offsets depend on the header length, so iterate until they settle.
+    while True:
+        head = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        offset = _aligned(len(MAGIC) + _PREAMBLE.size + len(head))
+        sections = {}
+        for name, column in columns.items():
+            sections[name] = [offset, len(column)]
+            offset = _aligned(offset + len(column) * column.itemsize)
+        if sections == header["sections"]:
+            break
+        header["sections"] = sections
+
+    with open(path, "wb") as handle:
+        handle.write(MAGIC + _PREAMBLE.pack(VERSION, len(head)) + head)
+        for name, column in columns.items():
+            handle.write(b"\0" * (sections[name][0] - handle.tell()))
+            column.tofile(handle)
+        handle.write(b"\0" * (_aligned(handle.tell()) - handle.tell()))
+    return len(energies)
+
+
+class MappedCatalog(SongCatalog):
+    """``SongCatalog`` backed by a memory-mapped catalog file.
+
+    Lookups run directly on the mapped columns. ``Song`` objects are only
+    created when a track is accessed and are kept afterwards, so repeated
+    picks return the same object.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = str(path)
+        with open(path, "rb") as handle:
+            if not handle.seek(0, 2):  # mmap refuses empty files
+                raise ValueError(f"{self.path} is not a RadioGPT catalog file")
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        try:
+            header, sections = _read_sections(view, self.path)
+        except ValueError:
+            view.release()
+            self._mmap.close()
+            raise
+        self._count: int = header["count"]
+        self._durations = sections["durations"]
+        self._energies = sections["energies"]
+        self._platform_codes = sections["platforms"]
+        self._tag_offsets = sections["tag_offsets"]
+        self._tag_ids = sections["tag_ids"]
+        self._titles = sections["titles"]
+        self._artists = sections["artists"]
+        self._artist_groups = sections["artist_groups"]
+        self._sources = sections["sources"]
+        self._string_offsets = sections["string_offsets"]
+        self._strings = sections["strings"]
+        self._platform_names: List[str] = header["platforms"]
+        self._tag_names: List[str] = [name for name, _, _ in header["tags"]]
+        self._materialized: Dict[int, Song] = {}
+
+        postings = sections["postings"]
+        tag_postings = {
+            normalize_tag(name): postings[offset : offset + count] for name, offset, count in header["tags"]
+        }
+        # Every view into the mapping, released by ``close``.
+        self._views: List[memoryview] = [view, *sections.values(), *tag_postings.values()]
+        super().__init__(
+            _LazySongs(self),
+            index=CatalogIndex(
+                energy_order=sections["energy_order"],
+                sorted_energies=sections["sorted_energies"],
+                tag_postings=tag_postings,
+            ),
+        )
+        # Read the columns directly and register songs as they are materialized,
+        # instead of building both from every song.
+        self._columns = (self._energies, self._durations)
+        self._ids = {}
+
+    def __enter__(self) -> "MappedCatalog":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmaps the file; songs created so far stay usable, lookups fail afterwards.
+
+        Id sequences handed out earlier (e.g. by ``ids_for_tag``) point into
+        the mapping and keep it alive until they are garbage collected.
+        """
+
+        if self._mmap.closed:
+            return
+        for view in self._views:
+            view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    def fingerprint(self) -> str:
+        # The file is the catalog, so hashing its bytes is enough.
+        if self._fingerprint is None:
+            self._fingerprint = hashlib.blake2b(self._mmap, digest_size=16).hexdigest()
+        return self._fingerprint
+
+    def artist_keys(self) -> Sequence[int]:
+        return self._artist_groups
+
+    def track_keys(self) -> Iterator[str]:
+        # Read from the string table, so no Song objects are created.
+        for index in range(self._count):
+            platform = self._platform_names[self._platform_codes[index]]
+            source = self._sources[index]
+            if source != NO_STRING:
+                yield track_key(platform, self._string(source))
+            else:
+                yield track_key(platform, None, self._string(self._artists[index]), self._string(self._titles[index]))
+
+    def feature_columns(self) -> Tuple[Sequence[int], Sequence[int]]:
+        masks = [0] * self._count
+        for bit, ids in enumerate(self._tag_postings.values()):
+            for idx in ids:
+                masks[idx] |= 1 << bit
+        return masks, self._platform_codes
+
+    @property
+    def materialized(self) -> int:
+        """Number of ``Song`` objects created so far."""
+
+        return len(self._materialized)
+
+    def song(self, index: int) -> Song:
+        song = self._materialized.get(index)
+        if song is not None:
+            return song
+        if not 0 <= index < self._count:
+            raise IndexError("catalog index out of range")
+        source = self._sources[index]
+        song = Song(
+            self._string(self._titles[index]),
+            self._string(self._artists[index]),
+            timedelta(seconds=self._durations[index]),
+            self._energies[index],
+            self._tags(index),
+            self._platform_names[self._platform_codes[index]],
+            None if source == NO_STRING else self._string(source),
+        )
+        self._materialized[index] = song
+        self._ids[id(song)] = index
+        return song
+
+    def _string(self, string_id: int) -> str:
+        offsets = self._string_offsets
+        return str(self._strings[offsets[string_id] : offsets[string_id + 1]], "utf-8")
+
+    def _tags(self, index: int) -> List[str]:
+        offsets = self._tag_offsets
+        return [self._tag_names[tag_id] for tag_id in self._tag_ids[offsets[index] : offsets[index + 1]]]
+
+
+def _read_sections(view: memoryview, path: str) -> Tuple[dict, Dict[str, memoryview]]:
+    """Header and typed section views of a mapped catalog file; ``ValueError`` if it is damaged."""
+
+    if bytes(view[: len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path} is not a RadioGPT catalog file")
+    try:
+        version, head_length = _PREAMBLE.unpack_from(view, len(MAGIC))
+    except struct.error:
+        raise ValueError(f"{path} is truncated") from None
+    if version != VERSION:
+        raise ValueError(f"{path} has unsupported catalog version {version}")
+    start = len(MAGIC) + _PREAMBLE.size
+    try:
+        header = json.loads(bytes(view[start : start + head_length]))
+        missing = {"byteorder", "count", "platforms", "tags", "sections"} - header.keys()
+    except (AttributeError, ValueError) as exc:
+        raise ValueError(f"{path} is damaged ({exc})") from None
+    if missing:
+        raise ValueError(f"{path} is damaged (header lacks {', '.join(sorted(missing))})")
+    if header["byteorder"] != sys.byteorder:
+        raise ValueError(f"{path} was written on a machine with a different byte order")
+
+    sections: Dict[str, memoryview] = {}
+    try:
+        for name, code in _SECTIONS.items():
+            offset, length = header["sections"][name]
+            end = offset + length * array(code).itemsize
+            if end > len(view):
+                raise ValueError(f"section {name!r} runs past the end of the file")
+            sections[name] = view[offset:end].cast(code)
+    except (KeyError, TypeError, ValueError) as exc:
+        # Views still pointing into the mapping would keep it from being closed.
+        for section in sections.values():
+            section.release()
+        raise ValueError(f"{path} is damaged ({exc})") from None
+    return header, sections
+
+
+class _LazySongs(Sequence):
+    """Sequence view that materializes songs of a ``MappedCatalog`` on access."""
+
+    def __init__(self, catalog: MappedCatalog) -> None:
+        self._catalog = catalog
+
+    def __len__(self) -> int:
+        return self._catalog._count
+
+    @overload
+    def __getitem__(self, index: int) -> Song: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Song]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._catalog.song(idx) for idx in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return self._catalog.song(index)
+
+    def __iter__(self) -> Iterator[Song]:
+        return (self._catalog.song(idx) for idx in range(len(self)))
+
+
+def read_songs(path: Union[str, Path]) -> Iterator[Song]:
+    """Songs from a CSV or JSON export.
+
+    Both formats use the fields ``title``, ``artist``, ``duration``
+    (seconds or ``m:ss``), ``energy``, ``tags`` (list, or ``;``/``|``
+    separated), ``platform`` and ``source_id``.
+    """
+
+    path = Path(path)
+    if path.suffix.lower() == ".json":
+        with path.open(encoding="utf-8") as handle:
+            data = json.load(handle)
+        rows: Iterable[dict] = data.get("songs", []) if isinstance(data, dict) else data
+        for row in rows:
+            yield song_from_row(row)
+        return
+    with path.open(encoding="utf-8", newline="") as handle:
+        for row in csv.DictReader(handle):
+            yield song_from_row(row)
+
+
+def song_from_row(row: dict) -> Song:
+    """One song from a CSV/JSON row (fields as in ``read_songs``)."""
+
+    try:
+        for field in _REQUIRED_FIELDS:
+            if row[field] is None:
+                raise ValueError(f"{field} is null")
+        tags = row.get("tags") or []
+        if isinstance(tags, str):
+            tags = [tag.strip() for tag in tags.replace("|", ";").split(";") if tag.strip()]
+        return Song(
+            str(row["title"]),
+            str(row["artist"]),
+            timedelta(seconds=_parse_duration(row["duration"])),
+            float(row["energy"]),
+            list(tags),
+            str(row.get("platform") or "INTERNAL"),
+            str(row["source_id"]) if row.get("source_id") else None,
+        )
+    except (KeyError, ValueError, TypeError, AttributeError) as exc:
+        raise ValueError(f"invalid song entry {row!r}: {exc}") from None
+
+
+def _parse_duration(value: object) -> int:
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip()
+    seconds = 0
+    for part in text.split(":"):
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="radio_gpt catalog",
+        description="Wandelt einen CSV- oder JSON-Export in eine binäre Katalogdatei um.",
+    )
+    parser.add_argument("source", type=Path, help="CSV- oder JSON-Datei mit Songs")
+    parser.add_argument("output", type=Path, help="Zieldatei für den binären Katalog")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    started = time.perf_counter()
+    try:
+        count = write_catalog(read_songs(args.source), args.output)
+    except (OSError, ValueError) as exc:
+        raise SystemExit(str(exc))
+    elapsed = time.perf_counter() - started
+    print(f"{count} Songs nach {args.output} geschrieben ({elapsed:.2f}s)", file=sys.stderr)
+    return 0
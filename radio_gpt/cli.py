@@ -1,11 +1,39 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import json
-from datetime import datetime
-from typing import Optional
+import os
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from typing import List, Optional, Union
+from xml.etree.ElementTree import ParseError
 
-from .generator import ShowGenerator
+from . import batch, catalog_file, daemon, playlog, profiling, providers, serialization, server
+from .backtiming import BacktimeRules
+from .energy import EnergyCurve
+from .generator import RadioShow, ShowGenerator, ShowSegment
+from .ingest import ingest
+from .news import NewsFeed
+from .prefetch import PrefetchPolicy
+from .providers import ContentProviders
+from .rotation import RotationRules
+from .showcache import ShowCache
+from .similarity import TransitionRules
+from .state import load_state, save_state
+from .templates import PhraseBook, load_phrasebook
+from .tts import ClipCache, LocalToneEngine, TTSRenderer
+
+COMMANDS = {
+    "batch": batch.main,
+    "catalog": catalog_file.main,
+    "client": daemon.client_main,
+    "content": providers.main,
+    "daemon": daemon.main,
+    "history": playlog.main,
+    "serve": server.main,
+}
 
 
 def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
@@ -14,28 +42,540 @@ def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
     parser.add_argument("--host", type=str, default="Alex", help="Name des Hosts")
     parser.add_argument("--station", type=str, default="RadioGPT", help="Stationsname")
     parser.add_argument("--seed", type=int, default=None, help="Optionaler Seed für reproduzierbare Abläufe")
+    parser.add_argument(
+        "--templates",
+        type=str,
+        default=None,
+        help="JSON-Datei mit eigenen Moderationsbausteinen (Phrase-Banks)",
+    )
+    parser.add_argument(
+        "--catalog",
+        type=str,
+        default=None,
+        help="Binäre Katalogdatei (siehe 'radio_gpt catalog') statt der eingebauten Songliste",
+    )
+    parser.add_argument(
+        "--news",
+        action="append",
+        default=[],
+        metavar="DATEI",
+        help="Nachrichten aus JSONL- oder RSS/Atom-Datei einlesen (mehrfach möglich, ersetzt die eingebauten Meldungen)",
+    )
+    parser.add_argument(
+        "--local-news",
+        action="append",
+        default=[],
+        metavar="DATEI",
+        help="Lokale Nachrichten aus JSONL- oder RSS/Atom-Datei einlesen (mehrfach möglich)",
+    )
+    parser.add_argument(
+        "--song-repeat",
+        type=float,
+        default=None,
+        metavar="MIN",
+        help="Rotationsregeln aktivieren: Mindestabstand in Minuten, bevor ein Song wiederholt wird",
+    )
+    parser.add_argument(
+        "--artist-separation",
+        type=float,
+        default=None,
+        metavar="MIN",
+        help="Rotationsregeln aktivieren: Mindestabstand in Minuten zwischen Songs desselben Artists",
+    )
+    parser.add_argument(
+        "--tag-separation",
+        type=float,
+        default=None,
+        metavar="MIN",
+        help="Rotationsregeln aktivieren: Mindestabstand in Minuten zwischen Songs mit gleichem Tag",
+    )
+    parser.add_argument(
+        "--energy-curve",
+        nargs="?",
+        type=_curve_arg,
+        const=EnergyCurve(),
+        default=None,
+        metavar="KURVE",
+        help="Songblöcke entlang einer Energiekurve planen, z. B. '0:0.6,0.5:0.85,1:0.65' (ohne Wert: Standardkurve)",
+    )
+    parser.add_argument(
+        "--backtime",
+        action="store_true",
+        help="Schluss der Sendung so planen, dass sie sekundengenau zur Zielzeit endet",
+    )
+    parser.add_argument(
+        "--max-fade",
+        type=int,
+        default=20,
+        metavar="SEK",
+        help="Mit --backtime: höchstens so viele Sekunden darf der letzte Song früher ausgeblendet werden (Standard: 20)",
+    )
+    parser.add_argument(
+        "--smooth",
+        action="store_true",
+        help="Sanfte Übergänge: jeder Rotationssong ähnelt dem vorherigen in Energie, Länge, Tags und Plattform",
+    )
+    parser.add_argument(
+        "--state",
+        type=str,
+        default=None,
+        metavar="DATEI",
+        help="Generatorzustand aus der Datei fortsetzen und danach dort speichern (Sendestart: Ende der letzten Sendung)",
+    )
+    parser.add_argument(
+        "--play-log",
+        type=str,
+        default=None,
+        metavar="DATEI",
+        help="Geplante Songs, Jingles und Moderationen an das Sendeprotokoll (SQLite) anhängen; die Rotation berücksichtigt dann auch frühere Sendungen",
+    )
+    parser.add_argument(
+        "--providers",
+        type=str,
+        default=None,
+        metavar="URL",
+        help="Katalog, Nachrichten, Wetter und Jingles parallel von diesen Diensten laden (siehe 'radio_gpt content')",
+    )
+    parser.add_argument(
+        "--provider-timeout",
+        type=float,
+        default=2.0,
+        metavar="SEK",
+        help="Mit --providers: so lange wird auf jede Quelle gewartet, danach gelten die Standardinhalte (Standard: 2)",
+    )
+    parser.add_argument(
+        "--cache",
+        type=str,
+        default=None,
+        metavar="VERZEICHNIS",
+        help="Mit --seed und --start: JSON-Ausgabe im Verzeichnis zwischenspeichern und bei gleichen Parametern, Katalog und Vorlagen wiederverwenden",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=1024,
+        metavar="MB",
+        help="Maximale Größe des Sendungs-Caches in MB (Standard: 1024)",
+    )
+    parser.add_argument(
+        "--voice",
+        type=str,
+        default=None,
+        help="TTS-Stimme für die Moderationen (Standard: Name des Hosts)",
+    )
+    parser.add_argument(
+        "--tts-cache",
+        type=str,
+        default=None,
+        metavar="VERZEICHNIS",
+        help="Alle Moderationen vorab rendern und im Verzeichnis zwischenspeichern (nach Inhalt adressiert)",
+    )
+    parser.add_argument(
+        "--tts-cache-size",
+        type=int,
+        default=512,
+        metavar="MB",
+        help="Maximale Größe des TTS-Caches in MB, älteste Clips werden zuerst verdrängt (Standard: 512)",
+    )
+    parser.add_argument(
+        "--tts-workers",
+        type=int,
+        default=4,
+        help="Anzahl paralleler TTS-Renderjobs (Standard: 4)",
+    )
     parser.add_argument("--json", action="store_true", help="Ergebnis als JSON statt als Text ausgeben")
     parser.add_argument(
         "--timeline",
         action="store_true",
         help="Synchronisierte Timeline für Webplayer ausgeben",
     )
+    parser.add_argument(
+        "--format",
+        choices=["pretty", "compact", "ndjson"],
+        default="pretty",
+        help="JSON-Ausgabeformat für --json/--timeline (Standard: pretty)",
+    )
+    parser.add_argument(
+        "--start",
+        type=_time_arg,
+        default=None,
+        help="Sendestart als ISO-8601-Zeitpunkt (Standard: jetzt, UTC)",
+    )
+    parser.add_argument(
+        "--now-playing",
+        nargs="?",
+        type=_moment_arg,
+        const="now",
+        default=None,
+        metavar="ZEIT",
+        help="Nur das zum Zeitpunkt laufende Element und die folgenden ausgeben (Standard: jetzt)",
+    )
+    parser.add_argument(
+        "--upcoming",
+        type=_count_arg,
+        default=3,
+        help="Anzahl der folgenden Elemente für --now-playing (Standard: 3)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Segmente sofort als NDJSON (ein JSON-Objekt pro Zeile) ausgeben",
+    )
+    parser.add_argument(
+        "--prefetch",
+        action="store_true",
+        help="Prefetch-Manifest aller Assets ausgeben (mit --timeline: in die Timeline einbetten)",
+    )
+    parser.add_argument(
+        "--prefetch-lead",
+        type=int,
+        default=120,
+        metavar="SEK",
+        help="Vorlaufzeit in Sekunden, mit der Assets vor ihrem Einsatz geladen werden (Standard: 120)",
+    )
+    parser.add_argument(
+        "--prefetch-window",
+        type=int,
+        default=300,
+        metavar="SEK",
+        help="Assets, deren Ladezeitpunkte so nah beieinander liegen, bilden einen Batch (Standard: 300)",
+    )
+    parser.add_argument(
+        "--prefetch-batch-size",
+        type=int,
+        default=50,
+        help="Maximale Anzahl Assets pro Batch (Standard: 50)",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="DATEI",
+        help="Zeiten pro Generierungsschritt auf stderr ausgeben und optional als Datei speichern",
+    )
+    parser.add_argument(
+        "--profile-format",
+        choices=["json", "prometheus"],
+        default=None,
+        help="Format der Profil-Datei (Standard: nach Endung, .prom = prometheus, sonst json)",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="Zusätzlich den Spitzenverbrauch an Speicher per tracemalloc messen",
+    )
     return parser.parse_args(argv)
 
 
 def main(argv: Optional[list[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
     args = parse_args(argv)
-    generator = ShowGenerator(station=args.station, host=args.host, seed=args.seed)
-    show = generator.build_show(duration_minutes=args.duration)
+    if args.profile is None:
+        return run(args)
 
-    if args.timeline:
-        print(json.dumps(show.as_timeline(), ensure_ascii=False, indent=2))
-    elif args.json:
-        print(json.dumps(show.as_dict(), ensure_ascii=False, indent=2))
+    profiler = profiling.Profiler(memory=args.profile_memory)
+    with profiler:
+        status = run(args)
+    print(profiler.render(), file=sys.stderr)
+    if args.profile:
+        write_profile(profiler, args.profile, args.profile_format)
+    return status
+
+
+def run(args: argparse.Namespace) -> int:
+    phrases = phrasebook(args.templates)
+    options = dict(
+        station=args.station,
+        host=args.host,
+        seed=args.seed,
+        phrases=phrases,
+        rotation=rotation_rules(args),
+        energy_curve=args.energy_curve,
+        catalog=mapped_catalog(args),
+        news_feed=news_feed(args),
+        voice=args.voice,
+        backtime=BacktimeRules(max_fade=max(0, args.max_fade)) if args.backtime else None,
+        play_log=play_log(args),
+        transitions=TransitionRules() if args.smooth else None,
+    )
+    if args.tts_cache:
+        options["tts_suffix"] = LocalToneEngine.suffix
+    generator = fetch_generator(options, args) if args.providers else ShowGenerator(**options)
+    if args.state:
+        resume(generator, args)
+    if args.cache and cacheable(args):
+        status = print_cached(generator, args)
+        if status is not None:
+            return status
+    if args.stream:
+        status = stream_segments(generator, args)
+        if args.state and status == 0:
+            save_state(generator.snapshot(), args.state)
+        return status
+    show = generator.build_show(duration_minutes=args.duration, start=args.start)
+    if args.backtime and show.timing_error:
+        seconds = int(show.timing_error.total_seconds())
+        direction = "zu spät" if seconds > 0 else "zu früh"
+        print(f"Backtiming: keine exakte Lösung, Sendung endet {abs(seconds)} s {direction}", file=sys.stderr)
+    if args.state:
+        save_state(generator.snapshot(), args.state)
+    if args.tts_cache:
+        render_tts(show, generator.voice, args)
+
+    if args.now_playing is not None:
+        return print_now_playing(show, args)
+    policy = prefetch_policy(args)
+    if policy is not None and not args.timeline:
+        return print_prefetch(show, policy, args)
+    if (args.timeline or args.json) and args.format != "pretty":
+        out = sys.stdout.buffer
+        if args.format == "ndjson":
+            out.writelines(show.iter_ndjson(timeline=args.timeline))
+        else:
+            out.write(show.to_json(timeline=args.timeline, prefetch=policy) + b"\n")
+        out.flush()
+    elif args.timeline or args.json:
+        document = show.as_timeline(prefetch=policy) if args.timeline else show.as_dict()
+        with profiling.stage("serialization"):
+            text = json.dumps(document, ensure_ascii=False, indent=2)
+        print(text)
     else:
         print(show.render_text())
     return 0
 
 
+def fetch_generator(options: dict, args: argparse.Namespace) -> ShowGenerator:
+    async def fetch() -> ShowGenerator:
+        sources = ContentProviders.from_base_url(args.providers, timeout=args.provider_timeout)
+        try:
+            return await ShowGenerator.from_providers(sources, **options)
+        finally:
+            await sources.close()
+            for name, stats in sources.stats.items():
+                if stats.fallbacks:
+                    reason = "Zeitüberschreitung" if stats.timeouts else "Fehler"
+                    print(f"Inhaltsquelle {name} nicht verfügbar ({reason}), verwende Standardinhalte", file=sys.stderr)
+
+    with profiling.stage("providers"):
+        return asyncio.run(fetch())
+
+
+def cacheable(args: argparse.Namespace) -> bool:
+    # Only plain JSON/timeline output; everything else needs the built show or has side effects.
+    return (
+        (args.json or args.timeline)
+        and args.format != "ndjson"
+        and not (args.stream or args.state or args.tts_cache)
+        and args.now_playing is None
+        and prefetch_policy(args) is None
+    )
+
+
+def print_cached(generator: ShowGenerator, args: argparse.Namespace) -> Optional[int]:
+    output = "timeline" if args.timeline else "json"
+    key = generator.cache_key(duration_minutes=args.duration, start=args.start, output=output)
+    if key is None:
+        return None
+    cache = ShowCache(args.cache, disk_bytes=max(1, args.cache_size) * 1024 * 1024)
+
+    def build() -> bytes:
+        show = generator.build_show(duration_minutes=args.duration, start=args.start)
+        return show.to_json(timeline=args.timeline)
+
+    body = cache.fetch(key, build)
+    if args.timeline:
+        body = serialization.refresh_server_time(body)
+    if args.format == "pretty":
+        print(json.dumps(json.loads(body), ensure_ascii=False, indent=2))
+    else:
+        sys.stdout.buffer.write(body + b"\n")
+        sys.stdout.buffer.flush()
+    return 0
+
+
+def write_profile(profiler: profiling.Profiler, path: str, fmt: Optional[str]) -> None:
+    if fmt is None:
+        fmt = "prometheus" if path.endswith(".prom") else "json"
+    if fmt == "prometheus":
+        content = profiler.to_prometheus()
+    else:
+        content = json.dumps(profiler.report(), indent=2) + "\n"
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write(content)
+
+
+def phrasebook(path: Optional[str]) -> Optional[PhraseBook]:
+    if not path:
+        return None
+    try:
+        return load_phrasebook(path)
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f"Vorlagen aus {path} können nicht geladen werden: {exc}")
+
+
+def mapped_catalog(args: argparse.Namespace) -> Optional[catalog_file.MappedCatalog]:
+    if not args.catalog:
+        return None
+    try:
+        return catalog_file.MappedCatalog(args.catalog)
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f"Katalog {args.catalog} kann nicht geöffnet werden: {exc}")
+
+
+def play_log(args: argparse.Namespace) -> Optional[playlog.PlayLog]:
+    if not args.play_log:
+        return None
+    try:
+        return playlog.PlayLog(args.play_log)
+    except (sqlite3.Error, ValueError) as exc:
+        raise SystemExit(f"Sendeprotokoll {args.play_log} kann nicht geöffnet werden: {exc}")
+
+
+def resume(generator: ShowGenerator, args: argparse.Namespace) -> None:
+    try:
+        snapshot = load_state(args.state)
+        if snapshot is not None:
+            generator.restore(snapshot)
+    except (ValueError, KeyError) as exc:
+        raise SystemExit(f"Zustand aus {args.state} passt nicht zu dieser Konfiguration: {exc}")
+    if args.start is None:
+        args.start = generator.resume_at
+
+
+def render_tts(show: RadioShow, voice: str, args: argparse.Namespace) -> None:
+    engine = LocalToneEngine()
+    cache = ClipCache(args.tts_cache, max_bytes=args.tts_cache_size * 1024 * 1024, suffix=engine.suffix)
+    renderer = TTSRenderer(engine, cache, workers=args.tts_workers)
+    stats = renderer.render_show(show, voice=voice)
+    print(
+        f"TTS: {stats.clips} Clip(s), {stats.rendered} neu gerendert, {stats.cached} aus dem Cache",
+        file=sys.stderr,
+    )
+
+
+def prefetch_policy(args: argparse.Namespace) -> Optional[PrefetchPolicy]:
+    if not args.prefetch:
+        return None
+    return PrefetchPolicy(
+        lead_seconds=args.prefetch_lead,
+        batch_window=args.prefetch_window,
+        batch_size=max(1, args.prefetch_batch_size),
+    )
+
+
+def print_prefetch(show: RadioShow, policy: PrefetchPolicy, args: argparse.Namespace) -> int:
+    manifest = show.prefetch_manifest(policy).as_dict()
+    if args.format == "pretty":
+        print(json.dumps(manifest, ensure_ascii=False, indent=2))
+    else:
+        sys.stdout.buffer.write(serialization.dumps(manifest) + b"\n")
+        sys.stdout.buffer.flush()
+    return 0
+
+
+def rotation_rules(args: argparse.Namespace) -> Optional[RotationRules]:
+    minutes = (args.song_repeat, args.artist_separation, args.tag_separation)
+    if all(value is None for value in minutes):
+        return None
+    defaults = RotationRules()
+    return RotationRules(
+        song_repeat=defaults.song_repeat if args.song_repeat is None else args.song_repeat * 60,
+        artist_separation=defaults.artist_separation if args.artist_separation is None else args.artist_separation * 60,
+        tag_separation=defaults.tag_separation if args.tag_separation is None else args.tag_separation * 60,
+    )
+
+
+def news_feed(args: argparse.Namespace) -> Optional[NewsFeed]:
+    if not args.news and not args.local_news:
+        return None
+    rejected: List[str] = []
+    try:
+        feed = ingest(args.news, rejected=rejected)
+        ingest(args.local_news, feed, local=True, rejected=rejected)
+    except (OSError, ValueError, ParseError) as exc:
+        raise SystemExit(f"Nachrichten konnten nicht gelesen werden: {exc}")
+    if rejected:
+        print(f"Warnung: {len(rejected)} ungültige Nachrichtenzeile(n) übersprungen, z. B. {rejected[0]}", file=sys.stderr)
+    return feed
+
+
+def stream_segments(generator: ShowGenerator, args: argparse.Namespace) -> int:
+    out = sys.stdout.buffer
+    try:
+        for segment in generator.iter_segments(duration_minutes=args.duration, start=args.start):
+            record = segment.as_timeline_item() if args.timeline else segment.as_dict()
+            out.write(serialization.dumps(record) + b"\n")
+            out.flush()
+    except BrokenPipeError:
+        # Downstream consumer (e.g. ``head``) closed the pipe early.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), out.fileno())
+        return 1
+    return 0
+
+
+def print_now_playing(show: RadioShow, args: argparse.Namespace) -> int:
+    when = datetime.now(timezone.utc) if args.now_playing == "now" else args.now_playing
+    current = show.segment_at(when)
+    upcoming = show.upcoming(when, args.upcoming)
+
+    if args.json or args.timeline:
+        encode = ShowSegment.as_timeline_item if args.timeline else ShowSegment.as_dict
+        print(
+            json.dumps(
+                {
+                    "station": show.station,
+                    "at": when.isoformat(),
+                    "now": encode(current) if current else None,
+                    "upcoming": [encode(segment) for segment in upcoming],
+                },
+                ensure_ascii=False,
+                indent=2,
+            )
+        )
+        return 0
+
+    if current:
+        remaining = int((current.start + current.duration - when).total_seconds())
+        print(f"JETZT  [{current.start:%H:%M:%S}] {current.kind.upper()}: {current.title} (noch {remaining}s)")
+    else:
+        print(f"JETZT  — kein Element um {when:%Y-%m-%d %H:%M:%S}")
+    for segment in upcoming:
+        print(f"DANACH [{segment.start:%H:%M:%S}] {segment.kind.upper()}: {segment.title}")
+    return 0
+
+
+def _time_arg(value: str) -> datetime:
+    try:
+        return serialization.parse_time(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ungültiger Zeitpunkt {value!r} (ISO-8601 erwartet)") from None
+
+
+def _count_arg(value: str) -> int:
+    try:
+        count = int(value)
+    except ValueError:
+        count = -1
+    if count < 0:
+        raise argparse.ArgumentTypeError(f"ungültige Anzahl {value!r} (ganze Zahl ab 0 erwartet)")
+    return count
+
+
+def _moment_arg(value: str) -> Union[str, datetime]:
+    return value if value == "now" else _time_arg(value)
+
+
+def _curve_arg(value: str) -> EnergyCurve:
+    if not value:
+        return EnergyCurve()
+    try:
+        return EnergyCurve.parse(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"ungültige Energiekurve {value!r} ({exc})") from None
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -0,0 +1,340 @@
+"""Long-running generation daemon on a Unix domain socket.
+
+Requests and responses are single JSON lines. A request names the show
+configuration (``station``, ``host``, ``seed``, ``templates``) and what to
+build (``duration``, ``start``, ``format``); the reply is
+``{"ok": true, "show": ...}`` (for ``"format": "prefetch"`` the asset
+manifest) or ``{"ok": false, "error": "..."}``.
+``{"op": "ping"}`` and ``{"op": "stats"}`` are answered without generating.
+Fresh requests with seed and start are served from a ``ShowCache``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+from collections import OrderedDict
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from . import serialization
+from .batch import load_stations
+from .catalog import SongCatalog
+from .catalog_file import MappedCatalog
+from .generator import ShowGenerator
+from .showcache import ShowCache, show_key
+from .templates import load_phrasebook
+
+FORMATS = ("json", "timeline", "text", "prefetch")
+
+# station, host, seed, templates
+PoolKey = Tuple[str, str, Optional[int], Optional[str]]
+
+
+def default_socket_path() -> str:
+    runtime = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime, "radio-gpt.sock")
+
+
+class GeneratorPool:
+    """Prewarmed ``ShowGenerator``s, one per station/host/seed/templates.
+
+    A pooled generator keeps its rotation state between requests, so
+    consecutive requests for a station continue its playlist like a live
+    program. Requests with ``"fresh": true`` use a new generator instead and
+    match ``python -m radio_gpt`` with the same seed exactly.
+    """
+
+    def __init__(self, *, catalog: Optional[SongCatalog] = None, max_generators: int = 256) -> None:
+        self.catalog = catalog
+        self.max_generators = max_generators
+        self._generators: "OrderedDict[PoolKey, ShowGenerator]" = OrderedDict()
+        self._locks: Dict[PoolKey, asyncio.Lock] = {}
+
+    def __len__(self) -> int:
+        return len(self._generators)
+
+    def create(self, key: PoolKey) -> ShowGenerator:
+        station, host, seed, templates = key
+        phrases = load_phrasebook(templates) if templates else None
+        return ShowGenerator(station=station, host=host, seed=seed, phrases=phrases, catalog=self.catalog)
+
+    def get(self, key: PoolKey) -> ShowGenerator:
+        generator = self._generators.get(key)
+        if generator is None:
+            generator = self._generators[key] = self.create(key)
+            if len(self._generators) > self.max_generators:
+                evicted, _ = self._generators.popitem(last=False)
+                self._locks.pop(evicted, None)
+        else:
+            self._generators.move_to_end(key)
+        return generator
+
+    def cache_key(self, key: PoolKey, duration: int, start: datetime, output: str) -> str:
+        """``ShowCache`` key of what a fresh generator for ``key`` would build."""
+
+        station, host, seed, templates = key
+        return show_key(
+            station=station,
+            host=host,
+            seed=seed,
+            duration_minutes=duration,
+            start=start,
+            output=output,
+            catalog=self.catalog,
+            phrases=load_phrasebook(templates) if templates else None,
+            voice=host,
+        )
+
+    def lock(self, key: PoolKey) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+
+class GenerationDaemon:
+    """Serves generation requests; builds run in worker threads off the event loop."""
+
+    def __init__(self, pool: GeneratorPool, *, cache: Optional[ShowCache] = None) -> None:
+        self.pool = pool
+        self.cache = cache if cache is not None else ShowCache()
+        self.served = 0
+
+    async def start(self, path: str) -> asyncio.AbstractServer:
+        if os.path.exists(path):
+            _remove_stale_socket(path)
+        return await asyncio.start_unix_server(self._handle, sock=_bind_private(path))
+
+    async def respond(self, line: bytes) -> bytes:
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            op = request.get("op", "generate")
+            if op == "ping":
+                return serialization.dumps({"ok": True})
+            if op == "stats":
+                cache = {**self.cache.stats.as_dict(), "entries": len(self.cache), "bytes": self.cache.total_bytes}
+                return serialization.dumps(
+                    {"ok": True, "generators": len(self.pool), "served": self.served, "cache": cache}
+                )
+            if op != "generate":
+                raise ValueError(f"unknown op {op!r}")
+            return await self._generate(request)
+        except (ValueError, TypeError, OSError) as exc:
+            return serialization.dumps({"ok": False, "error": str(exc)})
+
+    async def _generate(self, request: dict) -> bytes:
+        key: PoolKey = (
+            str(request.get("station", "RadioGPT")),
+            str(request.get("host", "Alex")),
+            None if request.get("seed") is None else int(request["seed"]),
+            request.get("templates"),
+        )
+        duration = int(request.get("duration", 60))
+        start = serialization.parse_time(request["start"]) if request.get("start") else None
+        output = request.get("format", "json")
+        if output not in FORMATS:
+            raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+
+        loop = asyncio.get_running_loop()
+        if request.get("fresh") and key[2] is not None and start is not None:
+            cache_key = self.pool.cache_key(key, duration, start, output)
+            build = partial(_build_fresh, self.pool, key, duration, start, output)
+            body = await loop.run_in_executor(None, self.cache.fetch, cache_key, build)
+            if output == "timeline":
+                body = serialization.refresh_server_time(body)
+        elif request.get("fresh"):
+            generator = self.pool.create(key)
+            body = await loop.run_in_executor(None, _build, generator, duration, start, output)
+        else:
+            async with self.pool.lock(key):
+                generator = self.pool.get(key)
+                body = await loop.run_in_executor(None, _build, generator, duration, start, output)
+        self.served += 1
+        return b'{"ok":true,"show":' + body + b"}"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                writer.write(await self.respond(line) + b"\n")
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+def _build(generator: ShowGenerator, duration: int, start: Optional[datetime], output: str) -> bytes:
+    show = generator.build_show(duration_minutes=duration, start=start)
+    if output == "text":
+        return serialization.dumps(show.render_text())
+    if output == "prefetch":
+        return serialization.dumps(show.prefetch_manifest().as_dict())
+    return show.to_json(timeline=output == "timeline")
+
+
+def _build_fresh(pool: GeneratorPool, key: PoolKey, duration: int, start: datetime, output: str) -> bytes:
+    return _build(pool.create(key), duration, start, output)
+
+
+def _bind_private(path: str) -> socket.socket:
+    """Binds a socket that only the owner can connect to, before it listens."""
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    mask = os.umask(0o177)
+    try:
+        sock.bind(path)
+    except OSError:
+        sock.close()
+        raise
+    finally:
+        os.umask(mask)
+    return sock
+
+
+def _remove_stale_socket(path: str) -> None:
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.unlink(path)
+    else:
+        raise SystemExit(f"another daemon is already listening on {path}")
+    finally:
+        probe.close()
+
+
+def request(payload: dict, *, path: Optional[str] = None, timeout: Optional[float] = None) -> dict:
+    """Sends one request to a running daemon and returns the decoded reply."""
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(path or default_socket_path())
+        client.sendall(serialization.dumps(payload) + b"\n")
+        with client.makefile("rb") as stream:
+            line = stream.readline()
+    if not line:
+        raise ConnectionError("daemon closed the connection")
+    return json.loads(line)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="radio_gpt daemon",
+        description="Hält vorgewärmte Generatoren bereit und beantwortet Anfragen über einen Unix-Socket.",
+    )
+    parser.add_argument("--socket", type=str, default=None, help="Pfad des Unix-Sockets (Standard: $XDG_RUNTIME_DIR/radio-gpt.sock)")
+    parser.add_argument("--stations", type=Path, default=None, help="JSON-Datei mit Stationen, die vorab aufgewärmt werden")
+    parser.add_argument("--catalog", type=str, default=None, help="Binäre Katalogdatei statt der eingebauten Songliste")
+    parser.add_argument("--max-generators", type=int, default=256, help="Maximale Anzahl gehaltener Generatoren")
+    parser.add_argument(
+        "--cache",
+        type=str,
+        default=None,
+        metavar="VERZEICHNIS",
+        help="Frische Sendungen (fresh, mit Seed und Start) zusätzlich auf der Platte zwischenspeichern",
+    )
+    parser.add_argument("--cache-size", type=int, default=1024, metavar="MB", help="Maximale Größe des Platten-Caches in MB (Standard: 1024)")
+    parser.add_argument("--cache-memory", type=int, default=64, metavar="MB", help="Maximale Größe des Caches im Speicher in MB (Standard: 64)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    path = args.socket or default_socket_path()
+    try:
+        catalog = MappedCatalog(args.catalog) if args.catalog else None
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f"Katalog {args.catalog} kann nicht geöffnet werden: {exc}")
+    pool = GeneratorPool(catalog=catalog, max_generators=args.max_generators)
+    if args.stations:
+        try:
+            for entry in load_stations(args.stations):
+                seed = entry.get("seed")
+                pool.get((entry["station"], entry.get("host", "Alex"), None if seed is None else int(seed), entry.get("templates")))
+        except (OSError, ValueError) as exc:
+            raise SystemExit(f"Stationen aus {args.stations} können nicht geladen werden: {exc}")
+    cache = ShowCache(
+        args.cache,
+        max_bytes=max(0, args.cache_memory) * 1024 * 1024,
+        disk_bytes=max(1, args.cache_size) * 1024 * 1024,
+    )
+    daemon = GenerationDaemon(pool, cache=cache)
+
+    async def run() -> None:
+        listener = await daemon.start(path)
+        print(f"Daemon lauscht auf {path} ({len(pool)} Generator(en) vorgewärmt)", file=sys.stderr)
+        async with listener:
+            await listener.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+    return 0
+
+
+def parse_client_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="radio_gpt client",
+        description="Fordert eine Sendung beim laufenden Daemon an.",
+    )
+    parser.add_argument("--socket", type=str, default=None, help="Pfad des Unix-Sockets")
+    parser.add_argument("--duration", type=int, default=60, help="Länge der Sendung in Minuten (Standard: 60)")
+    parser.add_argument("--host", type=str, default="Alex", help="Name des Hosts")
+    parser.add_argument("--station", type=str, default="RadioGPT", help="Stationsname")
+    parser.add_argument("--seed", type=int, default=None, help="Seed der Generator-Konfiguration")
+    parser.add_argument("--templates", type=str, default=None, help="JSON-Datei mit Moderationsbausteinen")
+    parser.add_argument("--start", type=str, default=None, help="Sendestart als ISO-8601-Zeitpunkt")
+    parser.add_argument("--fresh", action="store_true", help="Neuen Generator verwenden (identisch zu einem Einzelaufruf)")
+    parser.add_argument("--json", action="store_true", help="Ergebnis als JSON statt als Text ausgeben")
+    parser.add_argument("--timeline", action="store_true", help="Synchronisierte Timeline ausgeben")
+    parser.add_argument("--compact", action="store_true", help="JSON kompakt statt eingerückt ausgeben")
+    return parser.parse_args(argv)
+
+
+def client_main(argv: Optional[list[str]] = None) -> int:
+    args = parse_client_args(argv)
+    payload = {
+        "station": args.station,
+        "host": args.host,
+        "seed": args.seed,
+        "duration": args.duration,
+        "format": "timeline" if args.timeline else "json" if args.json else "text",
+        "fresh": args.fresh,
+    }
+    if args.templates:
+        payload["templates"] = os.path.abspath(args.templates)
+    if args.start:
+        payload["start"] = args.start
+    try:
+        reply = request(payload, path=args.socket)
+    except OSError as exc:
+        raise SystemExit(f"Daemon nicht erreichbar: {exc}")
+    if not reply.get("ok"):
+        raise SystemExit(reply.get("error", "unbekannter Fehler"))
+    show = reply["show"]
+    if isinstance(show, str):
+        print(show)
+    elif args.compact:
+        print(json.dumps(show, ensure_ascii=False, separators=(",", ":")))
+    else:
+        print(json.dumps(show, ensure_ascii=False, indent=2))
+    return 0
@@ -0,0 +1,98 @@
+"""Content-addressed files on disk, bounded in bytes.
+
+``DiskStore`` keeps one file per key (a hex digest) and evicts the least
+recently used ones once the directory grows past its byte budget. TTS clips
+(``tts.ClipCache``) and serialized shows (``showcache.ShowCache``) both
+store their files this way.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
+
+
+class DiskStore:
+    """Files keyed by hex digest, evicting least recently used ones.
+
+    Files live under ``directory/<key[:2]>/<key><suffix>``. The index of sizes
+    and use order is rebuilt from the directory (by mtime) on start-up;
+    hits refresh a file's mtime so the order survives restarts.
+    """
+
+    def __init__(self, directory: Union[str, os.PathLike], *, max_bytes: int, suffix: str) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        self._load()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._sizes
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    def path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Optional[Path]:
+        with self._lock:
+            if key not in self._sizes:
+                return None
+            self._sizes.move_to_end(key)
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._total -= self._sizes.pop(key, 0)
+            return None
+        return path
+
+    def put(self, key: str, data: bytes) -> Path:
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        temporary.write_bytes(data)
+        os.replace(temporary, path)
+        with self._lock:
+            self._total += len(data) - self._sizes.pop(key, 0)
+            self._sizes[key] = len(data)
+            self._evict()
+        return path
+
+    def _evict(self) -> None:
+        while self._total > self.max_bytes and len(self._sizes) > 1:
+            key, size = self._sizes.popitem(last=False)
+            self._total -= size
+            try:
+                self.path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _load(self) -> None:
+        if not self.directory.is_dir():
+            return
+        found = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(self.suffix) and not entry.name.startswith("."):
+                    stat = entry.stat()
+                    found.append((stat.st_mtime_ns, entry.name[: -len(self.suffix)], stat.st_size))
+        for _, key, size in sorted(found):
+            self._sizes[key] = size
+            self._total += size
+        with self._lock:
+            self._evict()
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import math
+import random
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .catalog import SongCatalog
+
+# (accumulated cost, elapsed seconds, energy of the last song, planned song ids)
+_State = Tuple[float, int, Optional[float], Tuple[int, ...]]
+
+
+@dataclass(frozen=True)
+class EnergyCurve:
+    """Target energy across a block, given as ``(fraction, energy)`` points joined linearly."""
+
+    points: Tuple[Tuple[float, float], ...] = ((0.0, 0.7), (0.6, 0.82), (1.0, 0.6))
+
+    def __post_init__(self) -> None:
+        if not self.points:
+            raise ValueError("energy curve needs at least one point")
+        if not all(math.isfinite(value) for point in self.points for value in point):
+            raise ValueError("curve points must be finite numbers")
+        fractions = [fraction for fraction, _ in self.points]
+        if fractions != sorted(fractions) or fractions[0] < 0 or fractions[-1] > 1:
+            raise ValueError("curve fractions must be ascending within [0, 1]")
+
+    @classmethod
+    def parse(cls, text: str) -> EnergyCurve:
+        """Reads ``"0:0.6,0.5:0.85,1:0.65"``; a single bare number gives a flat curve."""
+
+        parts = text.split(",")
+        if len(parts) == 1 and ":" not in parts[0]:
+            return cls(((0.0, float(parts[0])),))
+        points = []
+        for part in parts:
+            fraction, sep, energy = part.partition(":")
+            if not sep:
+                raise ValueError(f"point {part.strip()!r} needs the form fraction:energy")
+            points.append((float(fraction), float(energy)))
+        return cls(tuple(points))
+
+    def at(self, fraction: float) -> float:
+        points = self.points
+        if fraction <= points[0][0]:
+            return points[0][1]
+        for (x0, y0), (x1, y1) in zip(points, points[1:]):
+            if fraction <= x1:
+                if x1 == x0:
+                    return y1
+                return y0 + (y1 - y0) * (fraction - x0) / (x1 - x0)
+        return points[-1][1]
+
+
+class EnergyPlanner:
+    """Plans whole blocks of songs along an ``EnergyCurve`` with a beam search.
+
+    A sequence costs its squared distance to the curve (weighted by air
+    time), squared energy jumps between neighbouring songs and the seconds
+    by which it misses the block length. Each step only scores the songs
+    nearest to the curve in energy, and the last song of a block is looked
+    up in a per-duration energy index, so the block can be filled to the
+    second. Long windows are planned one block (about an hour) at a time.
+    """
+
+    def __init__(
+        self,
+        catalog: SongCatalog,
+        *,
+        beam_width: int = 24,
+        candidates: int = 16,
+        fill_tolerance: int = 20,
+        jump_weight: float = 0.5,
+        fill_weight: float = 0.005,
+        block_seconds: int = 3600,
+    ) -> None:
+        self.catalog = catalog
+        self.beam_width = beam_width
+        self.candidates = candidates
+        self.fill_tolerance = fill_tolerance
+        self.jump_weight = jump_weight
+        self.fill_weight = fill_weight
+        self.block_seconds = block_seconds
+
+        self._energies = catalog.energies
+        self._durations = catalog.durations
+        self._min_duration = min(self._durations, default=0)
+        self._max_duration = max(self._durations, default=0)
+        # seconds -> (energies ascending, matching song ids)
+        self._by_duration: Dict[int, Tuple[array, array]] = {}
+        for song_id in catalog.ids_min_energy(float("-inf")):
+            seconds = self._durations[song_id]
+            bucket = self._by_duration.get(seconds)
+            if bucket is None:
+                bucket = self._by_duration[seconds] = (array("d"), array("l"))
+            bucket[0].append(self._energies[song_id])
+            bucket[1].append(song_id)
+
+    def plan(
+        self,
+        window: int,
+        overheads: Sequence[int],
+        *,
+        curve: EnergyCurve,
+        after: Optional[int] = None,
+        allowed: Optional[Callable[[int], bool]] = None,
+        rng: Optional[random.Random] = None,
+    ) -> List[int]:
+        """Song ids whose slots fill ``window`` seconds.
+
+        ``overheads[i % len(overheads)]`` is the non-music time that follows
+        the ``i``-th song (moderation, jingle). ``after`` is the id of the
+        song played right before the block; ``rng`` adds a little noise so
+        equal catalogs don't always produce the same block. Songs are not
+        repeated within a block or right across a block boundary, and not
+        in later blocks either unless the catalog is too small for that.
+        """
+
+        if window <= 0 or not overheads or not len(self.catalog):
+            return []
+        blocks = max(1, round(window / self.block_seconds))
+        planned: List[int] = []
+        previous: Tuple[int, ...] = () if after is None else (after,)
+        used: Set[int] = set()
+
+        def fresh(song_id: int) -> bool:
+            return song_id not in used and (allowed is None or allowed(song_id))
+
+        done = 0
+        for block in range(blocks):
+            size = window * (block + 1) // blocks - done
+            ids = self._plan_block(size, overheads, len(planned), curve, previous, fresh, rng)
+            if not ids and used:
+                ids = self._plan_block(size, overheads, len(planned), curve, previous, allowed, rng)
+            if not ids:
+                break
+            used.update(ids)
+            done += self._slots_length(ids, overheads, len(planned))
+            planned += ids
+            previous = (ids[-1],)
+        return planned
+
+    def _plan_block(
+        self,
+        window: int,
+        overheads: Sequence[int],
+        offset: int,
+        curve: EnergyCurve,
+        previous: Tuple[int, ...],
+        allowed: Optional[Callable[[int], bool]],
+        rng: Optional[random.Random],
+    ) -> List[int]:
+        # Paths start with the songs played before the block so they aren't repeated.
+        count = len(overheads)
+        offset -= len(previous)
+        last = self._energies[previous[-1]] if previous else None
+        beam: List[_State] = [(0.0, 0, last, previous)]
+        best: Optional[Tuple[float, Tuple[int, ...]]] = None
+        while beam:
+            extended: List[_State] = []
+            for cost, elapsed, last, path in beam:
+                slot = offset + len(path)
+                need = window - elapsed - overheads[slot % count]
+                # Only extend if at least one more slot still fits afterwards.
+                room = need - overheads[(slot + 1) % count] - self._min_duration + self.fill_tolerance
+                if need - self.fill_tolerance <= self._max_duration or room < self._min_duration:
+                    final = self._finish(need, elapsed, window, curve, last, path, allowed)
+                    if final is not None and (best is None or cost + final[0] < best[0]):
+                        best = (cost + final[0], path + (final[1],))
+                if room < self._min_duration:
+                    continue
+                target = curve.at(elapsed / window)
+                for song_id in self.catalog.ids_near_energy(target, self.candidates):
+                    seconds = self._durations[song_id]
+                    if seconds > room or song_id in path or (allowed is not None and not allowed(song_id)):
+                        continue
+                    energy = self._energies[song_id]
+                    step = self._score(energy, seconds, elapsed, window, curve, last)
+                    if rng is not None:
+                        step += rng.random() * 1e-4
+                    extended.append((cost + step, elapsed + seconds + overheads[slot % count], energy, path + (song_id,)))
+            beam = self._prune(extended)
+        return list(best[1][len(previous):]) if best is not None else []
+
+    def _prune(self, states: List[_State]) -> List[_State]:
+        # Cheapest state per elapsed time: paths that end at the same second
+        # only differ in cost, and keeping distinct lengths helps the fill.
+        kept: List[_State] = []
+        seen = set()
+        for state in sorted(states):
+            if state[1] in seen:
+                continue
+            seen.add(state[1])
+            kept.append(state)
+            if len(kept) == self.beam_width:
+                break
+        return kept
+
+    def slot_seconds(self, song_id: int, overhead: int) -> int:
+        return self._durations[song_id] + overhead
+
+    def _slots_length(self, ids: Sequence[int], overheads: Sequence[int], offset: int) -> int:
+        count = len(overheads)
+        return sum(self._durations[song_id] + overheads[(offset + step) % count] for step, song_id in enumerate(ids))
+
+    def _finish(
+        self,
+        need: int,
+        elapsed: int,
+        window: int,
+        curve: EnergyCurve,
+        last: Optional[float],
+        path: Tuple[int, ...],
+        allowed: Optional[Callable[[int], bool]],
+    ) -> Optional[Tuple[float, int]]:
+        """Cheapest song that closes the block, preferring an exact fit."""
+
+        context = (need, elapsed, window, curve, last, path, allowed)
+        lengths = range(max(1, need - self.fill_tolerance), need + self.fill_tolerance + 1)
+        best = self._finish_from(lengths, *context)
+        if best is None:
+            # Small catalogs: settle for the closest length available.
+            best = self._finish_from(self._by_duration, *context)
+        return best
+
+    def _finish_from(
+        self,
+        lengths: Iterable[int],
+        need: int,
+        elapsed: int,
+        window: int,
+        curve: EnergyCurve,
+        last: Optional[float],
+        path: Tuple[int, ...],
+        allowed: Optional[Callable[[int], bool]],
+    ) -> Optional[Tuple[float, int]]:
+        best: Optional[Tuple[float, int]] = None
+        for seconds in lengths:
+            bucket = self._by_duration.get(seconds)
+            if bucket is None:
+                continue
+            target = curve.at((elapsed + seconds / 2) / window)
+            song_id = self._nearest(bucket, target, path, allowed)
+            if song_id is None:
+                continue
+            cost = self._score(self._energies[song_id], seconds, elapsed, window, curve, last)
+            cost += self.fill_weight * abs(seconds - need)
+            if best is None or cost < best[0]:
+                best = (cost, song_id)
+        return best
+
+    def _score(
+        self,
+        energy: float,
+        seconds: int,
+        elapsed: int,
+        window: int,
+        curve: EnergyCurve,
+        last: Optional[float],
+    ) -> float:
+        deviation = energy - curve.at((elapsed + seconds / 2) / window)
+        cost = deviation * deviation * seconds / window
+        if last is not None:
+            cost += self.jump_weight * (energy - last) ** 2
+        return cost
+
+    @staticmethod
+    def _nearest(
+        bucket: Tuple[array, array],
+        target: float,
+        path: Tuple[int, ...],
+        allowed: Optional[Callable[[int], bool]],
+        *,
+        probes: int = 8,
+    ) -> Optional[int]:
+        energies, ids = bucket
+        right = bisect_left(energies, target)
+        left = right - 1
+        for _ in range(probes):
+            if right >= len(energies) or (left >= 0 and target - energies[left] <= energies[right] - target):
+                if left < 0:
+                    return None
+                song_id = ids[left]
+                left -= 1
+            else:
+                song_id = ids[right]
+                right += 1
+            if song_id not in path and (allowed is None or allowed(song_id)):
+                return song_id
+        return None
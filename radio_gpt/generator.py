@@ -3,17 +3,52 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 import re
-from typing import List, Optional
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
+from .backtiming import BacktimeRules
+from .catalog import SongCatalog
+from .energy import EnergyCurve
 from .jingles import Jingle, JingleVault
-from .news import NewsItem, Newsroom
+from .news import NewsFeed, NewsItem, Newsroom
+from . import serialization
 from .playlist import PlaylistPlanner, Song
+from .playlog import PlayLog
+from .prefetch import PrefetchManifest, PrefetchPolicy, build_manifest
+from .rotation import RotationRules
 from .scriptwriter import ScriptWriter
+from .showcache import show_key
+from .similarity import TransitionRules
+from .state import STATE_VERSION, check_version
+from .store import SegmentStore, SegmentView
+from .templates import PhraseBook
+from .tts import clip_id
 
+if TYPE_CHECKING:
+    from .providers import ContentProviders
 
-@dataclass
+# kind, title, description, duration in seconds, payload
+SegmentRecord = Tuple[str, str, str, int, Optional[dict]]
+
+# Length of the moderation after each rotation song.
+MUSIC_TALK_SECONDS = 65
+OUTRO_SECONDS = 70
+
+
+def slugify(value: str) -> str:
+    """Lowercase ASCII name for URLs and file names, e.g. ``"Morning Mix!"`` -> ``"morning-mix"``."""
+
+    value = value.lower()
+    value = re.sub(r"[^a-z0-9]+", "-", value)
+    return value.strip("-")
+
+
+@dataclass(frozen=True)
 class ShowSegment:
-    """Represents a scheduled element in the show timeline."""
+    """Represents a scheduled element in the show timeline.
+
+    Frozen: segments read from a ``RadioShow`` are snapshots of its store,
+    so edits go through ``RadioShow.replace`` (e.g. with ``dataclasses.replace``).
+    """
 
     kind: str
     title: str
@@ -32,22 +67,141 @@ class ShowSegment:
             "payload": self.payload or {},
         }
 
+    def as_timeline_item(self) -> dict:
+        return {
+            "start_utc": self.start.isoformat(),
+            "type": self.kind.upper(),
+            "payload": self.payload or {},
+            "duration_seconds": int(self.duration.total_seconds()),
+        }
+
 
-@dataclass
 class RadioShow:
-    """Container for a generated show."""
+    """Container for a generated show.
 
-    station: str
-    host: str
-    start: datetime
-    segments: List[ShowSegment]
+    Segments are kept in a columnar ``SegmentStore``; ``segments`` hands out
+    ``ShowSegment`` views that are materialized on access.
+    """
+
+    def __init__(
+        self,
+        station: str,
+        host: str,
+        start: datetime,
+        segments: Optional[Iterable[ShowSegment]] = None,
+        *,
+        store: Optional[SegmentStore] = None,
+        target_duration: Optional[timedelta] = None,
+    ) -> None:
+        self.station = station
+        self.host = host
+        self.start = start
+        self.store = store if store is not None else SegmentStore.from_segments(segments or (), start)
+        self.target_duration = target_duration
+
+    def __repr__(self) -> str:
+        return (
+            f"RadioShow(station={self.station!r}, host={self.host!r}, "
+            f"start={self.start!r}, segments={len(self.store)})"
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RadioShow):
+            return NotImplemented
+        return (
+            (self.station, self.host, self.start) == (other.station, other.host, other.start)
+            and list(self.segments) == list(other.segments)
+        )
+
+    @property
+    def segments(self) -> SegmentView:
+        return SegmentView(self.store, self.start)
 
     @property
     def duration(self) -> timedelta:
-        if not self.segments:
+        if not len(self.store):
             return timedelta()
-        last = self.segments[-1]
-        return (last.start + last.duration) - self.start
+        return timedelta(seconds=self.store.end_offset())
+
+    @property
+    def timing_error(self) -> Optional[timedelta]:
+        """How far the show overruns (positive) or underruns its target."""
+
+        if self.target_duration is None:
+            return None
+        return self.duration - self.target_duration
+
+    @property
+    def fits_target(self) -> bool:
+        return self.target_duration is None or self.duration <= self.target_duration
+
+    def replace(self, index: int, segment: ShowSegment) -> None:
+        """Swaps segment ``index``; later segments move by the duration difference."""
+
+        self.store.replace(self._index(index), *self._record(segment))
+
+    def insert(self, index: int, segment: ShowSegment) -> None:
+        """Inserts ``segment`` before ``index``; its own ``start`` is ignored."""
+
+        if index < 0:
+            index += len(self.store)
+        self.store.insert(max(0, min(index, len(self.store))), *self._record(segment))
+
+    def remove(self, index: int) -> ShowSegment:
+        index = self._index(index)
+        removed = self.store.segment(index, self.start)
+        self.store.remove(index)
+        return removed
+
+    def shift(self, index: int, delta: timedelta) -> None:
+        """Moves segment ``index`` and all following segments by ``delta``.
+
+        Moving a segment into the one before it raises ``ValueError``.
+        """
+
+        self.store.shift(self._index(index), int(delta.total_seconds()))
+
+    def _index(self, index: int) -> int:
+        return index + len(self.store) if index < 0 else index
+
+    @staticmethod
+    def _record(segment: ShowSegment) -> SegmentRecord:
+        return (
+            segment.kind,
+            segment.title,
+            segment.description,
+            int(segment.duration.total_seconds()),
+            segment.payload,
+        )
+
+    def segment_at(self, when: datetime) -> Optional[ShowSegment]:
+        """Segment on air at ``when``, or ``None`` before/after the show."""
+
+        index = self.store.index_at(self._offset(when))
+        return self.store.segment(index, self.start) if index >= 0 else None
+
+    def next_after(self, when: datetime) -> Optional[ShowSegment]:
+        """First segment that starts strictly after ``when``."""
+
+        index = self.store.index_after(self._offset(when))
+        return self.store.segment(index, self.start) if index < len(self.store) else None
+
+    def upcoming(self, when: datetime, count: int = 3) -> List[ShowSegment]:
+        first = self.store.index_after(self._offset(when))
+        return [self.store.segment(i, self.start) for i in range(first, min(first + count, len(self.store)))]
+
+    def window(self, start: datetime, end: datetime) -> List[ShowSegment]:
+        """Segments overlapping the half-open interval ``[start, end)``."""
+
+        return [self.store.segment(i, self.start) for i in self.window_indices(start, end)]
+
+    def window_indices(self, start: datetime, end: datetime) -> range:
+        return self.store.index_range(self._offset(start), self._offset(end))
+
+    def _offset(self, when: datetime) -> float:
+        if when.tzinfo is None and self.start.tzinfo is not None:
+            when = when.replace(tzinfo=timezone.utc)
+        return (when - self.start).total_seconds()
 
     def as_dict(self) -> dict:
         return {
@@ -58,21 +212,78 @@ class RadioShow:
             "segments": [segment.as_dict() for segment in self.segments],
         }
 
-    def as_timeline(self) -> dict:
-        return {
+    def as_timeline(self, *, prefetch: Optional[PrefetchPolicy] = None) -> dict:
+        """Timeline for web players; with ``prefetch`` it carries the asset manifest."""
+
+        timeline = {
             "station": self.station,
             "host": self.host,
             "server_time": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
-            "items": [
-                {
-                    "start_utc": segment.start.isoformat(),
-                    "type": segment.kind.upper(),
-                    "payload": segment.payload or {},
-                    "duration_seconds": int(segment.duration.total_seconds()),
-                }
-                for segment in self.segments
-            ],
         }
+        if prefetch is not None:
+            timeline["prefetch"] = self.prefetch_manifest(prefetch).as_dict()
+        timeline["items"] = [segment.as_timeline_item() for segment in self.segments]
+        return timeline
+
+    @property
+    def revision(self) -> int:
+        """Bumped by every edit; see ``timeline_delta``."""
+
+        return self.store.revision
+
+    @property
+    def epoch(self) -> str:
+        """Random id of this show's revision counter; see ``timeline_delta``."""
+
+        return self.store.epoch
+
+    def timeline_delta(self, since: int, epoch: Optional[str] = None) -> dict:
+        """Timeline items added, changed or removed after revision ``since``.
+
+        Items carry a stable ``id`` and replies carry the show's ``epoch``.
+        Clients send both back; if ``epoch`` does not match (a revision of
+        another show, e.g. from before a server restart), ``since`` is too
+        old or a delta would not be smaller, the reply is a full snapshot
+        with ``"full": true``.
+        """
+
+        delta = serialization.delta_plan(self.store, since, epoch)
+        document = {
+            "station": self.station,
+            "host": self.host,
+            "epoch": self.epoch,
+            "revision": self.revision,
+            "since": since,
+        }
+        if delta is None:
+            document["full"] = True
+            document["items"] = [self._delta_item(index) for index in range(len(self.store))]
+        else:
+            added, changed, removed = delta
+            document["full"] = False
+            document["added"] = [self._delta_item(index) for index in added]
+            document["changed"] = [self._delta_item(index) for index in changed]
+            document["removed"] = removed
+        return document
+
+    def delta_json(self, since: int, epoch: Optional[str] = None) -> bytes:
+        """Compact JSON equivalent of ``timeline_delta``, built from cached encodings."""
+
+        return serialization.delta_json(self, since, epoch)
+
+    def _delta_item(self, index: int) -> dict:
+        return {"id": self.store.key(index), **self.store.segment(index, self.start).as_timeline_item()}
+
+    def prefetch_manifest(self, policy: Optional[PrefetchPolicy] = None) -> PrefetchManifest:
+        return build_manifest(self, policy)
+
+    def to_json(self, *, timeline: bool = False, prefetch: Optional[PrefetchPolicy] = None) -> bytes:
+        """Compact JSON built from cached per-segment encodings."""
+
+        return serialization.show_json(self, timeline=timeline, prefetch=prefetch)
+
+    def iter_ndjson(self, *, timeline: bool = False) -> Iterator[bytes]:
+        return serialization.iter_ndjson(self, timeline=timeline)
 
     def render_text(self) -> str:
         lines = [
@@ -99,15 +310,45 @@ class ShowGenerator:
         station: str = "RadioGPT",
         host: str = "Alex",
         seed: Optional[int] = None,
+        phrases: Optional[PhraseBook] = None,
+        rotation: Optional[RotationRules] = None,
+        energy_curve: Optional[EnergyCurve] = None,
+        catalog: Optional[SongCatalog] = None,
+        news_feed: Optional[NewsFeed] = None,
+        voice: Optional[str] = None,
+        backtime: Optional[BacktimeRules] = None,
+        play_log: Optional[PlayLog] = None,
+        weather: Optional[Sequence[str]] = None,
+        jingles: Optional[Sequence[Jingle]] = None,
+        transitions: Optional[TransitionRules] = None,
+        tts_suffix: str = ".ogg",
     ) -> None:
         self.station = station
         self.host = host
+        self.voice = voice or host
+        # File suffix of TTS clip URLs; the engine's ``suffix`` when clips are rendered.
+        self.tts_suffix = tts_suffix
         self.seed = seed
-        self._playlist = PlaylistPlanner(seed=seed)
-        self._jingles = JingleVault(seed=seed)
-        self._newsroom = Newsroom()
-        self._writer = ScriptWriter(station=station, host=host, seed=seed)
+        self._playlist = PlaylistPlanner(
+            seed=seed, catalog=catalog, rotation=rotation, history=play_log, transitions=transitions
+        )
+        self._jingles = JingleVault(seed=seed, library=jingles)
+        self._newsroom = Newsroom(seed=seed, feed=news_feed, weather=weather)
+        self._writer = ScriptWriter(station=station, host=host, seed=seed, phrases=phrases)
+        self._phrases = phrases
+        self._rotation = rotation
+        self._news_feed = news_feed
+        self._energy_curve = energy_curve
+        self._backtime = backtime
+        self._transitions = transitions
+        self._play_log = play_log
+        # Songs of the show being generated, in air order (only while logging).
+        self._aired: List[Song] = []
         self._cdn_base = "https://cdn.radio.gpt"
+        # End of the last built show; a continuation starts here.
+        self.resume_at: Optional[datetime] = None
+        # Whether no show has been generated yet, i.e. output depends on the parameters only.
+        self._pristine = True
 
     def build_show(
         self,
@@ -121,134 +362,340 @@ class ShowGenerator:
             raise ValueError("duration_minutes must be positive")
 
         show_start = start or datetime.now(timezone.utc).replace(microsecond=0)
-        segments: List[ShowSegment] = []
+        self._aired = []
+        store = SegmentStore()
+        for record in self._generate_records(
+            duration_minutes * 60,
+            clock=show_start.timestamp(),
+            include_weather=include_weather,
+            include_local=include_local,
+        ):
+            store.append(*record)
+        show = RadioShow(
+            station=self.station,
+            host=self.host,
+            start=show_start,
+            store=store,
+            target_duration=timedelta(minutes=duration_minutes),
+        )
+        self.resume_at = show_start + show.duration
+        if self._play_log is not None:
+            self._play_log.record_show(show, self._aired)
+        return show
+
+    @classmethod
+    async def from_providers(cls, providers: ContentProviders, **options: object) -> ShowGenerator:
+        """Generator whose catalog, news, weather and jingles come from ``providers``.
+
+        All sources are fetched concurrently; one that fails or is too slow
+        falls back to its last good value, else to the matching entry of
+        ``options`` or the built-in content.
+        """
+
+        inputs = await providers.gather()
+        fetched = {name: value for name, value in inputs.generator_options().items() if value is not None}
+        return cls(**{**options, **fetched})
+
+    def cache_key(
+        self,
+        *,
+        duration_minutes: int = 60,
+        start: Optional[datetime] = None,
+        include_weather: bool = True,
+        include_local: bool = True,
+        output: str = "json",
+    ) -> Optional[str]:
+        """``ShowCache`` key of the show ``build_show`` would return next, serialized as ``output``.
+
+        ``None`` when the result is not a pure function of the parameters:
+        without seed or start, with a news feed or play log, or once this
+        generator has produced a show.
+        """
+
+        if self.seed is None or start is None or not self._pristine:
+            return None
+        if self._news_feed is not None or self._play_log is not None:
+            return None
+        return show_key(
+            station=self.station,
+            host=self.host,
+            seed=self.seed,
+            duration_minutes=duration_minutes,
+            start=start,
+            output=output,
+            include_weather=include_weather,
+            include_local=include_local,
+            catalog=self._playlist.catalog,
+            phrases=self._phrases,
+            voice=self.voice,
+            rotation=self._rotation,
+            energy_curve=self._energy_curve,
+            backtime=self._backtime,
+            transitions=self._transitions,
+            tts_suffix=self.tts_suffix if self.tts_suffix != ".ogg" else None,
+            weather=self._newsroom.weather,
+            jingles=self._jingles.library,
+        )
+
+    def snapshot(self) -> dict:
+        """Versioned state to continue this generator elsewhere (see ``restore``).
 
-        current_time = show_start
-        target_duration = timedelta(minutes=duration_minutes)
+        Shuffled orders follow from the seed, so they are only stored for
+        unseeded generators.
+        """
+
+        unseeded = self.seed is None
+        return {
+            "version": STATE_VERSION,
+            "station": self.station,
+            "seed": self.seed,
+            "catalog_size": len(self._playlist.catalog),
+            "resume_at": self.resume_at.isoformat() if self.resume_at else None,
+            "playlist": self._playlist.state(include_order=unseeded),
+            "jingles": self._jingles.state(),
+            "writer": self._writer.state(),
+            "newsroom": self._newsroom.state(),
+        }
+
+    def restore(self, snapshot: dict) -> None:
+        """Continues from ``snapshot``; the next show matches an uninterrupted run.
+
+        The generator must use the same seed, catalog, phrases and rotation
+        rules as the one the snapshot was taken from.
+        """
+
+        check_version(snapshot)
+        if snapshot["seed"] != self.seed:
+            raise ValueError(f"state was taken with seed {snapshot['seed']!r}, not {self.seed!r}")
+        if snapshot["catalog_size"] != len(self._playlist.catalog):
+            raise ValueError("state does not match the catalog size")
+        self._playlist.restore(snapshot["playlist"])
+        self._jingles.restore(snapshot["jingles"])
+        self._writer.restore(snapshot["writer"])
+        self._newsroom.restore(snapshot["newsroom"])
+        self.resume_at = datetime.fromisoformat(snapshot["resume_at"]) if snapshot["resume_at"] else None
+        self._pristine = False
+
+    def iter_segments(
+        self,
+        *,
+        duration_minutes: int = 60,
+        start: Optional[datetime] = None,
+        include_weather: bool = True,
+        include_local: bool = True,
+    ) -> Iterator[ShowSegment]:
+        """Yields the show's segments one at a time, in broadcast order.
+
+        Produces exactly the segments ``build_show`` would return for the
+        same generator state, without holding the whole show in memory.
+        """
+
+        if duration_minutes <= 0:
+            raise ValueError("duration_minutes must be positive")
+
+        show_start = start or datetime.now(timezone.utc).replace(microsecond=0)
+        return self._segments_from_records(
+            show_start,
+            self._generate_records(
+                duration_minutes * 60,
+                clock=show_start.timestamp(),
+                include_weather=include_weather,
+                include_local=include_local,
+            ),
+        )
+
+    def _segments_from_records(
+        self, show_start: datetime, records: Iterator[SegmentRecord]
+    ) -> Iterator[ShowSegment]:
+        self._aired = []
+        logged = SegmentStore() if self._play_log is not None else None
+        elapsed = 0
+        for kind, title, description, seconds, payload in records:
+            if logged is not None:
+                logged.append(kind, title, description, seconds, payload)
+            yield ShowSegment(
+                kind=kind,
+                title=title,
+                description=description,
+                start=show_start + timedelta(seconds=elapsed),
+                duration=timedelta(seconds=seconds),
+                payload=payload,
+            )
+            elapsed += seconds
+        self.resume_at = show_start + timedelta(seconds=elapsed)
+        if logged is not None:
+            show = RadioShow(station=self.station, host=self.host, start=show_start, store=logged)
+            self._play_log.record_show(show, self._aired)
+
+    def _generate_records(
+        self,
+        target_seconds: int,
+        *,
+        clock: float,
+        include_weather: bool,
+        include_local: bool,
+    ) -> Iterator[SegmentRecord]:
+        # All timing is done in integer seconds relative to the show start;
+        # ``clock`` (epoch seconds of the start) only feeds the rotation rules.
+        self._pristine = False
+        elapsed = 0
+        rotation_cutoff = target_seconds - (self._backtime.window if self._backtime else 5 * 60)
+        # Songs of this show, kept out of the backtimed ending where possible.
+        played: Set[int] = set()
 
         # 1. Intro
         intro_text = self._writer.build_intro()
-        intro_duration = timedelta(seconds=50)
-        segments.append(
-            ShowSegment(
-                kind="tts_break",
-                title="Show-Opener",
-                description=intro_text,
-                start=current_time,
-                duration=intro_duration,
-                payload=self._tts_payload("show-opener", intro_duration),
-            )
-        )
-        current_time += intro_duration
+        intro_seconds = 50
+        yield "tts_break", "Show-Opener", intro_text, intro_seconds, self._tts_payload(intro_text, intro_seconds)
+        elapsed += intro_seconds
 
         # 2. First song
-        first_song = self._playlist.pick_energy_song(min_energy=0.7)
-        segments.append(self._song_segment(first_song, current_time))
-        current_time += first_song.duration
+        first_song = self._playlist.pick_energy_song(min_energy=0.7, at=clock + elapsed)
+        record = self._song_record(first_song)
+        yield record
+        elapsed += record[3]
 
         # 3. First jingle
-        first_jingle = self._jingles.next_jingle()
-        segments.append(self._jingle_segment(first_jingle, current_time))
-        current_time += first_jingle.duration
+        record = self._jingle_record(self._jingles.next_jingle())
+        yield record
+        elapsed += record[3]
 
         # 4. News bulletin early on
         news_items = self._newsroom.compose_news(include_weather=include_weather, include_local=include_local)
         news_text = self._writer.build_news_bulletin(news_items)
-        news_duration = timedelta(seconds=180)
-        segments.append(
-            ShowSegment(
-                kind="tts_break",
-                title="Nachrichten",
-                description=news_text,
-                start=current_time,
-                duration=news_duration,
-                payload=self._tts_payload("news-bulletin", news_duration),
-            )
-        )
-        current_time += news_duration
+        news_seconds = 180
+        yield "tts_break", "Nachrichten", news_text, news_seconds, self._tts_payload(news_text, news_seconds)
+        elapsed += news_seconds
 
         # 5. Core rotation of music + moderation + jingles
-        while current_time - show_start < target_duration - timedelta(minutes=5):
-            song = self._playlist.next_song()
-            segments.append(self._song_segment(song, current_time))
-            current_time += song.duration
-
-            if current_time - show_start >= target_duration:
+        planned: Iterator[Song] = iter(())
+        if self._energy_curve is not None:
+            planned = iter(
+                self._playlist.plan_block(
+                    rotation_cutoff - elapsed,
+                    self._slot_overheads(),
+                    curve=self._energy_curve,
+                    after=first_song,
+                    at=clock + elapsed,
+                )
+            )
+        song = first_song
+        while elapsed < rotation_cutoff:
+            song = next(planned, None) or self._playlist.next_song(at=clock + elapsed, after=song)
+            if self._backtime is not None:
+                played.add(self._playlist.catalog.index(song))
+            record = self._song_record(song)
+            yield record
+            elapsed += record[3]
+
+            if elapsed >= target_seconds:
                 break
 
             talk = self._writer.build_music_intro(song)
-            talk_duration = timedelta(seconds=65)
-            segments.append(
-                ShowSegment(
-                    kind="tts_break",
-                    title=f"Moderation zu {song.title}",
-                    description=talk,
-                    start=current_time,
-                    duration=talk_duration,
-                    payload=self._tts_payload(f"moderation-{self._slug(song.title)}", talk_duration),
-                )
+            talk_seconds = MUSIC_TALK_SECONDS
+            yield (
+                "tts_break",
+                f"Moderation zu {song.title}",
+                talk,
+                talk_seconds,
+                self._tts_payload(talk, talk_seconds),
             )
-            current_time += talk_duration
+            elapsed += talk_seconds
 
-            if current_time - show_start >= target_duration:
+            if elapsed >= target_seconds:
                 break
 
-            jingle = self._jingles.next_jingle()
-            segments.append(self._jingle_segment(jingle, current_time))
-            current_time += jingle.duration
+            record = self._jingle_record(self._jingles.next_jingle())
+            yield record
+            elapsed += record[3]
 
         # 6. Closing talk and outro music
+        if self._backtime is not None:
+            yield from self._backtimed_ending(target_seconds - elapsed, clock + elapsed, played)
+            return
         outro_text = self._writer.build_outro()
-        outro_duration = timedelta(seconds=70)
-        segments.append(
-            ShowSegment(
-                kind="tts_break",
-                title="Abmoderation",
-                description=outro_text,
-                start=current_time,
-                duration=outro_duration,
-                payload=self._tts_payload("outro", outro_duration),
-            )
-        )
-        current_time += outro_duration
-
-        closing_song = self._playlist.pick_energy_song(min_energy=0.5)
-        segments.append(self._song_segment(closing_song, current_time))
-
-        return RadioShow(
-            station=self.station,
-            host=self.host,
-            start=show_start,
-            segments=segments,
+        outro_seconds = OUTRO_SECONDS
+        yield "tts_break", "Abmoderation", outro_text, outro_seconds, self._tts_payload(outro_text, outro_seconds)
+        elapsed += outro_seconds
+
+        closing_song = self._playlist.pick_energy_song(min_energy=0.5, at=clock + elapsed)
+        yield self._song_record(closing_song)
+
+    def _backtimed_ending(self, remaining: int, at: float, played: Set[int]) -> Iterator[SegmentRecord]:
+        """Songs, jingles and outro that end exactly on the target second if possible.
+
+        Any remaining error shows up in ``RadioShow.timing_error``.
+        """
+
+        plan = self._playlist.backtime(
+            remaining,
+            rules=self._backtime,
+            song_overhead=MUSIC_TALK_SECONDS,
+            closing_overhead=OUTRO_SECONDS,
+            jingles=[int(jingle.duration.total_seconds()) for jingle in self._jingles.library],
+            exclude=played,
+            at=at,
         )
+        songs = [self._playlist.catalog[song_id] for song_id in plan.songs]
+        for song, jingle in zip(songs, plan.jingles):
+            yield self._song_record(song)
+            talk = self._writer.build_music_intro(song)
+            yield (
+                "tts_break",
+                f"Moderation zu {song.title}",
+                talk,
+                MUSIC_TALK_SECONDS,
+                self._tts_payload(talk, MUSIC_TALK_SECONDS),
+            )
+            yield self._jingle_record(self._jingles.library[jingle])
 
-    def _song_segment(self, song: Song, start: datetime) -> ShowSegment:
+        outro_text = self._writer.build_outro()
+        payload = self._tts_payload(outro_text, OUTRO_SECONDS)
+        if plan.talk_over:
+            # The clip keeps its length; the closing song starts under its end.
+            payload["talk_over_seconds"] = plan.talk_over
+        yield "tts_break", "Abmoderation", outro_text, OUTRO_SECONDS - plan.talk_over, payload
+        if not songs:
+            return
+        kind, title, description, seconds, payload = self._song_record(songs[-1])
+        if plan.fade:
+            payload["fade_out_seconds"] = plan.fade
+            payload["expected_duration"] = seconds - plan.fade
+        yield kind, title, description, seconds - plan.fade, payload
+
+    def _slot_overheads(self) -> List[int]:
+        # Moderation plus the jingle that follow each rotation song.
+        return [MUSIC_TALK_SECONDS + int(jingle.duration.total_seconds()) for jingle in self._jingles.upcoming(len(self._jingles.library))]
+
+    def _song_record(self, song: Song) -> SegmentRecord:
+        if self._play_log is not None:
+            self._aired.append(song)
         event_type = self._event_type_for_song(song)
-        return ShowSegment(
-            kind=event_type.lower(),
-            title=f"{song.artist} – {song.title}",
-            description=self._writer.build_song_backannounce(song),
-            start=start,
-            duration=song.duration,
-            payload={
+        seconds = int(song.duration.total_seconds())
+        return (
+            event_type.lower(),
+            f"{song.artist} – {song.title}",
+            self._writer.build_song_backannounce(song),
+            seconds,
+            {
                 "type": event_type,
                 "platform": song.platform,
                 "source_id": song.source_id,
-                "expected_duration": int(song.duration.total_seconds()),
+                "expected_duration": seconds,
             },
         )
 
-    def _jingle_segment(self, jingle: Jingle, start: datetime) -> ShowSegment:
-        return ShowSegment(
-            kind="jingle",
-            title=jingle.name,
-            description=jingle.slogan,
-            start=start,
-            duration=jingle.duration,
-            payload={
+    def _jingle_record(self, jingle: Jingle) -> SegmentRecord:
+        seconds = int(jingle.duration.total_seconds())
+        return (
+            "jingle",
+            jingle.name,
+            jingle.slogan,
+            seconds,
+            {
                 "type": "JINGLE",
                 "asset_url": f"{self._cdn_base}/jingles/{self._slug(jingle.name)}.ogg",
-                "expected_duration": int(jingle.duration.total_seconds()),
+                "expected_duration": seconds,
             },
         )
 
@@ -259,14 +706,13 @@ class ShowGenerator:
             return "SC_TRACK"
         return "AUDIO_TRACK"
 
-    def _tts_payload(self, name: str, duration: timedelta) -> dict:
+    def _tts_payload(self, text: str, seconds: int) -> dict:
+        # Content-addressed, so identical moderation maps to the same clip.
         return {
             "type": "TTS_BREAK",
-            "url": f"{self._cdn_base}/tts/{self._slug(name)}.ogg",
-            "duration": int(duration.total_seconds()),
+            "url": f"{self._cdn_base}/tts/{clip_id(text, self.voice)}{self.tts_suffix}",
+            "duration": seconds,
         }
 
     def _slug(self, value: str) -> str:
-        value = value.lower()
-        value = re.sub(r"[^a-z0-9]+", "-", value)
-        return value.strip("-")
+        return slugify(value)
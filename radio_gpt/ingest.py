@@ -0,0 +1,134 @@
+"""Streaming readers for news dumps (JSONL and RSS/Atom)."""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Union
+
+from .news import NewsFeed, NewsItem
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+JSONL_SUFFIXES = {".jsonl", ".ndjson"}
+FEED_SUFFIXES = {".xml", ".rss", ".atom"}
+
+_TAGS = re.compile(r"<[^>]+>")
+_SPACE = re.compile(r"\s+")
+
+
+def read_jsonl(
+    path: PathLike,
+    *,
+    default_category: str = "allgemein",
+    default_relevance: float = 0.5,
+    rejected: Optional[List[str]] = None,
+) -> Iterator[NewsItem]:
+    """One item per line: ``headline``/``title``, ``summary``/``description``, ``category``, ``relevance``.
+
+    An invalid line raises ``ValueError``, unless a ``rejected`` list is
+    given: then its message is appended there and the line is skipped.
+    """
+
+    with open(path, encoding="utf-8") as handle:
+        for number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                item = news_from_row(json.loads(line), default_category=default_category, default_relevance=default_relevance)
+            except (ValueError, KeyError, AttributeError, TypeError) as exc:
+                message = f"{path}:{number}: invalid news item ({exc})"
+                if rejected is None:
+                    raise ValueError(message) from None
+                rejected.append(message)
+                continue
+            yield item
+
+
+def news_from_row(row: dict, *, default_category: str = "allgemein", default_relevance: float = 0.5) -> NewsItem:
+    """One item from a JSON object with the fields ``read_jsonl`` accepts."""
+
+    headline = row.get("headline") or row["title"]
+    if headline is None:
+        raise ValueError("headline is null")
+    return NewsItem(
+        headline=_clean(headline),
+        summary=_clean(row.get("summary") or row.get("description") or ""),
+        category=str(row.get("category") or default_category).casefold(),
+        relevance=float(row.get("relevance", default_relevance)),
+    )
+
+
+def read_feed(path: PathLike, *, default_category: str = "allgemein", default_relevance: float = 0.5) -> Iterator[NewsItem]:
+    """Items of an RSS 2.0 or Atom file, parsed incrementally.
+
+    Feeds carry no relevance, so ``default_relevance`` is used unless an
+    item has a ``relevance`` child element.
+    """
+
+    for _, element in ET.iterparse(path, events=("end",)):
+        name = _local(element.tag)
+        if name not in ("item", "entry"):
+            continue
+        fields = {}
+        for child in element:
+            fields.setdefault(_local(child.tag), child.text or child.get("term") or "")
+        headline = _clean(fields.get("title", ""))
+        if headline:
+            yield NewsItem(
+                headline=headline,
+                summary=_clean(fields.get("description") or fields.get("summary") or fields.get("content") or ""),
+                category=(fields.get("category") or default_category).strip().casefold(),
+                relevance=_relevance(fields.get("relevance"), default_relevance),
+            )
+        element.clear()
+
+
+def read_news(
+    path: PathLike,
+    *,
+    default_category: str = "allgemein",
+    default_relevance: float = 0.5,
+    rejected: Optional[List[str]] = None,
+) -> Iterator[NewsItem]:
+    """Picks the reader by file suffix; ``rejected`` as in ``read_jsonl``."""
+
+    suffix = Path(path).suffix.lower()
+    if suffix in JSONL_SUFFIXES:
+        return read_jsonl(path, default_category=default_category, default_relevance=default_relevance, rejected=rejected)
+    if suffix in FEED_SUFFIXES:
+        return read_feed(path, default_category=default_category, default_relevance=default_relevance)
+    raise ValueError(f"unknown news format for {path} (expected .jsonl, .ndjson, .xml, .rss or .atom)")
+
+
+def ingest(
+    paths: Iterable[PathLike],
+    feed: Optional[NewsFeed] = None,
+    *,
+    local: bool = False,
+    rejected: Optional[List[str]] = None,
+) -> NewsFeed:
+    """Streams all ``paths`` into ``feed`` (a new one if omitted); ``rejected`` as in ``read_jsonl``."""
+
+    feed = feed if feed is not None else NewsFeed()
+    for path in paths:
+        feed.extend(read_news(path, rejected=rejected), local=local)
+    return feed
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _clean(text: str) -> str:
+    return _SPACE.sub(" ", _TAGS.sub(" ", str(text))).strip()
+
+
+def _relevance(value: Optional[str], default: float) -> float:
+    try:
+        return float(value) if value else default
+    except ValueError:
+        return default
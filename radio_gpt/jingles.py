@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-import itertools
 import random
 from dataclasses import dataclass
 from datetime import timedelta
-from typing import List, Optional
+from typing import List, Optional, Sequence
+
+from .state import pack_random, unpack_random
 
 
 @dataclass
@@ -24,16 +25,44 @@ JINGLE_LIBRARY: List[Jingle] = [
 
 
 class JingleVault:
-    """Cycles through jingles so the show sounds produced."""
+    """Cycles through jingles so the show sounds produced.
+
+    Without a ``library`` the built-in ``JINGLE_LIBRARY`` is used.
+    """
 
-    def __init__(self, *, seed: Optional[int] = None) -> None:
+    def __init__(self, *, seed: Optional[int] = None, library: Optional[Sequence[Jingle]] = None) -> None:
         self.random = random.Random(seed)
-        self._cycle = itertools.cycle(self._shuffled())
+        self.library: List[Jingle] = list(library) if library else JINGLE_LIBRARY
+        self._order = self._shuffled()
+        self._position = 0
 
     def _shuffled(self) -> List[Jingle]:
-        jingles = JINGLE_LIBRARY.copy()
+        jingles = self.library.copy()
         self.random.shuffle(jingles)
         return jingles
 
     def next_jingle(self) -> Jingle:
-        return next(self._cycle)
+        jingle = self._order[self._position % len(self._order)]
+        self._position += 1
+        return jingle
+
+    def upcoming(self, count: int) -> List[Jingle]:
+        """The next ``count`` jingles, without advancing the rotation."""
+
+        return [self._order[(self._position + offset) % len(self._order)] for offset in range(count)]
+
+    def state(self) -> dict:
+        return {
+            "random": pack_random(self.random),
+            "order": [jingle.name for jingle in self._order],
+            "position": self._position,
+        }
+
+    def restore(self, state: dict) -> None:
+        by_name = {jingle.name: jingle for jingle in self.library}
+        try:
+            self._order = [by_name[name] for name in state["order"]]
+        except KeyError as exc:
+            raise ValueError(f"unknown jingle {exc.args[0]!r} in state") from None
+        unpack_random(self.random, state["random"])
+        self._position = state["position"]
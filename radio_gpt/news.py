@@ -1,9 +1,15 @@
 from __future__ import annotations
 
 import random
+import re
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional
+from heapq import heapify, heappop, heappush, nlargest
+from itertools import count
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .state import pack_random, unpack_random
 
 
 @dataclass
@@ -69,19 +75,137 @@ WEATHER_TEMPLATES: List[str] = [
 ]
 
 
+# (-relevance, arrival number, item): max-heap order, ties in arrival order
+_Entry = Tuple[float, int, NewsItem]
+
+_WORD = re.compile(r"\w+")
+
+
+def headline_key(headline: str) -> str:
+    """Normalized headline used to spot near-identical stories.
+
+    Case, punctuation, spacing and word order are ignored.
+    """
+
+    return " ".join(sorted(set(_WORD.findall(headline.casefold()))))
+
+
+class NewsFeed:
+    """Incrementally maintained news pool with duplicate detection.
+
+    Items are kept in one relevance max-heap per (local, category) group, so
+    adding costs O(log n) and ``top(k)`` walks only the best O(k) heap
+    nodes instead of sorting the pool. Headlines already seen (see
+    ``headline_key``) are dropped. Above ``max_items`` the least relevant
+    items are discarded.
+    """
+
+    def __init__(
+        self,
+        items: Iterable[NewsItem] = (),
+        *,
+        local_items: Iterable[NewsItem] = (),
+        max_items: int = 10_000,
+        dedup_window: int = 100_000,
+    ) -> None:
+        self.max_items = max_items
+        self.dedup_window = dedup_window
+        self.duplicates = 0
+        self._heaps: Dict[Tuple[bool, str], List[_Entry]] = {}
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._arrivals = count()
+        self._size = 0
+        self.extend(items)
+        self.extend(local_items, local=True)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, item: NewsItem, *, local: bool = False) -> bool:
+        """Adds ``item``; returns False if it duplicates a known headline."""
+
+        key = headline_key(item.headline)
+        if key in self._seen:
+            self.duplicates += 1
+            return False
+        self._seen[key] = None
+        if len(self._seen) > self.dedup_window:
+            self._seen.popitem(last=False)
+
+        group = (local, item.category)
+        heap = self._heaps.get(group)
+        if heap is None:
+            heap = self._heaps[group] = []
+        heappush(heap, (-item.relevance, next(self._arrivals), item))
+        self._size += 1
+        if self._size > 2 * self.max_items:
+            self._trim()
+        return True
+
+    def extend(self, items: Iterable[NewsItem], *, local: bool = False) -> int:
+        return sum(self.add(item, local=local) for item in items)
+
+    def top(self, k: int, *, include_local: bool = True) -> List[NewsItem]:
+        """The ``k`` most relevant items, ties in arrival order."""
+
+        frontier: List[Tuple[_Entry, int, int]] = []
+        heaps = []
+        for (local, _), heap in self._heaps.items():
+            if heap and (include_local or not local):
+                frontier.append((heap[0], len(heaps), 0))
+                heaps.append(heap)
+        heapify(frontier)
+        selection: List[NewsItem] = []
+        while frontier and len(selection) < k:
+            entry, group, index = heappop(frontier)
+            selection.append(entry[2])
+            heap = heaps[group]
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(heap):
+                    heappush(frontier, (heap[child], group, child))
+        return selection
+
+    def _trim(self) -> None:
+        # Amortized: runs once per ``max_items`` additions.
+        keep = nlargest(
+            self.max_items,
+            ((entry, group) for group, heap in self._heaps.items() for entry in heap),
+            key=lambda pair: (-pair[0][0], pair[0][1]),
+        )
+        self._heaps = {}
+        for entry, group in keep:
+            self._heaps.setdefault(group, []).append(entry)
+        for heap in self._heaps.values():
+            heapify(heap)
+        self._size = len(keep)
+
+
 class Newsroom:
-    """Provides curated news and weather suggestions."""
+    """Provides curated news and weather suggestions.
+
+    Without a ``feed`` the built-in ``GLOBAL_NEWS``/``LOCAL_NEWS`` are used,
+    without ``weather`` the built-in ``WEATHER_TEMPLATES``.
+    """
 
-    def __init__(self, *, seed: Optional[int] = None) -> None:
+    def __init__(
+        self,
+        *,
+        seed: Optional[int] = None,
+        feed: Optional[NewsFeed] = None,
+        weather: Optional[Sequence[str]] = None,
+    ) -> None:
         self.random = random.Random(seed)
+        self.feed = feed
+        self.weather: Sequence[str] = weather or WEATHER_TEMPLATES
 
     def compose_news(
         self, *, include_weather: bool = True, include_local: bool = True, limit: int = 5
     ) -> List[NewsItem]:
-        pool = GLOBAL_NEWS.copy()
-        if include_local:
-            pool.extend(LOCAL_NEWS)
-        selection = sorted(pool, key=lambda item: item.relevance, reverse=True)[: limit - 1]
+        if self.feed is not None:
+            selection = self.feed.top(limit - 1, include_local=include_local)
+        else:
+            pool = GLOBAL_NEWS + LOCAL_NEWS if include_local else GLOBAL_NEWS
+            selection = nlargest(limit - 1, pool, key=lambda item: item.relevance)
 
         if include_weather:
             weather = self._weather_item()
@@ -90,8 +214,16 @@ class Newsroom:
         self.random.shuffle(selection)
         return selection
 
+    def state(self) -> dict:
+        """RNG state only; the feed's items are an input, not part of the state."""
+
+        return {"random": pack_random(self.random)}
+
+    def restore(self, state: dict) -> None:
+        unpack_random(self.random, state["random"])
+
     def _weather_item(self) -> NewsItem:
-        template = self.random.choice(WEATHER_TEMPLATES)
+        template = self.random.choice(self.weather)
         return NewsItem(
             headline="Wetter",
             summary=template,
@@ -1,10 +1,20 @@
 from __future__ import annotations
 
-import itertools
 import random
+from array import array
+from collections import deque
+from functools import partial
 from dataclasses import dataclass
 from datetime import timedelta
-from typing import Iterable, List, Optional
+from typing import Collection, Iterable, List, Optional, Sequence
+
+from .backtiming import Backtimer, BacktimePlan, BacktimeRules
+from .catalog import SongCatalog
+from .energy import EnergyCurve, EnergyPlanner
+from .rotation import RotationRules, RotationScheduler
+from .playlog import PlayLog
+from .similarity import SimilarityIndex, TransitionRules
+from .state import pack_array, pack_random, unpack_array, unpack_random
 
 
 @dataclass
@@ -158,26 +168,212 @@ SONG_LIBRARY: List[Song] = [
 
 
 class PlaylistPlanner:
-    """Plans songs for the show and keeps a rotation going."""
+    """Plans songs for the show and keeps a rotation going.
+
+    Without ``rotation`` rules the planner cycles through one shuffled copy
+    of the catalog. With rules, picks go through a ``RotationScheduler``
+    that enforces song, artist and tag separation; ``at`` is the air time
+    of the pick in epoch seconds. A ``history`` play log seeds the rotation
+    with the last play of every catalog song it knows.
 
-    def __init__(self, *, seed: Optional[int] = None) -> None:
+    With ``transitions`` rules, ``next_song(after=...)`` picks among the
+    songs most similar to ``after`` (see ``SimilarityIndex``) that the
+    rotation allows, or, without rotation, that were not among the last
+    ``TransitionRules.recent`` picks.
+    """
+
+    def __init__(
+        self,
+        *,
+        seed: Optional[int] = None,
+        catalog: Optional[SongCatalog] = None,
+        rotation: Optional[RotationRules] = None,
+        history: Optional[PlayLog] = None,
+        transitions: Optional[TransitionRules] = None,
+    ) -> None:
         self.random = random.Random(seed)
-        self._rotation = itertools.cycle(self._shuffled_library())
+        self.catalog = catalog if catalog is not None else SongCatalog(SONG_LIBRARY)
+        self.transitions = transitions
+        self._clock = 0.0
+        self._similarity: Optional[SimilarityIndex] = None
+        self._recent: "deque[int]" = deque(maxlen=transitions.recent if transitions is not None else 0)
+        self._energy_planner: Optional[EnergyPlanner] = None
+        self._backtimer: Optional[Backtimer] = None
+        if rotation is not None:
+            self.scheduler: Optional[RotationScheduler] = RotationScheduler(self.catalog, rotation, self.random)
+            if history is not None:
+                self._prime(history)
+        else:
+            self.scheduler = None
+            self._order = self._shuffled_ids()
+            self._position = 0
+
+    def _shuffled_ids(self) -> array:
+        ids = array("I", range(len(self.catalog)))
+        self.random.shuffle(ids)
+        return ids
+
+    def next_song(self, *, at: Optional[float] = None, after: Optional[Song] = None) -> Song:
+        if after is not None and self.transitions is not None:
+            song = self._follow(after, at)
+            if song is not None:
+                return song
+        if self.scheduler is None:
+            song_id = self._order[self._position % len(self._order)]
+            self._position += 1
+            if self.transitions is not None:
+                self._recent.append(song_id)
+            return self.catalog[song_id]
+        return self._advance(self.scheduler.next(self._clock if at is None else at), at)
+
+    def pick_energy_song(self, *, min_energy: float, at: Optional[float] = None) -> Song:
+        if self.scheduler is not None:
+            candidates = self.catalog.ids_min_energy(min_energy)
+            return self._advance(self.scheduler.pick_from(candidates, self._clock if at is None else at), at)
+        band = self.catalog.band_ids(min_energy)
+        if not band:
+            return self.next_song(at=at)
+        return self.catalog[self.random.choice(band)]
+
+    def plan_block(
+        self,
+        seconds: int,
+        overheads: Sequence[int],
+        *,
+        curve: EnergyCurve,
+        after: Optional[Song] = None,
+        at: Optional[float] = None,
+    ) -> List[Song]:
+        """Songs for a block of ``seconds`` that follow ``curve`` (see ``EnergyPlanner``).
+
+        With rotation rules, songs blocked at the start of the block are
+        skipped and the planned songs are booked at their planned air times.
+        """
 
-    def _shuffled_library(self) -> List[Song]:
-        songs = SONG_LIBRARY.copy()
-        self.random.shuffle(songs)
+        if self._energy_planner is None:
+            self._energy_planner = EnergyPlanner(self.catalog)
+        start = self._clock if at is None else at
+        allowed = partial(self.scheduler.allows, now=start) if self.scheduler is not None else None
+        ids = self._energy_planner.plan(
+            seconds,
+            overheads,
+            curve=curve,
+            after=self.catalog.index(after) if after is not None else None,
+            allowed=allowed,
+            rng=self.random,
+        )
+        songs = [self.catalog[song_id] for song_id in ids]
+        clock = start
+        for step, song_id in enumerate(ids):
+            if self.scheduler is not None:
+                self.scheduler.record_play(song_id, clock)
+            clock += self._energy_planner.slot_seconds(song_id, overheads[step % len(overheads)])
+        self._clock = clock
         return songs
 
-    def next_song(self) -> Song:
-        return next(self._rotation)
+    def backtime(
+        self,
+        seconds: int,
+        *,
+        rules: BacktimeRules,
+        song_overhead: int,
+        closing_overhead: int,
+        jingles: Sequence[int],
+        exclude: Collection[int] = (),
+        at: Optional[float] = None,
+    ) -> BacktimePlan:
+        """Closing songs that end exactly after ``seconds`` (see ``Backtimer``).
 
-    def pick_energy_song(self, *, min_energy: float) -> Song:
-        candidates = [song for song in SONG_LIBRARY if song.energy >= min_energy]
-        if not candidates:
-            return self.next_song()
-        return self.random.choice(candidates)
+        With rotation rules only songs allowed at the start of the stretch
+        are used, and the picks are booked at their planned air times.
+        """
+
+        if self._backtimer is None or self._backtimer.rules != rules:
+            self._backtimer = Backtimer(self.catalog, rules)
+        start = self._clock if at is None else at
+        allowed = partial(self.scheduler.allows, now=start) if self.scheduler is not None else None
+        plan = self._backtimer.solve(
+            seconds,
+            song_overhead=song_overhead,
+            closing_overhead=closing_overhead,
+            jingles=jingles,
+            exclude=exclude,
+            allowed=allowed,
+            rng=self.random,
+        )
+        clock = start
+        for step, song_id in enumerate(plan.songs):
+            if step == len(plan.songs) - 1:
+                clock += closing_overhead - plan.talk_over
+            if self.scheduler is not None:
+                self.scheduler.record_play(song_id, clock)
+            clock += self.catalog.durations[song_id]
+            if step < len(plan.jingles):
+                clock += song_overhead + jingles[plan.jingles[step]]
+        self._clock = clock - plan.fade
+        return plan
+
+    def state(self, *, include_order: bool = False) -> dict:
+        state = {"random": pack_random(self.random), "clock": self._clock}
+        if self.scheduler is not None:
+            state["rotation"] = self.scheduler.state(include_order=include_order)
+        else:
+            state["position"] = self._position
+            if include_order:
+                state["order"] = pack_array(self._order)
+            if self.transitions is not None:
+                state["recent"] = list(self._recent)
+        return state
+
+    def restore(self, state: dict) -> None:
+        if (self.scheduler is not None) != ("rotation" in state):
+            raise ValueError("playlist state and rotation rules do not match")
+        unpack_random(self.random, state["random"])
+        self._clock = state["clock"]
+        if self.scheduler is not None:
+            self.scheduler.restore(state["rotation"])
+            return
+        if "order" in state:
+            order = unpack_array(state["order"])
+            if len(order) != len(self._order):
+                raise ValueError("playlist state does not match the catalog size")
+            self._order = order
+        self._position = state["position"]
+        self._recent.clear()
+        self._recent.extend(state.get("recent", ()))
 
     def search(self, tag: str) -> Iterable[Song]:
-        lowered = tag.lower()
-        return [song for song in SONG_LIBRARY if lowered in (t.lower() for t in song.tags)]
+        return self.catalog.search(tag)
+
+    def _prime(self, history: PlayLog) -> None:
+        # Replayed oldest first, so the rotation ends up in the logged order.
+        ids = {track: song_id for song_id, track in enumerate(self.catalog.track_keys())}
+        for track, played in history.latest():
+            song_id = ids.get(track)
+            if song_id is not None:
+                self.scheduler.record_play(song_id, played)
+
+    def _follow(self, after: Song, at: Optional[float]) -> Optional[Song]:
+        """A random pick among the closest allowed matches of ``after``; ``None`` if there is none."""
+
+        if self._similarity is None:
+            self._similarity = SimilarityIndex(self.catalog, self.transitions)
+        now = self._clock if at is None else at
+        if self.scheduler is not None:
+            allowed = partial(self.scheduler.allows, now=now)
+        else:
+            recent = set(self._recent)
+            allowed = lambda song_id: song_id not in recent
+        choices = self._similarity.nearest(self.catalog.index(after), self.transitions.choices, allowed=allowed)
+        if not choices:
+            return None
+        song_id = self.random.choice(choices)
+        if self.scheduler is not None:
+            self.scheduler.record_play(song_id, now)
+            return self._advance(self.catalog[song_id], at)
+        self._recent.append(song_id)
+        return self.catalog[song_id]
+
+    def _advance(self, song: Song, at: Optional[float]) -> Song:
+        self._clock = (self._clock if at is None else at) + song.duration.total_seconds()
+        return song
@@ -0,0 +1,232 @@
+"""Append-only log of everything RadioGPT scheduled, in a local SQLite file.
+
+Besides the raw ``plays`` table the log keeps two small derived tables in
+the same transaction: ``latest`` (last play per track, for "last played"
+lookups and for priming the rotation) and ``daily`` (plays per track and
+UTC day, so "top played" over long windows reads one row per track and
+day instead of every play).
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+if TYPE_CHECKING:
+    from .generator import RadioShow
+    from .playlist import Song
+
+SCHEMA_VERSION = 1
+DAY = 86400
+
+# at (epoch seconds), kind, track, artist, title, duration in seconds
+PlayRow = Tuple[float, str, str, Optional[str], str, int]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plays (
+    at REAL NOT NULL,
+    kind TEXT NOT NULL,
+    track TEXT NOT NULL,
+    artist TEXT,
+    title TEXT NOT NULL,
+    duration INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS plays_track ON plays (track, at);
+CREATE INDEX IF NOT EXISTS plays_artist ON plays (artist, at) WHERE artist IS NOT NULL;
+CREATE INDEX IF NOT EXISTS plays_at ON plays (at);
+CREATE TABLE IF NOT EXISTS latest (
+    track TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    artist TEXT,
+    at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS latest_artist ON latest (artist, at) WHERE artist IS NOT NULL;
+CREATE TABLE IF NOT EXISTS daily (
+    track TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    plays INTEGER NOT NULL,
+    PRIMARY KEY (track, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS daily_day ON daily (kind, day);
+"""
+
+
+def song_key(song: Song) -> str:
+    """Track identity of a song in the log."""
+
+    return track_key(song.platform, song.source_id, song.artist, song.title)
+
+
+def track_key(platform: str, source_id: Optional[str], artist: str = "", title: str = "") -> str:
+    """Track identity from the raw song fields (see ``song_key``); artist and title only count without a source id."""
+
+    if source_id:
+        return f"{platform}:{source_id}"
+    return f"{platform}:{artist} – {title}"
+
+
+class PlayLog:
+    """Play history with indexed "last played", "plays since" and "top played" queries.
+
+    Lookups by track or artist are B-tree seeks (O(log n)); counts over a
+    time range additionally read the matching index entries only.
+    """
+
+    def __init__(self, path: Union[str, "os.PathLike[str]"]) -> None:
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            self._db.close()
+            raise ValueError(f"{path}: unsupported play log version {version}")
+        with self._db:
+            self._db.executescript(_SCHEMA)
+            self._db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def __enter__(self) -> PlayLog:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT count(*) FROM plays").fetchone()[0]
+
+    def close(self) -> None:
+        self._db.close()
+
+    def record(self, rows: Iterable[PlayRow]) -> int:
+        """Appends ``rows`` in one transaction; returns how many were written."""
+
+        rows = list(rows)
+        with self._db:
+            self._db.executemany("INSERT INTO plays VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._db.executemany(
+                "INSERT INTO latest VALUES (?, ?, ?, ?) ON CONFLICT (track) DO UPDATE"
+                " SET at = max(at, excluded.at), artist = excluded.artist",
+                [(track, kind, artist, at) for at, kind, track, artist, _, _ in rows],
+            )
+            self._db.executemany(
+                "INSERT INTO daily VALUES (?, ?, ?, 1) ON CONFLICT (track, day) DO UPDATE SET plays = plays + 1",
+                [(track, int(at // DAY), kind) for at, kind, track, _, _, _ in rows],
+            )
+        return len(rows)
+
+    def record_show(self, show: RadioShow, songs: Sequence[Song]) -> int:
+        """Logs every segment of ``show``; ``songs`` are its songs in air order."""
+
+        store = show.store
+        offsets = store.offsets()
+        start = show.start.timestamp()
+        aired = iter(songs)
+        rows: List[PlayRow] = []
+        for index in range(len(store)):
+            at = start + offsets[index]
+            kind = store.kind(index)
+            payload = store.payload(index) or {}
+            if "source_id" in payload:
+                song = next(aired)
+                rows.append((at, "song", song_key(song), song.artist.casefold(), store.title(index), store.duration(index)))
+            elif kind == "tts_break":
+                rows.append((at, kind, payload.get("url", store.title(index)), None, store.title(index), store.duration(index)))
+            else:
+                rows.append((at, kind, f"{kind}:{store.title(index)}", None, store.title(index), store.duration(index)))
+        return self.record(rows)
+
+    def last_played(self, track: str) -> Optional[float]:
+        row = self._db.execute("SELECT at FROM latest WHERE track = ?", (track,)).fetchone()
+        return row[0] if row else None
+
+    def artist_last_played(self, artist: str) -> Optional[float]:
+        return self._db.execute("SELECT max(at) FROM latest WHERE artist = ?", (artist.casefold(),)).fetchone()[0]
+
+    def play_count(
+        self,
+        *,
+        track: Optional[str] = None,
+        artist: Optional[str] = None,
+        since: float = -math.inf,
+        until: float = math.inf,
+    ) -> int:
+        """Plays of ``track`` (or any track of ``artist``) in ``[since, until)``."""
+
+        if (track is None) == (artist is None):
+            raise ValueError("pass exactly one of track or artist")
+        column, value = ("track", track) if track is not None else ("artist", artist.casefold())  # type: ignore[union-attr]
+        query = f"SELECT count(*) FROM plays WHERE {column} = ? AND at >= ? AND at < ?"
+        return self._db.execute(query, (value, since, until)).fetchone()[0]
+
+    def top(self, since: float, until: float, *, kind: str = "song", limit: int = 10) -> List[Tuple[str, int]]:
+        """Most played tracks in ``[since, until)``, ties by track.
+
+        Whole UTC days come from the daily counts; only the partial days at
+        the edges are counted from single plays.
+        """
+
+        first_day = math.ceil(since / DAY) if math.isfinite(since) else None
+        last_day = math.floor(until / DAY) if math.isfinite(until) else None
+        if first_day is not None and last_day is not None and first_day >= last_day:
+            parts = [("SELECT track, count(*) AS n FROM plays WHERE kind = ? AND at >= ? AND at < ? GROUP BY track", (kind, since, until))]
+        else:
+            parts = [
+                (
+                    "SELECT track, sum(plays) AS n FROM daily WHERE kind = ? AND day >= ? AND day < ? GROUP BY track",
+                    (kind, -math.inf if first_day is None else first_day, math.inf if last_day is None else last_day),
+                )
+            ]
+            if first_day is not None:
+                parts.append(("SELECT track, count(*) AS n FROM plays WHERE kind = ? AND at >= ? AND at < ? GROUP BY track", (kind, since, first_day * DAY)))
+            if last_day is not None:
+                parts.append(("SELECT track, count(*) AS n FROM plays WHERE kind = ? AND at >= ? AND at < ? GROUP BY track", (kind, last_day * DAY, until)))
+        union = " UNION ALL ".join(sql for sql, _ in parts)
+        query = f"SELECT track, sum(n) AS total FROM ({union}) GROUP BY track ORDER BY total DESC, track LIMIT ?"
+        parameters = tuple(value for _, values in parts for value in values) + (limit,)
+        return [(track, total) for track, total in self._db.execute(query, parameters)]
+
+    def latest(self, kind: str = "song") -> Iterator[Tuple[str, float]]:
+        """(track, last play) of every ``kind`` track ever logged, oldest first."""
+
+        return iter(self._db.execute("SELECT track, at FROM latest WHERE kind = ? ORDER BY at", (kind,)))
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="radio_gpt history",
+        description="Fragt das Sendeprotokoll (--play-log) ab.",
+    )
+    parser.add_argument("log", type=str, help="Datei des Sendeprotokolls")
+    parser.add_argument("--track", type=str, default=None, help="Track-Schlüssel, z. B. YOUTUBE:YTv123midnight")
+    parser.add_argument("--artist", type=str, default=None, help="Name des Artists")
+    parser.add_argument("--days", type=float, default=7, help="Zeitraum in Tagen bis jetzt (Standard: 7)")
+    parser.add_argument("--top", type=int, default=10, help="Anzahl der meistgespielten Tracks ohne --track/--artist (Standard: 10)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    if not os.path.exists(args.log):
+        raise SystemExit(f"{args.log}: Sendeprotokoll nicht gefunden")
+    now = datetime.now(timezone.utc)
+    since = (now - timedelta(days=args.days)).timestamp()
+    with PlayLog(args.log) as log:
+        if args.track is None and args.artist is None:
+            for track, plays in log.top(since, now.timestamp(), limit=args.top):
+                print(f"{plays:>6}  {track}")
+            return 0
+        if args.track is not None:
+            last = log.last_played(args.track)
+            plays = log.play_count(track=args.track, since=since)
+        else:
+            last = log.artist_last_played(args.artist)
+            plays = log.play_count(artist=args.artist, since=since)
+    stamp = datetime.fromtimestamp(last, timezone.utc).isoformat() if last is not None else "nie"
+    print(f"Zuletzt gespielt: {stamp}")
+    print(f"Plays in den letzten {args.days:g} Tagen: {plays}")
+    return 0
@@ -0,0 +1,120 @@
+"""Prefetch manifests: every asset of a show, ordered by when it is needed."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .generator import RadioShow
+
+
+@dataclass(frozen=True)
+class PrefetchPolicy:
+    """How far ahead assets are fetched and how they are batched, in seconds."""
+
+    lead_seconds: int = 120
+    # Assets due to be fetched within this window of a batch's first one join it.
+    batch_window: int = 300
+    batch_size: int = 50
+
+
+@dataclass
+class Asset:
+    kind: str
+    # URL for jingles and TTS clips, ``platform:source_id`` for tracks
+    # (``platform:artist – title`` for tracks without a source id).
+    key: str
+    first_needed: int
+    uses: int = 1
+    url: Optional[str] = None
+    platform: Optional[str] = None
+    source_id: Optional[str] = None
+    title: Optional[str] = None
+
+    def as_dict(self, start: datetime, lead_seconds: int) -> dict:
+        entry: dict = {"kind": self.kind}
+        if self.url is not None:
+            entry["url"] = self.url
+        else:
+            entry["platform"] = self.platform
+            entry["source_id"] = self.source_id
+            if self.source_id is None:
+                entry["title"] = self.title
+        entry["needed_at"] = (start + timedelta(seconds=self.first_needed)).isoformat()
+        entry["fetch_at"] = (start + timedelta(seconds=self.first_needed - lead_seconds)).isoformat()
+        entry["uses"] = self.uses
+        return entry
+
+
+@dataclass
+class PrefetchManifest:
+    start: datetime
+    policy: PrefetchPolicy
+    assets: List[Asset] = field(default_factory=list)
+    batches: List[List[Asset]] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        lead = self.policy.lead_seconds
+        return {
+            "lead_seconds": lead,
+            "assets": len(self.assets),
+            "batches": [
+                {
+                    "fetch_at": (self.start + timedelta(seconds=batch[0].first_needed - lead)).isoformat(),
+                    "assets": [asset.as_dict(self.start, lead) for asset in batch],
+                }
+                for batch in self.batches
+            ],
+        }
+
+
+def build_manifest(show: RadioShow, policy: Optional[PrefetchPolicy] = None) -> PrefetchManifest:
+    """Unique assets of ``show`` in order of first use, grouped into fetch batches.
+
+    Segments are already in air order, so one pass yields the assets sorted
+    by first-needed time; repeats only bump ``uses``.
+    """
+
+    policy = policy or PrefetchPolicy()
+    store = show.store
+    offsets = store.offsets()
+    seen: Dict[Tuple[str, str], Asset] = {}
+    assets: List[Asset] = []
+    for index in range(len(store)):
+        payload = store.payload(index)
+        asset = _asset(payload, offsets[index], store.title(index)) if payload else None
+        if asset is None:
+            continue
+        known = seen.get((asset.kind, asset.key))
+        if known is not None:
+            known.uses += 1
+        else:
+            seen[asset.kind, asset.key] = asset
+            assets.append(asset)
+
+    batches: List[List[Asset]] = []
+    for asset in assets:
+        if (
+            not batches
+            or len(batches[-1]) >= policy.batch_size
+            or asset.first_needed - batches[-1][0].first_needed >= policy.batch_window
+        ):
+            batches.append([])
+        batches[-1].append(asset)
+    return PrefetchManifest(start=show.start, policy=policy, assets=assets, batches=batches)
+
+
+def _asset(payload: dict, offset: int, title: str) -> Optional[Asset]:
+    kind = payload.get("type")
+    if kind == "JINGLE":
+        return Asset("jingle", payload["asset_url"], offset, url=payload["asset_url"])
+    if kind == "TTS_BREAK":
+        return Asset("tts", payload["url"], offset, url=payload["url"])
+    if "source_id" in payload:
+        platform, source_id = payload.get("platform", ""), payload["source_id"]
+        if source_id is None:
+            return Asset("track", f"{platform}:{title}", offset, platform=platform, title=title)
+        return Asset("track", f"{platform}:{source_id}", offset, platform=platform, source_id=source_id)
+    return None
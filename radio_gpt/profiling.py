@@ -0,0 +1,222 @@
+"""Per-stage timing and counters for show generation.
+
+A ``Profiler`` wraps the methods listed in ``STAGES`` with timing hooks while
+it is active (``with Profiler(): ...``) and restores the originals on exit,
+so disabled profiling costs nothing. Stage times are exclusive: time spent
+in a nested stage (e.g. ``slug`` inside ``payload``) is only counted there.
+"""
+
+from __future__ import annotations
+
+import functools
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+from .generator import RadioShow, ShowGenerator
+from .jingles import JingleVault
+from .news import Newsroom
+from .playlist import PlaylistPlanner
+from .scriptwriter import ScriptWriter
+from .store import SegmentStore
+from .tts import TTSRenderer
+
+
+def _one(_result: object) -> int:
+    return 1
+
+
+def _size(result: object) -> int:
+    return len(result)  # type: ignore[arg-type]
+
+
+def _backtimed(result: object) -> int:
+    return len(result.songs)  # type: ignore[attr-defined]
+
+
+def _rendered(result: object) -> int:
+    return result.rendered  # type: ignore[attr-defined]
+
+
+# stage -> [(owner, attribute, counter, amount of the call's result)]
+STAGES: Dict[str, List[Tuple[type, str, Optional[str], Callable[[object], int]]]] = {
+    "generator": [(ShowGenerator, "build_show", "shows_built", _one)],
+    "intro": [(ScriptWriter, "build_intro", None, _one)],
+    "playlist": [
+        (PlaylistPlanner, "next_song", "songs_picked", _one),
+        (PlaylistPlanner, "pick_energy_song", "songs_picked", _one),
+        (PlaylistPlanner, "plan_block", "songs_picked", _size),
+        (PlaylistPlanner, "backtime", "songs_picked", _backtimed),
+    ],
+    "jingles": [(JingleVault, "next_jingle", "jingles_picked", _one)],
+    "news": [(Newsroom, "compose_news", "news_items", _size)],
+    "script": [
+        (ScriptWriter, "build_music_intro", None, _one),
+        (ScriptWriter, "build_song_backannounce", None, _one),
+        (ScriptWriter, "build_news_bulletin", None, _one),
+        (ScriptWriter, "build_outro", None, _one),
+        (ScriptWriter, "_render", "templates_rendered", _one),
+    ],
+    "payload": [
+        (ShowGenerator, "_song_record", None, _one),
+        (ShowGenerator, "_jingle_record", None, _one),
+        (ShowGenerator, "_tts_payload", None, _one),
+    ],
+    "slug": [(ShowGenerator, "_slug", "slug_calls", _one)],
+    "tts": [(TTSRenderer, "render_show", "tts_clips_rendered", _rendered)],
+    "store": [(SegmentStore, "append", "segments_stored", _one)],
+    "serialization": [
+        (RadioShow, "as_dict", None, _one),
+        (RadioShow, "as_timeline", None, _one),
+        (RadioShow, "render_text", None, _one),
+        (RadioShow, "to_json", "bytes_serialized", _size),
+    ],
+}
+
+_active: Optional[Profiler] = None
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    seconds: float = 0.0
+
+
+class Profiler:
+    """Collects exclusive per-stage times, counters and optionally peak memory."""
+
+    def __init__(self, *, memory: bool = False) -> None:
+        self.memory = memory
+        self.stages: Dict[str, StageStats] = {}
+        self.counters: Dict[str, int] = {}
+        self.wall_seconds = 0.0
+        self.peak_bytes: Optional[int] = None
+        self._stack: List[int] = []
+        self._originals: List[Tuple[type, str, object]] = []
+        self._started = 0.0
+
+    def __enter__(self) -> Profiler:
+        global _active
+        if _active is not None:
+            raise RuntimeError("another profiler is already active")
+        _active = self
+        for stage, targets in STAGES.items():
+            for owner, attribute, counter, amount in targets:
+                original = owner.__dict__[attribute]
+                self._originals.append((owner, attribute, original))
+                setattr(owner, attribute, self._wrap(stage, original, counter, amount))
+        if self.memory:
+            tracemalloc.start()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        global _active
+        self.wall_seconds += time.perf_counter() - self._started
+        if self.memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.peak_bytes = max(peak, self.peak_bytes or 0)
+        for owner, attribute, original in reversed(self._originals):
+            setattr(owner, attribute, original)
+        self._originals.clear()
+        _active = None
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        stack = self._stack
+        stack.append(0)
+        started = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self._finish(name, time.perf_counter_ns() - started)
+
+    def _wrap(self, stage: str, func: Callable, counter: Optional[str], amount: Callable[[object], int]) -> Callable:
+        stack = self._stack
+
+        @functools.wraps(func)
+        def timed(*args: object, **kwargs: object) -> object:
+            stack.append(0)
+            started = time.perf_counter_ns()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                self._finish(stage, time.perf_counter_ns() - started)
+            if counter is not None:
+                self.count(counter, amount(result))
+            return result
+
+        return timed
+
+    def _finish(self, stage: str, elapsed: int) -> None:
+        children = self._stack.pop()
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = StageStats()
+        stats.calls += 1
+        stats.seconds += (elapsed - children) / 1e9
+        if self._stack:
+            self._stack[-1] += elapsed
+
+    def report(self) -> dict:
+        report = {
+            "wall_seconds": self.wall_seconds,
+            "stages": {
+                name: {"calls": stats.calls, "seconds": stats.seconds}
+                for name, stats in sorted(self.stages.items(), key=lambda item: -item[1].seconds)
+            },
+            "counters": dict(sorted(self.counters.items())),
+        }
+        if self.peak_bytes is not None:
+            report["peak_bytes"] = self.peak_bytes
+        return report
+
+    def render(self) -> str:
+        total = sum(stats.seconds for stats in self.stages.values()) or 1.0
+        lines = [f"{'stage':<16} {'calls':>8} {'time':>11} {'share':>7}"]
+        for name, row in self.report()["stages"].items():
+            lines.append(
+                f"{name:<16} {row['calls']:>8} {row['seconds'] * 1e3:>9.3f}ms {row['seconds'] / total:>6.1%}"
+            )
+        lines.append(f"{'wall':<16} {'':>8} {self.wall_seconds * 1e3:>9.3f}ms")
+        lines.extend(f"{name:<16} {value:>8}" for name, value in sorted(self.counters.items()))
+        if self.peak_bytes is not None:
+            lines.append(f"{'peak memory':<16} {self.peak_bytes / 1024:>8.1f}KiB")
+        return "\n".join(lines)
+
+    def to_prometheus(self, *, prefix: str = "radio_gpt") -> str:
+        """The report in the Prometheus text exposition format."""
+
+        lines = [
+            f"# HELP {prefix}_stage_seconds_total Exclusive time spent per generation stage.",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        lines += [f'{prefix}_stage_seconds_total{{stage="{name}"}} {stats.seconds:.9f}' for name, stats in self.stages.items()]
+        lines += [
+            f"# HELP {prefix}_stage_calls_total Calls per generation stage.",
+            f"# TYPE {prefix}_stage_calls_total counter",
+        ]
+        lines += [f'{prefix}_stage_calls_total{{stage="{name}"}} {stats.calls}' for name, stats in self.stages.items()]
+        for name, value in sorted(self.counters.items()):
+            lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total {value}"]
+        lines += [f"# TYPE {prefix}_wall_seconds gauge", f"{prefix}_wall_seconds {self.wall_seconds:.9f}"]
+        if self.peak_bytes is not None:
+            lines += [f"# TYPE {prefix}_peak_memory_bytes gauge", f"{prefix}_peak_memory_bytes {self.peak_bytes}"]
+        return "\n".join(lines) + "\n"
+
+
+def stage(name: str) -> ContextManager[None]:
+    """Times a block as ``name`` on the active profiler, if any."""
+
+    return _active.stage(name) if _active is not None else nullcontext()
+
+
+def count(name: str, amount: int = 1) -> None:
+    if _active is not None:
+        _active.count(name, amount)
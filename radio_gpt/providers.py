@@ -0,0 +1,426 @@
+"""Async content providers: catalog, news, weather and jingles from HTTP services.
+
+``ContentProviders.gather()`` fetches every configured source concurrently
+over pooled keep-alive connections. Each source has its own timeout and a
+stale-while-revalidate cache: a fresh value is used as is, a stale one is
+used while a refresh runs in the background, and a source that fails or
+misses its timeout falls back to its last good value (or the built-in
+content), so a show never waits for the slowest service.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from . import serialization
+from .catalog import SongCatalog
+from .catalog_file import song_from_row
+from .ingest import news_from_row
+from .jingles import JINGLE_LIBRARY, Jingle
+from .news import GLOBAL_NEWS, LOCAL_NEWS, WEATHER_TEMPLATES, NewsFeed, NewsItem
+from .playlist import SONG_LIBRARY, Song
+from .server import TimelineServer
+
+INPUTS = ("catalog", "news", "local_news", "weather", "jingles")
+
+# Paths of the stand-in services, relative to a base URL.
+PATHS = {
+    "catalog": "/catalog",
+    "news": "/news",
+    "local_news": "/news/local",
+    "weather": "/weather",
+    "jingles": "/jingles",
+}
+
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class ConnectionPool:
+    """Minimal HTTP/1.1 GET client that keeps idle connections per host for reuse."""
+
+    def __init__(self, *, max_idle_per_host: int = 4) -> None:
+        self.max_idle_per_host = max_idle_per_host
+        self.opened = 0
+        self.reused = 0
+        self._idle: Dict[Tuple[str, str, int], List[Connection]] = {}
+
+    async def get(self, url: str) -> bytes:
+        """Body of a ``200`` response; raises ``ValueError`` for other statuses."""
+
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"unsupported URL {url!r}")
+        origin = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        request = (
+            f"GET {target} HTTP/1.1\r\nHost: {parts.netloc}\r\nAccept-Encoding: gzip\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode("latin-1")
+
+        connection = self._checkout(origin)
+        if connection is not None:
+            try:
+                return await self._exchange(origin, connection, request, url)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pass  # the server closed the idle connection; retry on a new one
+        return await self._exchange(origin, await self._connect(origin), request, url)
+
+    async def close(self) -> None:
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+    def _checkout(self, origin: Tuple[str, str, int]) -> Optional[Connection]:
+        idle = self._idle.get(origin)
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                self.reused += 1
+                return reader, writer
+            writer.close()
+        return None
+
+    async def _connect(self, origin: Tuple[str, str, int]) -> Connection:
+        scheme, host, port = origin
+        connection = await asyncio.open_connection(host, port, ssl=scheme == "https" or None)
+        self.opened += 1
+        return connection
+
+    async def _exchange(self, origin: Tuple[str, str, int], connection: Connection, request: bytes, url: str) -> bytes:
+        reader, writer = connection
+        try:
+            writer.write(request)
+            await writer.drain()
+            status, headers, body = await _read_response(reader)
+        except BaseException:
+            # Includes cancellation by a timeout: the connection is mid-response and unusable.
+            writer.close()
+            raise
+        if headers.get("connection", "").lower() == "close":
+            writer.close()
+        else:
+            idle = self._idle.setdefault(origin, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(connection)
+            else:
+                writer.close()
+        if headers.get("content-encoding") == "gzip":
+            body = gzip.decompress(body)
+        if status != 200:
+            raise ValueError(f"{url}: HTTP {status}")
+        return body
+
+
+async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str], bytes]:
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("connection closed before the response")
+    try:
+        status = int(status_line.split()[1])
+    except (IndexError, ValueError):
+        raise ValueError(f"malformed status line {status_line!r}") from None
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if not size:
+                await reader.readline()
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+        return status, headers, b"".join(chunks)
+    if "content-length" in headers:
+        return status, headers, await reader.readexactly(int(headers["content-length"]))
+    headers["connection"] = "close"
+    return status, headers, await reader.read()
+
+
+@dataclass(frozen=True)
+class Provider:
+    """One content source: ``parse`` turns the response body of ``url`` into the input value.
+
+    A value younger than ``fresh_for`` seconds is used without a request;
+    up to ``stale_for`` seconds later it is still used while a refresh runs
+    in the background.
+    """
+
+    name: str
+    url: str
+    parse: Callable[[bytes], object]
+    timeout: float = 2.0
+    fresh_for: float = 60.0
+    stale_for: float = 3600.0
+
+
+@dataclass
+class ProviderStats:
+    fresh: int = 0
+    stale: int = 0
+    fetched: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    fallbacks: int = 0
+
+
+@dataclass
+class ShowInputs:
+    """Fetched content for one show; ``None`` means the built-in content is used."""
+
+    catalog: Optional[SongCatalog] = None
+    news: Optional[List[NewsItem]] = None
+    local_news: Optional[List[NewsItem]] = None
+    weather: Optional[List[str]] = None
+    jingles: Optional[List[Jingle]] = None
+
+    def generator_options(self) -> dict:
+        """Keyword arguments for ``ShowGenerator``."""
+
+        options: dict = {"catalog": self.catalog, "weather": self.weather, "jingles": self.jingles}
+        if self.news is not None or self.local_news is not None:
+            # A service that only sends one of both keeps the built-in other half.
+            news = GLOBAL_NEWS if self.news is None else self.news
+            local_news = LOCAL_NEWS if self.local_news is None else self.local_news
+            options["news_feed"] = NewsFeed(news, local_items=local_news)
+        return options
+
+
+@dataclass
+class _Cached:
+    value: object
+    fetched_at: float
+
+
+class ContentProviders:
+    """Fetches show inputs concurrently with per-source timeouts and stale-while-revalidate.
+
+    A fetch that misses its timeout is not cancelled: it keeps running on
+    the pooled connection and its result serves the next ``gather``.
+    """
+
+    def __init__(self, providers: List[Provider], *, pool: Optional[ConnectionPool] = None) -> None:
+        unknown = [provider.name for provider in providers if provider.name not in INPUTS]
+        if unknown:
+            raise ValueError(f"unknown inputs {unknown} (expected {', '.join(INPUTS)})")
+        self.providers = providers
+        self.pool = pool if pool is not None else ConnectionPool()
+        self.stats: Dict[str, ProviderStats] = {provider.name: ProviderStats() for provider in providers}
+        self._cache: Dict[str, _Cached] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def from_base_url(
+        cls,
+        base_url: str,
+        *,
+        timeout: float = 2.0,
+        fresh_for: float = 60.0,
+        stale_for: float = 3600.0,
+        inputs: Tuple[str, ...] = INPUTS,
+    ) -> ContentProviders:
+        """Providers for services laid out like the stand-in server (see ``PATHS``)."""
+
+        base = base_url.rstrip("/")
+        return cls(
+            [
+                Provider(name, base + PATHS[name], PARSERS[name], timeout=timeout, fresh_for=fresh_for, stale_for=stale_for)
+                for name in inputs
+            ]
+        )
+
+    async def gather(self) -> ShowInputs:
+        values = await asyncio.gather(*(self._resolve(provider) for provider in self.providers))
+        return ShowInputs(**{provider.name: value for provider, value in zip(self.providers, values)})
+
+    async def close(self) -> None:
+        for task in self._inflight.values():
+            task.cancel()
+        await self.pool.close()
+
+    async def _resolve(self, provider: Provider) -> object:
+        stats = self.stats[provider.name]
+        cached = self._cache.get(provider.name)
+        age = time.monotonic() - cached.fetched_at if cached is not None else None
+        if cached is not None and age < provider.fresh_for:
+            stats.fresh += 1
+            return cached.value
+        task = self._refresh(provider)
+        if cached is not None and age < provider.fresh_for + provider.stale_for:
+            stats.stale += 1
+            return cached.value
+        try:
+            # Shielded, so a timeout leaves the fetch running for the next show.
+            return await asyncio.wait_for(asyncio.shield(task), provider.timeout)
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+        except (OSError, EOFError, ValueError, TypeError):
+            stats.errors += 1
+        stats.fallbacks += 1
+        return cached.value if cached is not None else None
+
+    def _refresh(self, provider: Provider) -> asyncio.Task:
+        task = self._inflight.get(provider.name)
+        if task is None:
+            task = self._inflight[provider.name] = asyncio.ensure_future(self._fetch(provider))
+            # Background refreshes are not awaited by anyone; keep their errors quiet.
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return task
+
+    async def _fetch(self, provider: Provider) -> object:
+        try:
+            value = provider.parse(await self.pool.get(provider.url))
+            self._cache[provider.name] = _Cached(value, time.monotonic())
+            self.stats[provider.name].fetched += 1
+            return value
+        finally:
+            self._inflight.pop(provider.name, None)
+
+
+def _rows(body: bytes, key: str) -> list:
+    data = json.loads(body)
+    rows = data.get(key, []) if isinstance(data, dict) else data
+    if not isinstance(rows, list):
+        raise ValueError(f"expected a list of {key}")
+    return rows
+
+
+def parse_catalog(body: bytes) -> SongCatalog:
+    """``[{"title", "artist", "duration", "energy", "tags", ...}]`` or ``{"songs": [...]}``."""
+
+    return SongCatalog([song_from_row(row) for row in _rows(body, "songs")])
+
+
+def parse_news(body: bytes) -> List[NewsItem]:
+    try:
+        return [news_from_row(row) for row in _rows(body, "items")]
+    except (KeyError, AttributeError, TypeError) as exc:
+        raise ValueError(f"invalid news item ({exc})") from None
+
+
+def parse_weather(body: bytes) -> List[str]:
+    return [str(text) for text in _rows(body, "forecasts") if text]
+
+
+def parse_jingles(body: bytes) -> List[Jingle]:
+    try:
+        return [
+            Jingle(str(row["name"]), str(row.get("slogan", "")), timedelta(seconds=float(row["duration"])))
+            for row in _rows(body, "jingles")
+        ]
+    except (KeyError, AttributeError, TypeError) as exc:
+        raise ValueError(f"invalid jingle ({exc})") from None
+
+
+PARSERS: Dict[str, Callable[[bytes], object]] = {
+    "catalog": parse_catalog,
+    "news": parse_news,
+    "local_news": parse_news,
+    "weather": parse_weather,
+    "jingles": parse_jingles,
+}
+
+
+@dataclass
+class StandInResponder:
+    """Serves the built-in content under ``PATHS``, optionally delayed per path (in seconds)."""
+
+    delays: Dict[str, float] = field(default_factory=dict)
+    bodies: Dict[str, bytes] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if not self.bodies:
+            self.bodies = {
+                PATHS["catalog"]: serialization.dumps({"songs": [_song_row(song) for song in SONG_LIBRARY]}),
+                PATHS["news"]: serialization.dumps({"items": [_news_row(item) for item in GLOBAL_NEWS]}),
+                PATHS["local_news"]: serialization.dumps({"items": [_news_row(item) for item in LOCAL_NEWS]}),
+                PATHS["weather"]: serialization.dumps({"forecasts": WEATHER_TEMPLATES}),
+                PATHS["jingles"]: serialization.dumps({"jingles": [_jingle_row(jingle) for jingle in JINGLE_LIBRARY]}),
+            }
+
+    async def respond(self, method: str, target: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        path = urlsplit(target).path
+        body = self.bodies.get(path)
+        if method not in ("GET", "HEAD") or body is None:
+            return 404, {"Content-Type": "application/json; charset=utf-8"}, b'{"error":"not found"}'
+        delay = self.delays.get(path, 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return 200, {"Content-Type": "application/json; charset=utf-8"}, body
+
+
+def _song_row(song: Song) -> dict:
+    return {
+        "title": song.title,
+        "artist": song.artist,
+        "duration": int(song.duration.total_seconds()),
+        "energy": song.energy,
+        "tags": song.tags,
+        "platform": song.platform,
+        "source_id": song.source_id,
+    }
+
+
+def _news_row(item: NewsItem) -> dict:
+    return {"headline": item.headline, "summary": item.summary, "category": item.category, "relevance": item.relevance}
+
+
+def _jingle_row(jingle: Jingle) -> dict:
+    return {"name": jingle.name, "slogan": jingle.slogan, "duration": jingle.duration.total_seconds()}
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="radio_gpt content",
+        description="Startet lokale Stand-in-Dienste für Katalog, Nachrichten, Wetter und Jingles (für --providers).",
+    )
+    parser.add_argument("--bind", type=str, default="127.0.0.1", help="Adresse, auf der gelauscht wird")
+    parser.add_argument("--port", type=int, default=8090, help="TCP-Port (Standard: 8090)")
+    parser.add_argument(
+        "--delay",
+        action="append",
+        default=[],
+        metavar="PFAD=SEK",
+        help="Antworten eines Pfads verzögern, z. B. /weather=3 (mehrfach möglich)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    delays: Dict[str, float] = {}
+    for entry in args.delay:
+        path, _, seconds = entry.partition("=")
+        try:
+            delays[path] = float(seconds)
+        except ValueError:
+            raise SystemExit(f"ungültige Verzögerung {entry!r} (erwartet PFAD=SEK)")
+    server = TimelineServer(StandInResponder(delays=delays))
+
+    async def run() -> None:
+        listener = await server.start(args.bind, args.port)
+        print(f"Stand-in-Dienste unter http://{args.bind}:{args.port} ({', '.join(PATHS.values())})", file=sys.stderr)
+        async with listener:
+            await listener.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import random
+from array import array
+from dataclasses import dataclass
+from heapq import heapify, heappop, heappush
+from typing import TYPE_CHECKING, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from .catalog import SongCatalog, normalize_tag
+from .state import pack_array, unpack_array
+
+if TYPE_CHECKING:
+    from .playlist import Song
+
+NEVER = float("-inf")
+
+
+@dataclass(frozen=True)
+class RotationRules:
+    """Separation rules for the rotation scheduler, in seconds."""
+
+    song_repeat: float = 3 * 60 * 60
+    artist_separation: float = 45 * 60
+    tag_separation: float = 0.0
+    # How many artists may be skipped for a pick before the rules are relaxed.
+    max_deferrals: int = 64
+
+
+class RotationScheduler:
+    """Least-recently-played rotation with song, artist and tag separation.
+
+    Every artist has a heap of its songs keyed by last-played time, and the
+    artists themselves sit in a heap keyed by when they were last on air.
+    A pick pops artists from that heap until one satisfies the rules, so it
+    costs O(log n) heap operations plus the (bounded) skipped artists.
+    Outdated heap entries are dropped lazily when they surface.
+    """
+
+    def __init__(self, catalog: SongCatalog, rules: RotationRules, rng: random.Random) -> None:
+        self.catalog = catalog
+        self.rules = rules
+        self.random = rng
+        count = len(catalog)
+        order = list(range(count))
+        rng.shuffle(order)
+        self._rank = array("I", [0]) * count
+        for position, song_id in enumerate(order):
+            self._rank[song_id] = position
+
+        artist_ids: Dict[Hashable, int] = {}
+        self._artist_of: List[int] = [0] * count
+        for song_id, key in enumerate(catalog.artist_keys()):
+            artist = artist_ids.get(key)
+            if artist is None:
+                artist = artist_ids[key] = len(artist_ids)
+            self._artist_of[song_id] = artist
+        self._artists = len(artist_ids)
+        self._reset()
+
+    def _reset(self) -> None:
+        count = len(self._rank)
+        self._song_heaps: List[List[Tuple[float, int, int]]] = [[] for _ in range(self._artists)]
+        for song_id, artist in enumerate(self._artist_of):
+            self._song_heaps[artist].append((NEVER, self._rank[song_id], song_id))
+        for heap in self._song_heaps:
+            heapify(heap)
+
+        self._last_played: List[float] = [NEVER] * count
+        self._artist_last: List[float] = [NEVER] * len(self._song_heaps)
+        self._tag_last: Dict[str, float] = {}
+        self._artist_heap = [(NEVER, heap[0][1], artist) for artist, heap in enumerate(self._song_heaps)]
+        heapify(self._artist_heap)
+        self._counter = count
+
+    def state(self, *, include_order: bool = False) -> dict:
+        """Last play of every song that has aired, plus tag times.
+
+        The shuffled tie-break order is derived from the seed and only
+        included on request (for unseeded planners).
+        """
+
+        plays: Dict[int, Tuple[int, float]] = {}
+        for heap in self._song_heaps:
+            for played, sequence, song_id in heap:
+                if played != NEVER and played == self._last_played[song_id]:
+                    if sequence > plays.get(song_id, (-1, NEVER))[0]:
+                        plays[song_id] = (sequence, played)
+        booked = sorted((sequence, song_id, played) for song_id, (sequence, played) in plays.items())
+        state = {
+            "counter": self._counter,
+            "songs": pack_array(array("I", [song_id for _, song_id, _ in booked])),
+            "times": pack_array(array("d", [played for _, _, played in booked])),
+            "sequence": pack_array(array("Q", [sequence for sequence, _, _ in booked])),
+            "tags": self._tag_last,
+        }
+        if include_order:
+            state["rank"] = pack_array(self._rank)
+        return state
+
+    def restore(self, state: dict) -> None:
+        if "rank" in state:
+            rank = unpack_array(state["rank"])
+            if len(rank) != len(self._rank):
+                raise ValueError("rotation state does not match the catalog size")
+            self._rank = rank
+        self._reset()
+        songs, times, sequence = (unpack_array(state[name]) for name in ("songs", "times", "sequence"))
+        for song_id, played, counter in zip(songs, times, sequence):
+            artist = self._artist_of[song_id]
+            self._last_played[song_id] = played
+            heappush(self._song_heaps[artist], (played, counter, song_id))
+            self._artist_last[artist] = played
+            heappush(self._artist_heap, (played, counter, artist))
+        self._tag_last = dict(state["tags"])
+        self._counter = state["counter"]
+
+    def last_played(self, song_id: int) -> Optional[float]:
+        played = self._last_played[song_id]
+        return None if played == NEVER else played
+
+    def allows(self, song_id: int, now: float) -> bool:
+        """Whether ``song_id`` could air at ``now`` without breaking a rule."""
+
+        if self._artist_last[self._artist_of[song_id]] + self.rules.artist_separation > now:
+            return False
+        return self._allowed(song_id, now)
+
+    def next(self, now: float) -> Song:
+        """Picks the least recently played song that satisfies the rules at ``now``."""
+
+        rules = self.rules
+        skipped: List[Tuple[float, int, int]] = []
+        chosen: Optional[int] = None
+        fallback: Optional[int] = None
+        while len(skipped) < rules.max_deferrals and self._artist_heap:
+            entry = heappop(self._artist_heap)
+            played, _, artist = entry
+            if played != self._artist_last[artist]:
+                continue  # superseded by a newer entry
+            song_id = self._top_song(artist)
+            if fallback is None:
+                fallback = song_id
+            if played + rules.artist_separation > now:
+                # Artists come out of the heap oldest first, so no later one qualifies either.
+                skipped.append(entry)
+                break
+            if self._allowed(song_id, now):
+                chosen = song_id
+                break
+            skipped.append(entry)
+        for entry in skipped:
+            heappush(self._artist_heap, entry)
+        if chosen is None:
+            if fallback is None:
+                raise LookupError("rotation catalog is empty")
+            chosen = fallback
+        self.record_play(chosen, now)
+        return self.catalog[chosen]
+
+    def pick_from(self, candidates: Sequence[int], now: float, *, attempts: int = 16) -> Song:
+        """Random pick among ``candidates`` that respects the rules where possible."""
+
+        if not candidates:
+            return self.next(now)
+        best = None
+        for _ in range(attempts):
+            song_id = self.random.choice(candidates)
+            if self.allows(song_id, now):
+                best = song_id
+                break
+            if best is None or self._last_played[song_id] < self._last_played[best]:
+                best = song_id
+        self.record_play(best, now)
+        return self.catalog[best]
+
+    def record_play(self, song_id: int, now: float) -> None:
+        self._counter += 1
+        artist = self._artist_of[song_id]
+        self._last_played[song_id] = now
+        heappush(self._song_heaps[artist], (now, self._counter, song_id))
+        self._artist_last[artist] = now
+        heappush(self._artist_heap, (now, self._counter, artist))
+        for tag in self.catalog[song_id].tags:
+            self._tag_last[normalize_tag(tag)] = now
+
+    def _top_song(self, artist: int) -> int:
+        heap = self._song_heaps[artist]
+        while heap[0][0] != self._last_played[heap[0][2]]:
+            heappop(heap)
+        return heap[0][2]
+
+    def _allowed(self, song_id: int, now: float) -> bool:
+        if self._last_played[song_id] + self.rules.song_repeat > now:
+            return False
+        if self.rules.tag_separation > 0:
+            for tag in self.catalog[song_id].tags:
+                if self._tag_last.get(normalize_tag(tag), NEVER) + self.rules.tag_separation > now:
+                    return False
+        return True
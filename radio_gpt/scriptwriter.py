@@ -1,80 +1,83 @@
 from __future__ import annotations
 
 import random
+from functools import lru_cache
 from typing import Iterable, List, Optional
 
 from .news import NewsItem
 from .playlist import Song
+from .state import pack_random, unpack_random
+from .templates import PhraseBook, Template, default_phrasebook
 
 
 class ScriptWriter:
     """Creates natural-sounding moderation lines and text blocks."""
 
-    def __init__(self, *, station: str, host: str, seed: Optional[int] = None) -> None:
+    def __init__(
+        self,
+        *,
+        station: str,
+        host: str,
+        seed: Optional[int] = None,
+        phrases: Optional[PhraseBook] = None,
+        cache_size: int = 4096,
+    ) -> None:
         self.station = station
         self.host = host
         self.random = random.Random(seed)
+        self.phrases = phrases or default_phrasebook()
+        # Rendered song lines memoized per (template, artist, title, extras).
+        self._render_song_line = lru_cache(maxsize=cache_size)(self._render_song_uncached)
 
     def build_intro(self) -> str:
-        greetings = [
-            "Guten Abend und willkommen zu einer neuen Ausgabe RadioGPT!",
-            "Schön, dass ihr eingeschaltet habt — hier ist RadioGPT!",
-            "Hallo zusammen, hier ist RadioGPT mit frischen Vibes für euren Tag!",
-        ]
-        promise = self.random.choice(
-            [
-                "Wir liefern euch die besten neuen Tracks, dazu schnelle News und lokale Tipps.",
-                "Euch erwartet eine Stunde voller Energie, entspannter Stimmen und smarter Stories.",
-                "Wir bringen euch durch die Stunde mit neuen Releases, Updates und guten Geschichten.",
-            ]
-        )
-        return f"{self.random.choice(greetings)} Ich bin {self.host}. {promise}"
+        promise = self._render(self._pick("intro_promise"))
+        greeting = self._render(self._pick("intro_greeting"))
+        return self._render(self._pick("intro"), greeting=greeting, promise=promise)
 
     def build_music_intro(self, song: Song) -> str:
-        hooks = [
-            f"Gleich hört ihr {song.artist} mit '{song.title}', perfekt für euren Moment gerade.",
-            f"{song.title} von {song.artist} passt großartig in die Stimmung — viel Spaß!",
-            f"Noch ein Highlight in unserer Rotation: {song.artist} und '{song.title}'.",
-        ]
-        fact = self.random.choice(
-            [
-                "Die Band hat die Nummer live in einer einzigen Nacht aufgenommen.",
-                "Der Track trendet gerade auf mehreren Indie-Playlists.",
-                "Das Stück wurde komplett analog produziert.",
-            ]
-        )
-        return f"{self.random.choice(hooks)} {fact}"
+        fact = self._render_song(self._pick("music_intro_fact"), song)
+        hook = self._render_song(self._pick("music_intro_hook"), song)
+        return self._render(self._pick("music_intro"), hook=hook, fact=fact)
 
     def build_song_backannounce(self, song: Song) -> str:
-        closer = self.random.choice(
-            [
-                "Ihr habt es bei uns zuerst gehört.",
-                "Perfekt, um weiter in den Abend zu starten.",
-                "So klingt der Soundtrack zu eurem Wochenende.",
-            ]
-        )
-        return f"{song.artist} mit '{song.title}'. {closer}"
+        closer = self._render_song(self._pick("backannounce_closer"), song)
+        return self._render_song(self._pick("backannounce"), song, closer=closer)
 
     def build_news_bulletin(self, news: Iterable[NewsItem]) -> str:
-        lines: List[str] = ["Kurz und knackig — hier sind die aktuellen Themen:"]
+        lines: List[str] = [self._render(self._pick("news_header"))]
+        item_template = self._pick("news_item")
         for item in news:
-            lines.append(f"• {item.headline}: {item.summary}")
-        lines.append("Mehr Updates jederzeit auf radiogpt.fm.")
+            lines.append(self._render(item_template, headline=item.headline, summary=item.summary))
+        lines.append(self._render(self._pick("news_footer")))
         return " ".join(lines)
 
     def build_outro(self) -> str:
-        thanks = self.random.choice(
-            [
-                "Danke fürs Einschalten!",
-                "Das war's für diese Stunde — schön, dass ihr dabei wart.",
-                "Wir hören uns in der nächsten Stunde wieder.",
-            ]
-        )
-        cta = self.random.choice(
-            [
-                "Checkt die Playlist in der App, falls ihr etwas verpasst habt.",
-                "Folgt uns auf Social für Bonusinhalte hinter den Kulissen.",
-                "Schickt uns eure Musikwünsche per Sprachmessage — wir hören rein.",
-            ]
-        )
-        return f"{thanks} {cta}"
+        thanks = self._render(self._pick("outro_thanks"))
+        cta = self._render(self._pick("outro_cta"))
+        return self._render(self._pick("outro"), thanks=thanks, cta=cta)
+
+    def state(self) -> dict:
+        return {"random": pack_random(self.random)}
+
+    def restore(self, state: dict) -> None:
+        unpack_random(self.random, state["random"])
+
+    def _pick(self, bank: str) -> Template:
+        # Single-entry banks (layouts) are used as-is and do not advance the RNG.
+        templates = self.phrases.bank(bank)
+        if len(templates) == 1:
+            return templates[0]
+        return self.random.choice(templates)
+
+    def _render(self, template: Template, **values: str) -> str:
+        if not template.fields:
+            return template.text
+        return template.render({"station": self.station, "host": self.host, **values})
+
+    def _render_song(self, template: Template, song: Song, **extra: str) -> str:
+        if not template.fields:
+            return template.text
+        return self._render_song_line(template, song.artist, song.title, tuple(extra.items()))
+
+    def _render_song_uncached(self, template: Template, artist: str, title: str, extra: tuple) -> str:
+        return self._render(template, artist=artist, title=title, **dict(extra))
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:  # optional, noticeably faster encoder
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+if TYPE_CHECKING:
+    from .generator import RadioShow
+    from .prefetch import PrefetchPolicy
+    from .store import SegmentStore
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+_encode_compact = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def parse_time(value: str) -> datetime:
+    """ISO-8601 time; without an offset it is taken as UTC."""
+
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def dumps(value: object) -> bytes:
+    """Compact UTF-8 JSON with the fastest available backend."""
+
+    if orjson is not None:
+        return orjson.dumps(value)
+    return _encode_compact(value).encode("utf-8")
+
+
+def _segment_row(store: SegmentStore, index: int, start: datetime) -> dict:
+    return {
+        "kind": store.kind(index),
+        "title": store.title(index),
+        "description": store.description(index),
+        "start": start.isoformat(),
+        "duration_seconds": store.duration(index),
+        "payload": store.payload(index) or {},
+    }
+
+
+def _timeline_row(store: SegmentStore, index: int, start: datetime) -> dict:
+    return {
+        "start_utc": start.isoformat(),
+        "type": store.kind(index).upper(),
+        "payload": store.payload(index) or {},
+        "duration_seconds": store.duration(index),
+    }
+
+
+ROW_FORMATS: Dict[str, Callable[[SegmentStore, int, datetime], dict]] = {
+    "segment": _segment_row,
+    "timeline": _timeline_row,
+}
+
+
+def iter_rows(show: RadioShow, *, timeline: bool = False) -> Iterator[bytes]:
+    """Encoded segments (or timeline items), reusing cached bytes where still valid."""
+
+    name = "timeline" if timeline else "segment"
+    build = ROW_FORMATS[name]
+    store = show.store
+    cache = store.encoding_cache(name, show.start)
+    offsets = store.offsets()
+    for index in range(len(store)):
+        offset = offsets[index]
+        entry = cache[index]
+        if entry is None or entry[0] != offset:
+            entry = (offset, dumps(build(store, index, show.start + timedelta(seconds=offset))))
+            cache[index] = entry
+        yield entry[1]
+
+
+def encode_rows(show: RadioShow, *, timeline: bool = False) -> List[bytes]:
+    return list(iter_rows(show, timeline=timeline))
+
+
+def show_json(show: RadioShow, *, timeline: bool = False, prefetch: Optional[PrefetchPolicy] = None) -> bytes:
+    """Compact JSON document equivalent to ``as_dict()``/``as_timeline()``."""
+
+    if timeline:
+        header = {
+            "station": show.station,
+            "host": show.host,
+            "server_time": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+        }
+        if prefetch is not None:
+            header["prefetch"] = show.prefetch_manifest(prefetch).as_dict()
+        key = b',"items":['
+    else:
+        header = {
+            "station": show.station,
+            "host": show.host,
+            "start": show.start.isoformat(),
+            "duration_seconds": int(show.duration.total_seconds()),
+        }
+        key = b',"segments":['
+    return b"".join((dumps(header)[:-1], key, b",".join(iter_rows(show, timeline=timeline)), b"]}"))
+
+
+def refresh_server_time(body: bytes) -> bytes:
+    """A timeline from ``show_json`` with ``server_time`` set to now (for cached timelines)."""
+
+    marker = b'"server_time":"'
+    first = body.index(marker) + len(marker)
+    last = body.index(b'"', first)
+    stamp = datetime.now(timezone.utc).replace(microsecond=0).isoformat().encode("ascii")
+    return body[:first] + stamp + body[last:]
+
+
+def delta_plan(
+    store: SegmentStore, since: int, epoch: Optional[str]
+) -> Optional[Tuple[List[int], List[int], List[int]]]:
+    """``store.changes_since(since)``, or ``None`` when the client needs a full snapshot.
+
+    That is the case when ``epoch`` is not the store's (the revision belongs
+    to another show) or when a full snapshot is smaller.
+    """
+
+    if epoch != store.epoch:
+        return None
+    changes = store.changes_since(since)
+    if changes is None or 2 * (len(changes[0]) + len(changes[1])) > len(store):
+        return None
+    return changes
+
+
+def delta_json(show: RadioShow, since: int, epoch: Optional[str] = None) -> bytes:
+    """Timeline delta document (see ``RadioShow.timeline_delta``)."""
+
+    store = show.store
+    rows = encode_rows(show, timeline=True)
+
+    def items(indices: Iterable[int]) -> bytes:
+        # Cached rows start with "{"; splice the id in front of their fields.
+        return b",".join(b'{"id":%d,%s' % (store.key(index), rows[index][1:]) for index in indices)
+
+    header = dumps(
+        {"station": show.station, "host": show.host, "epoch": store.epoch, "revision": store.revision, "since": since}
+    )[:-1]
+    delta = delta_plan(store, since, epoch)
+    if delta is None:
+        return b"".join((header, b',"full":true,"items":[', items(range(len(store))), b"]}"))
+    added, changed, removed = delta
+    return b"".join(
+        (
+            header,
+            b',"full":false,"added":[',
+            items(added),
+            b'],"changed":[',
+            items(changed),
+            b'],"removed":',
+            dumps(removed),
+            b"}",
+        )
+    )
+
+
+def iter_ndjson(show: RadioShow, *, timeline: bool = False) -> Iterator[bytes]:
+    for row in iter_rows(show, timeline=timeline):
+        yield row + b"\n"
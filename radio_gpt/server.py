@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import inspect
+import json
+import sys
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from . import serialization
+from .generator import RadioShow, ShowGenerator
+from .templates import load_phrasebook
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+REASONS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+}
+
+
+class _Window:
+    """Pre-encoded response for one ``[first, last)`` range of timeline items."""
+
+    __slots__ = ("etag", "head", "gzip_head", "compressor", "second", "body", "gzip_body")
+
+    def __init__(self, etag: str, head: bytes) -> None:
+        self.etag = etag
+        # Everything up to the server_time value; only that and the closing brace change per request.
+        self.head = head
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        self.gzip_head = self.compressor.compress(head) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        self.second = -1
+        self.body = b""
+        self.gzip_body = b""
+
+    def render(self, second: int, server_time: bytes) -> None:
+        tail = server_time + b"}"
+        compressor = self.compressor.copy()
+        self.second = second
+        self.body = self.head + tail
+        self.gzip_body = self.gzip_head + compressor.compress(tail) + compressor.flush()
+
+
+class TimelineResponder:
+    """Serves windows of a show's timeline from pre-encoded JSON chunks.
+
+    Each timeline item is encoded once per show revision. For every
+    requested window the static part of the response is encoded and
+    gzip-compressed once; ``server_time`` is the last key, so per request
+    only that tail is appended to a copy of the saved compressor (at most
+    once per second). Edits to the show re-encode the items and change
+    the ETag version.
+    """
+
+    def __init__(self, show: RadioShow, *, max_windows: int = 256) -> None:
+        self.show = show
+        self._header = serialization.dumps({"station": show.station, "host": show.host})
+        self._prefix = self._header[:-1] + b',"items":['
+        self._items: List[bytes] = []
+        self._version = ""
+        self._revision = -1
+        self._windows: "OrderedDict[Tuple[int, int], _Window]" = OrderedDict()
+        self._max_windows = max_windows
+        self._clock_second = -1
+        self._clock_bytes = b""
+        self._sync()
+
+    def _sync(self) -> None:
+        """Re-encodes the items (cached rows stay) once the show has been edited."""
+
+        if self._revision == self.show.revision:
+            return
+        self._items = serialization.encode_rows(self.show, timeline=True)
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(self._header)
+        for item in self._items:
+            digest.update(item)
+        self._version = digest.hexdigest()
+        self._windows.clear()
+        self._revision = self.show.revision
+
+    def window(self, first: int, last: int) -> _Window:
+        self._sync()
+        key = (first, last)
+        window = self._windows.get(key)
+        if window is None:
+            head = self._prefix + b",".join(self._items[first:last]) + b'],"server_time":'
+            window = _Window(f'W/"{self._version}-{first}-{last}"', head)
+            self._windows[key] = window
+            if len(self._windows) > self._max_windows:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(key)
+        return window
+
+    def respond(self, method: str, target: str, headers: Dict[str, str]) -> Response:
+        if method not in ("GET", "HEAD"):
+            return self._error(405, "method not allowed")
+        url = urlsplit(target)
+        if url.path not in ("/timeline", "/timeline/"):
+            return self._error(404, "not found")
+
+        query = parse_qs(url.query)
+        if "since" in query:
+            return self._delta(query["since"][0], query.get("epoch", [None])[0], headers)
+        try:
+            first, last = self._range(query.get("from", [None])[0], query.get("to", [None])[0])
+        except ValueError as exc:
+            return self._error(400, str(exc))
+
+        window = self.window(first, last)
+        response_headers = {"ETag": window.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if_none_match = _etags(headers.get("if-none-match", ""))
+        if window.etag in if_none_match or "*" in if_none_match:
+            return 304, response_headers, b""
+
+        second = int(time.time())
+        if window.second != second:
+            window.render(second, self._server_time(second))
+        response_headers["Content-Type"] = "application/json; charset=utf-8"
+        if "gzip" in headers.get("accept-encoding", ""):
+            response_headers["Content-Encoding"] = "gzip"
+            body = window.gzip_body
+        else:
+            body = window.body
+        return 200, response_headers, body
+
+    def _delta(self, since: str, epoch: Optional[str], headers: Dict[str, str]) -> Response:
+        try:
+            revision = int(since)
+        except ValueError:
+            return self._error(400, "'since' must be a revision number")
+        body = self.show.delta_json(revision, epoch)
+        response_headers = {"Content-Type": "application/json; charset=utf-8", "Cache-Control": "no-cache"}
+        if "gzip" in headers.get("accept-encoding", ""):
+            response_headers["Content-Encoding"] = "gzip"
+            body = zlib.compress(body, 6, wbits=31)
+        return 200, response_headers, body
+
+    def _range(self, start: Optional[str], end: Optional[str]) -> Tuple[int, int]:
+        count = len(self.show.store)
+        if start is None and end is None:
+            return 0, count
+        t0 = serialization.parse_time(start) if start else self.show.start
+        t1 = serialization.parse_time(end) if end else self.show.start + self.show.duration
+        if t1 < t0:
+            raise ValueError("'to' must not be before 'from'")
+        indices = self.show.window_indices(t0, t1)
+        return indices.start, indices.stop
+
+    def _server_time(self, second: int) -> bytes:
+        if second != self._clock_second:
+            stamp = datetime.fromtimestamp(second, timezone.utc).isoformat()
+            self._clock_second = second
+            self._clock_bytes = f'"{stamp}"'.encode("ascii")
+        return self._clock_bytes
+
+    @staticmethod
+    def _error(status: int, message: str) -> Response:
+        body = json.dumps({"error": message}).encode("utf-8")
+        return status, {"Content-Type": "application/json; charset=utf-8"}, body
+
+
+class TimelineServer:
+    """Minimal HTTP/1.1 server (keep-alive, GET/HEAD) on top of asyncio streams.
+
+    ``responder.respond`` may also be a coroutine function.
+    """
+
+    def __init__(self, responder: TimelineResponder) -> None:
+        self.responder = responder
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers: Dict[str, str] = {}
+                malformed = False
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, colon, value = line.decode("latin-1").partition(":")
+                    malformed = malformed or not colon or not name.strip()
+                    headers[name.strip().lower()] = value.strip()
+                parts = request_line.decode("latin-1").split()
+                if malformed or len(parts) != 3 or not parts[2].startswith("HTTP/"):
+                    # The rest of the stream cannot be trusted; answer and hang up.
+                    await self._send(writer, "GET", TimelineResponder._error(400, "malformed request"), keep_alive=False)
+                    break
+                method, target, version = parts
+
+                response = self.responder.respond(method, target, headers)
+                if inspect.isawaitable(response):
+                    response = await response
+                keep_alive = (
+                    headers.get("connection", "").lower() != "close"
+                    if version == "HTTP/1.1"
+                    else headers.get("connection", "").lower() == "keep-alive"
+                )
+                await self._send(writer, method, response, keep_alive=keep_alive)
+                if not keep_alive:
+                    break
+        except ValueError:
+            # A request or header line longer than the stream limit.
+            with contextlib.suppress(ConnectionError):
+                await self._send(writer, "GET", TimelineResponder._error(400, "request too long"), keep_alive=False)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, method: str, response: Response, *, keep_alive: bool) -> None:
+        status, response_headers, body = response
+        head = [f"HTTP/1.1 {status} {REASONS[status]}", f"Content-Length: {len(body)}"]
+        head.extend(f"{name}: {value}" for name, value in response_headers.items())
+        if not keep_alive:
+            head.append("Connection: close")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        if method != "HEAD":
+            writer.write(body)
+        await writer.drain()
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="radio_gpt serve",
+        description="Liefert die Timeline einer generierten Sendung per HTTP aus.",
+    )
+    parser.add_argument("--bind", type=str, default="127.0.0.1", help="Adresse, auf der gelauscht wird")
+    parser.add_argument("--port", type=int, default=8080, help="TCP-Port (Standard: 8080)")
+    parser.add_argument("--duration", type=int, default=60, help="Länge der Sendung in Minuten (Standard: 60)")
+    parser.add_argument("--host", type=str, default="Alex", help="Name des Hosts")
+    parser.add_argument("--station", type=str, default="RadioGPT", help="Stationsname")
+    parser.add_argument("--seed", type=int, default=None, help="Optionaler Seed für reproduzierbare Abläufe")
+    parser.add_argument("--start", type=serialization.parse_time, default=None, help="Sendestart als ISO-8601-Zeitpunkt")
+    parser.add_argument("--templates", type=str, default=None, help="JSON-Datei mit Moderationsbausteinen")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    try:
+        phrases = load_phrasebook(args.templates) if args.templates else None
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f"Vorlagen aus {args.templates} können nicht geladen werden: {exc}")
+    generator = ShowGenerator(station=args.station, host=args.host, seed=args.seed, phrases=phrases)
+    show = generator.build_show(duration_minutes=args.duration, start=args.start)
+    server = TimelineServer(TimelineResponder(show))
+
+    async def run() -> None:
+        listener = await server.start(args.bind, args.port)
+        print(f"Timeline unter http://{args.bind}:{args.port}/timeline", file=sys.stderr)
+        async with listener:
+            await listener.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def _etags(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
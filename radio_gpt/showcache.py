@@ -0,0 +1,185 @@
+"""Cache of serialized shows for deterministic (seeded) generation.
+
+A fresh, seeded ``ShowGenerator`` always builds the same show for the same
+parameters, so its serialized output can be reused. ``show_key`` hashes
+those parameters together with fingerprints of the catalog, the phrase
+book and the news, weather and jingle tables; ``ShowCache`` keeps results in an in-process LRU and, optionally, on
+disk, both bounded in bytes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Callable, Optional, Sequence, Union
+
+from .catalog import SongCatalog
+from .diskstore import DiskStore
+from .jingles import JINGLE_LIBRARY, Jingle
+from .news import GLOBAL_NEWS, LOCAL_NEWS, WEATHER_TEMPLATES
+from .playlist import SONG_LIBRARY
+from .templates import PhraseBook, default_phrasebook
+
+# Bump whenever generator output changes for unchanged parameters.
+CACHE_VERSION = 1
+
+_BUILTIN_FINGERPRINT: Optional[str] = None
+_BUILTIN_CONTENT: Optional[str] = None
+
+
+def show_key(
+    *,
+    station: str,
+    host: str,
+    seed: int,
+    duration_minutes: int,
+    start: datetime,
+    output: str,
+    include_weather: bool = True,
+    include_local: bool = True,
+    catalog: Optional[SongCatalog] = None,
+    phrases: Optional[PhraseBook] = None,
+    weather: Optional[Sequence[str]] = None,
+    jingles: Optional[Sequence[Jingle]] = None,
+    **options: object,
+) -> str:
+    """Cache key of one show; ``options`` are further generator settings (their ``repr`` counts).
+
+    ``weather`` and ``jingles`` default to the built-in tables; they and the
+    built-in news are always part of the key.
+    """
+
+    parameters = {
+        "version": CACHE_VERSION,
+        "station": station,
+        "host": host,
+        "seed": seed,
+        "duration": duration_minutes,
+        "start": start.isoformat(),
+        "output": output,
+        "weather": include_weather,
+        "local": include_local,
+        "catalog": catalog.fingerprint() if catalog is not None else _builtin_fingerprint(),
+        "phrases": (phrases or default_phrasebook()).fingerprint(),
+        "content": _content_fingerprint(weather, jingles),
+        "options": {name: repr(value) for name, value in options.items() if value is not None},
+    }
+    encoded = json.dumps(parameters, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def _builtin_fingerprint() -> str:
+    global _BUILTIN_FINGERPRINT
+    if _BUILTIN_FINGERPRINT is None:
+        _BUILTIN_FINGERPRINT = SongCatalog(SONG_LIBRARY).fingerprint()
+    return _BUILTIN_FINGERPRINT
+
+
+def _content_fingerprint(weather: Optional[Sequence[str]], jingles: Optional[Sequence[Jingle]]) -> str:
+    global _BUILTIN_CONTENT
+    weather = WEATHER_TEMPLATES if weather is None else weather
+    jingles = JINGLE_LIBRARY if jingles is None else jingles
+    builtin = weather is WEATHER_TEMPLATES and jingles is JINGLE_LIBRARY
+    if builtin and _BUILTIN_CONTENT is not None:
+        return _BUILTIN_CONTENT
+    content = repr((GLOBAL_NEWS, LOCAL_NEWS, list(weather), list(jingles))).encode("utf-8")
+    fingerprint = hashlib.blake2b(content, digest_size=16).hexdigest()
+    if builtin:
+        _BUILTIN_CONTENT = fingerprint
+    return fingerprint
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "hit_rate": round(self.hit_rate, 4)}
+
+
+class ShowCache:
+    """Serialized shows by ``show_key``: an in-process LRU in front of an optional disk store.
+
+    Both tiers evict least recently used entries once their byte budget is
+    exceeded. Disk hits are promoted into memory. Safe to share between
+    threads.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, "os.PathLike[str]"]] = None,
+        *,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_bytes: int = 1024 * 1024 * 1024,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.disk = DiskStore(directory, max_bytes=disk_bytes, suffix=".json") if directory is not None else None
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._total = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return body
+        path = self.disk.get(key) if self.disk is not None else None
+        body = None
+        if path is not None:
+            try:
+                body = path.read_bytes()
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            if body is None:
+                self.stats.misses += 1
+                return None
+            self.stats.disk_hits += 1
+            self._remember(key, body)
+        return body
+
+    def put(self, key: str, body: bytes) -> None:
+        if self.disk is not None:
+            self.disk.put(key, body)
+        with self._lock:
+            self._remember(key, body)
+
+    def fetch(self, key: str, build: Callable[[], bytes]) -> bytes:
+        """Cached body for ``key``, calling ``build`` (and storing its result) on a miss."""
+
+        body = self.get(key)
+        if body is None:
+            body = build()
+            self.put(key, body)
+        return body
+
+    def _remember(self, key: str, body: bytes) -> None:
+        self._total += len(body) - len(self._entries.pop(key, b""))
+        self._entries[key] = body
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._total -= len(evicted)
+            self.stats.evictions += 1
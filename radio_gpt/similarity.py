@@ -0,0 +1,223 @@
+"""Song similarity for smooth transitions between consecutive tracks."""
+
+from __future__ import annotations
+
+import math
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from heapq import heappush, heapreplace
+from itertools import combinations
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from .catalog import SongCatalog
+
+
+@dataclass(frozen=True)
+class TransitionRules:
+    """Weights of the distance between two songs, and how the follow-up is picked."""
+
+    energy: float = 4.0
+    duration: float = 1.0
+    # A duration difference of this many seconds counts as 1 before weighting.
+    duration_scale: float = 120.0
+    # Per tag that only one of the two songs has.
+    tags: float = 0.5
+    platform: float = 0.25
+    # The next song is drawn at random from this many nearest allowed songs.
+    choices: int = 3
+    # Without rotation rules, songs among this many previous follow-ups are skipped.
+    recent: int = 50
+    # Upper bound on songs compared per query. Caps the cost for catalogs
+    # without a close match, but makes the search approximate; None is exact.
+    max_scan: Optional[int] = None
+
+
+class SimilarityIndex:
+    """Nearest-neighbour queries over song feature vectors.
+
+    A song's vector is its energy, its scaled duration, a multi-hot tag
+    encoding and a one-hot platform, each scaled by the square root of its
+    weight in ``TransitionRules`` (see ``vector``); the distance is the
+    squared Euclidean distance between vectors.
+
+    Songs with the same tags and platform form a group, and the columns are
+    stored group by group in energy order as flat arrays. Between two groups
+    the tag and platform part of the distance is fixed (one popcount), so a
+    query visits groups cheapest first, walks outward from the song's energy
+    inside each, and stops once the fixed part plus the energy gap alone
+    exceeds the k-th best distance found.
+    """
+
+    def __init__(self, catalog: SongCatalog, rules: Optional[TransitionRules] = None) -> None:
+        self.catalog = catalog
+        self.rules = rules or TransitionRules()
+        masks, platforms = catalog.feature_columns()
+        keys = sorted({(masks[song_id], platforms[song_id]) for song_id in range(len(catalog))})
+        group_of = {key: group for group, key in enumerate(keys)}
+        song_groups = array("I", (group_of[masks[song_id], platforms[song_id]] for song_id in range(len(catalog))))
+        # Stable sort: energy order within each group.
+        order = sorted(catalog.ids_min_energy(-math.inf), key=song_groups.__getitem__)
+        energies, durations = catalog.energies, catalog.durations
+        self._order = array("I", order)
+        self._position = array("I", [0]) * len(order)
+        for position, song_id in enumerate(order):
+            self._position[song_id] = position
+        self._energies = array("d", (energies[song_id] for song_id in order))
+        self._durations = array("d", (durations[song_id] / self.rules.duration_scale for song_id in order))
+        self._group = array("I", (song_groups[song_id] for song_id in order))
+        self._groups = group_of
+        self._masks = [mask for mask, _ in keys]
+        self._platforms = array("H", (platform for _, platform in keys))
+        self._bounds = array("I", [0]) * (len(keys) + 1)
+        for group in self._group:
+            self._bounds[group + 1] += 1
+        for group in range(len(keys)):
+            self._bounds[group + 1] += self._bounds[group]
+        self._tag_bits = max(self._masks, default=0).bit_length()
+        self._platform_count = max(self._platforms, default=-1) + 1
+        self._table: Optional[array] = None
+        self._table_k = 0
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def vector(self, song_id: int) -> List[float]:
+        """Weighted feature vector of ``song_id``; squared distances between vectors equal ``distance``."""
+
+        rules = self.rules
+        position = self._position[song_id]
+        group = self._group[position]
+        tag_weight = math.sqrt(rules.tags)
+        platform_weight = math.sqrt(rules.platform / 2)
+        mask = self._masks[group]
+        return [
+            math.sqrt(rules.energy) * self._energies[position],
+            math.sqrt(rules.duration) * self._durations[position],
+            *(tag_weight * (mask >> bit & 1) for bit in range(self._tag_bits)),
+            *(platform_weight * (self._platforms[group] == code) for code in range(self._platform_count)),
+        ]
+
+    def distance(self, first: int, second: int) -> float:
+        first, second = self._position[first], self._position[second]
+        return self._fixed(self._group[first], self._group[second]) + self._variable(first, second)
+
+    def nearest(self, song_id: int, k: int, *, allowed: Optional[Callable[[int], bool]] = None) -> List[int]:
+        """Up to ``k`` songs closest to ``song_id`` (nearest first), never ``song_id`` itself.
+
+        Songs ``allowed`` rejects are skipped. A precomputed table (see
+        ``precompute``) answers the query if it holds enough allowed songs.
+        The result is exact unless ``TransitionRules.max_scan`` is set: then
+        only that many songs are compared, nearest groups and energies first.
+        """
+
+        if self._table is not None and k <= self._table_k:
+            start = song_id * self._table_k
+            found = [
+                neighbour
+                for neighbour in self._table[start : start + self._table_k]
+                if neighbour != song_id and (allowed is None or allowed(neighbour))
+            ]
+            if len(found) >= k:
+                return found[:k]
+        return [self._order[position] for _, position in self._search(self._position[song_id], k, allowed)]
+
+    def precompute(self, k: int) -> None:
+        """Stores the ``k`` nearest songs of every song; queries for up to ``k`` songs then read the table.
+
+        Costs one search per song, so it is meant for catalogs that are
+        built once and queried many times.
+        """
+
+        table = array("I", [0]) * (len(self._order) * k)
+        for song_id in range(len(self._order)):
+            neighbours = [self._order[position] for _, position in self._search(self._position[song_id], k, None)]
+            # Catalogs with fewer than k + 1 songs repeat the song itself; ``nearest`` drops it.
+            neighbours += [song_id] * (k - len(neighbours))
+            table[song_id * k : (song_id + 1) * k] = array("I", neighbours)
+        self._table = table
+        self._table_k = k
+
+    def _fixed(self, first: int, second: int) -> float:
+        """Tag and platform part of the distance between songs of groups ``first`` and ``second``."""
+
+        rules = self.rules
+        return rules.tags * (self._masks[first] ^ self._masks[second]).bit_count() + (
+            rules.platform if self._platforms[first] != self._platforms[second] else 0.0
+        )
+
+    def _nearby_groups(self, own: int) -> Iterator[Tuple[float, int]]:
+        """(fixed distance, group) of every group, cheapest first.
+
+        Groups at tag distance ``d`` are looked up by flipping ``d`` tag bits
+        of ``own``'s mask while that is cheaper than scanning all groups, so
+        a query that stops at the first levels never touches the others.
+        """
+
+        rules = self.rules
+        mask, platform = self._masks[own], self._platforms[own]
+        other_platforms = [code for code in range(self._platform_count) if code != platform]
+        levels = sorted(
+            (rules.tags * flips + (rules.platform if moved else 0.0), flips, moved)
+            for flips in range(self._tag_bits + 1)
+            for moved in ((False, True) if other_platforms else (False,))
+        )
+        for fixed, flips, moved in levels:
+            platforms = other_platforms if moved else [platform]
+            if math.comb(self._tag_bits, flips) * len(platforms) <= len(self._masks):
+                for bits in combinations(range(self._tag_bits), flips):
+                    flipped = mask
+                    for bit in bits:
+                        flipped ^= 1 << bit
+                    for code in platforms:
+                        group = self._groups.get((flipped, code))
+                        if group is not None:
+                            yield fixed, group
+            else:
+                for group, other in enumerate(self._masks):
+                    if (mask ^ other).bit_count() == flips and (self._platforms[group] != platform) == moved:
+                        yield fixed, group
+
+    def _variable(self, first: int, second: int) -> float:
+        energy = self._energies[first] - self._energies[second]
+        duration = self._durations[first] - self._durations[second]
+        return self.rules.energy * energy * energy + self.rules.duration * duration * duration
+
+    def _search(self, origin: int, k: int, allowed: Optional[Callable[[int], bool]]) -> List[Tuple[float, int]]:
+        if k <= 0:
+            return []
+        energies, durations, order, bounds = self._energies, self._durations, self._order, self._bounds
+        energy_weight, duration_weight = self.rules.energy, self.rules.duration
+        energy, duration = energies[origin], durations[origin]
+        # Max-heap (negated distances) of the k best (distance, position) pairs.
+        best: List[Tuple[float, int]] = []
+        budget = len(order) if self.rules.max_scan is None else self.rules.max_scan
+        for fixed, group in self._nearby_groups(self._group[origin]):
+            if budget <= 0 or (len(best) == k and fixed >= -best[0][0]):
+                break
+            low, high = bounds[group], bounds[group + 1]
+            right = bisect_left(energies, energy, low, high)
+            left = right - 1
+            while budget > 0 and (left >= low or right < high):
+                if right >= high or (left >= low and energy - energies[left] <= energies[right] - energy):
+                    position, left = left, left - 1
+                else:
+                    position, right = right, right + 1
+                if position == origin:
+                    continue
+                budget -= 1
+                gap = energies[position] - energy
+                bound = fixed + energy_weight * gap * gap
+                if len(best) == k and bound >= -best[0][0]:
+                    break  # every remaining song of the group is at least this far away
+                stretch = durations[position] - duration
+                distance = bound + duration_weight * stretch * stretch
+                if len(best) == k and distance >= -best[0][0]:
+                    continue
+                if allowed is not None and not allowed(order[position]):
+                    continue
+                if len(best) < k:
+                    heappush(best, (-distance, position))
+                else:
+                    heapreplace(best, (-distance, position))
+        return sorted((-negated, position) for negated, position in best)
@@ -0,0 +1,66 @@
+"""Versioned, JSON-safe snapshots of generator state.
+
+``ShowGenerator.snapshot()`` collects the state of its components into one
+document; ``ShowGenerator.restore()`` continues from it. The helpers here
+encode the bulky parts (RNG states, id arrays) as base64 so a snapshot
+stays small and its size depends on the catalog, not on time on air.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import os
+import random
+from array import array
+from typing import Optional, Union
+
+STATE_VERSION = 1
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+
+def pack_array(values: array) -> dict:
+    return {"type": values.typecode, "data": base64.b64encode(values.tobytes()).decode("ascii")}
+
+
+def unpack_array(packed: dict) -> array:
+    values = array(packed["type"])
+    values.frombytes(base64.b64decode(packed["data"]))
+    return values
+
+
+def pack_random(rng: random.Random) -> dict:
+    version, internal, gauss_next = rng.getstate()
+    return {"version": version, "state": pack_array(array("I", internal)), "gauss_next": gauss_next}
+
+
+def unpack_random(rng: random.Random, packed: dict) -> None:
+    rng.setstate((packed["version"], tuple(unpack_array(packed["state"])), packed["gauss_next"]))
+
+
+def check_version(snapshot: dict) -> None:
+    version = snapshot.get("version")
+    if version != STATE_VERSION:
+        raise ValueError(f"unsupported state version {version!r} (expected {STATE_VERSION})")
+
+
+def save_state(snapshot: dict, path: PathLike) -> None:
+    """Writes ``snapshot`` atomically, so a crash never leaves a torn file."""
+
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as handle:
+        json.dump(snapshot, handle, separators=(",", ":"))
+    os.replace(temporary, path)
+
+
+def load_state(path: PathLike) -> Optional[dict]:
+    """The snapshot stored at ``path``, or ``None`` if there is none yet."""
+
+    try:
+        with open(path, encoding="utf-8") as handle:
+            snapshot = json.load(handle)
+    except FileNotFoundError:
+        return None
+    check_version(snapshot)
+    return snapshot
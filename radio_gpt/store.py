@@ -0,0 +1,535 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from itertools import accumulate
+import secrets
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, NoReturn, Optional, Tuple, Union, overload
+
+if TYPE_CHECKING:
+    from .generator import ShowSegment
+
+
+class SegmentStore:
+    """Columnar storage for show segments with integer second offsets.
+
+    Durations live in a typed ``array``, kinds as small integer codes,
+    titles and descriptions are interned per store and payloads are kept
+    as (schema, values) pairs that are turned back into dicts on access.
+    Start offsets are the running sum of the durations. Edits in the
+    middle of the show do not rewrite later offsets: they record a lazy
+    delta ("everything from index i on moves by d seconds") that lookups
+    add on the fly. Once too many deltas pile up they are folded back
+    into the offset array in one pass.
+
+    Every edit bumps ``revision``. Segments carry a stable key (the
+    revision that created them) and edits other than appends are logged,
+    so ``changes_since`` can tell a client what changed after the revision
+    it last saw. Revisions start at 0 in every store, so each store also
+    gets a random ``epoch`` that tells clients whose revisions they hold.
+    """
+
+    _MAX_DELTAS = 64
+    _MAX_CHANGES = 4096
+
+    __slots__ = (
+        "_kinds",
+        "_durations",
+        "_leads",
+        "_titles",
+        "_descriptions",
+        "_payloads",
+        "_kind_table",
+        "_kind_codes",
+        "_schemas",
+        "_schema_codes",
+        "_strings",
+        "_offsets",
+        "_delta_index",
+        "_delta_value",
+        "_delta_prefix",
+        "_encoded",
+        "_encoded_start",
+        "_keys",
+        "_changes",
+        "_horizon",
+        "revision",
+        "epoch",
+    )
+
+    def __init__(self) -> None:
+        self._kinds = array("B")
+        self._durations = array("q")
+        # Gap before each segment; only allocated once a non-contiguous segment shows up.
+        self._leads: Optional[array] = None
+        self._titles: List[str] = []
+        self._descriptions: List[str] = []
+        self._payloads: List[Optional[Tuple[int, tuple]]] = []
+        self._kind_table: List[str] = []
+        self._kind_codes: Dict[str, int] = {}
+        self._schemas: List[Tuple[str, ...]] = []
+        self._schema_codes: Dict[Tuple[str, ...], int] = {}
+        self._strings: Dict[str, str] = {}
+        # Start offsets plus the end of the last segment, before pending deltas.
+        self._offsets = array("q", [0])
+        # Pending deltas, sorted by index, with running sums.
+        self._delta_index: List[int] = []
+        self._delta_value: List[int] = []
+        self._delta_prefix: List[int] = []
+        # Serialized rows per format as (start offset, bytes); see ``encoding_cache``.
+        self._encoded: Dict[str, List[Optional[Tuple[int, bytes]]]] = {}
+        self._encoded_start: Optional[datetime] = None
+        self.revision = 0
+        self.epoch = secrets.token_hex(8)
+        self._keys = array("Q")
+        # (revision, op, value): "a"/"c"/"r" with a key for inserted, changed
+        # and removed segments, "m" with the key of the first segment that moved.
+        self._changes: List[Tuple[int, str, int]] = []
+        # Oldest revision ``changes_since`` can still answer.
+        self._horizon = 0
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[ShowSegment], start: datetime) -> "SegmentStore":
+        store = cls()
+        end = 0
+        for segment in segments:
+            offset = int((segment.start - start).total_seconds())
+            duration = int(segment.duration.total_seconds())
+            store.append(
+                segment.kind,
+                segment.title,
+                segment.description,
+                duration,
+                segment.payload,
+                lead=offset - end,
+            )
+            end = offset + duration
+        return store
+
+    def __len__(self) -> int:
+        return len(self._durations)
+
+    def append(
+        self,
+        kind: str,
+        title: str,
+        description: str,
+        duration_seconds: int,
+        payload: Optional[dict] = None,
+        *,
+        lead: int = 0,
+    ) -> None:
+        self._fold()
+        self.revision += 1
+        self._keys.append(self.revision)
+        self._push(len(self._durations), kind, title, description, duration_seconds, payload, lead)
+        self._offsets[-1] += lead
+        self._offsets.append(self._offsets[-1] + duration_seconds)
+
+    def insert(
+        self,
+        index: int,
+        kind: str,
+        title: str,
+        description: str,
+        duration_seconds: int,
+        payload: Optional[dict] = None,
+        *,
+        lead: int = 0,
+    ) -> None:
+        start = (self.offset(index - 1) + self._durations[index - 1] if index else 0) + lead
+        self.revision += 1
+        self._keys.insert(index, self.revision)
+        self._log("a", self.revision)
+        if lead + duration_seconds:
+            self._moved(index + 1)
+        self._push(index, kind, title, description, duration_seconds, payload, lead)
+        self._renumber(index, 1)
+        self._offsets.insert(index, start - self._delta_before(index))
+        self._add_delta(index + 1, lead + duration_seconds)
+
+    def replace(
+        self,
+        index: int,
+        kind: str,
+        title: str,
+        description: str,
+        duration_seconds: int,
+        payload: Optional[dict] = None,
+    ) -> None:
+        self._check_index(index)
+        self.revision += 1
+        self._log("c", self._keys[index])
+        self._kinds[index] = self._kind_code(kind)
+        self._titles[index] = self._intern(title)
+        self._descriptions[index] = self._intern(description)
+        self._payloads[index] = self._pack(payload)
+        for cache in self._encoded.values():
+            cache[index] = None
+        change = duration_seconds - self._durations[index]
+        if change:
+            self._moved(index + 1)
+            self._durations[index] = duration_seconds
+            self._add_delta(index + 1, change)
+
+    def remove(self, index: int) -> None:
+        self._check_index(index)
+        self.revision += 1
+        self._log("r", self._keys[index])
+        duration = self._durations[index]
+        if self._leads is not None:
+            # Keep the removed segment's gap so later segments only move by its duration.
+            lead = self._leads.pop(index)
+            if index < len(self._leads):
+                self._leads[index] += lead
+            else:
+                duration += lead
+        del self._keys[index]
+        self._moved(index)
+        del self._kinds[index]
+        del self._durations[index]
+        del self._titles[index]
+        del self._descriptions[index]
+        del self._payloads[index]
+        for cache in self._encoded.values():
+            del cache[index]
+        del self._offsets[index]
+        self._renumber(index + 1, -1)
+        self._add_delta(index, -duration)
+
+    def shift(self, index: int, seconds: int) -> None:
+        """Moves segment ``index`` and everything after it by ``seconds``.
+
+        Raises ``ValueError`` if the segment would start before the end of
+        the previous one (or before the show start).
+        """
+
+        self._check_index(index)
+        if not seconds:
+            return
+        if seconds < 0 and (self._leads[index] if self._leads is not None else 0) + seconds < 0:
+            raise ValueError("shift would overlap the previous segment")
+        self.revision += 1
+        self._moved(index)
+        if self._leads is None:
+            self._leads = array("q", bytes(8 * len(self._durations)))
+        self._leads[index] += seconds
+        self._add_delta(index, seconds)
+
+    def key(self, index: int) -> int:
+        """Stable identity of segment ``index`` across edits."""
+
+        return self._keys[index]
+
+    def changes_since(self, revision: int) -> Optional[Tuple[List[int], List[int], List[int]]]:
+        """Indices of added and changed segments and keys of removed ones.
+
+        Segments whose start moved count as changed. Returns ``None`` if
+        ``revision`` is older than the change log (or not one of this
+        store's revisions), so the caller has to send everything.
+        """
+
+        if revision < self._horizon or revision > self.revision:
+            return None
+        inserted = set()
+        touched = set()
+        removed = set()
+        moved = set()
+        for _, op, value in self._changes[bisect_right(self._changes, (revision, "\uffff")) :]:
+            if op == "m":
+                moved.add(value)
+            elif op == "a":
+                inserted.add(value)
+            elif value <= revision:
+                (removed if op == "r" else touched).add(value)
+
+        keys = self._keys
+        # Appends always land at the end, so appended segments form a suffix.
+        first_new = len(keys)
+        while first_new and keys[first_new - 1] > revision:
+            first_new -= 1
+        added = list(range(first_new, len(keys)))
+        changed = []
+        first_moved = first_new
+        for key in inserted | touched | moved:
+            try:
+                index = keys.index(key, 0, first_new)
+            except ValueError:
+                # Removed again (its removal logged the next segment) or appended since.
+                continue
+            if key in moved:
+                first_moved = min(first_moved, index)
+            if key in inserted:
+                added.append(index)
+            elif key in touched:
+                changed.append(index)
+        changed.extend(index for index in range(first_moved, first_new) if keys[index] <= revision)
+        return sorted(added), sorted(set(changed)), sorted(removed)
+
+    def kind(self, index: int) -> str:
+        return self._kind_table[self._kinds[index]]
+
+    def title(self, index: int) -> str:
+        return self._titles[index]
+
+    def description(self, index: int) -> str:
+        return self._descriptions[index]
+
+    def duration(self, index: int) -> int:
+        return self._durations[index]
+
+    def offset(self, index: int) -> int:
+        """Start offset of segment ``index`` (``len(self)`` gives the end)."""
+
+        return self._offsets[index] + self._delta_before(index)
+
+    def payload(self, index: int) -> Optional[dict]:
+        packed = self._payloads[index]
+        if packed is None:
+            return None
+        schema, values = packed
+        return dict(zip(self._schemas[schema], values))
+
+    def offsets(self) -> array:
+        """Start offset of every segment plus the end offset of the last one."""
+
+        self._fold()
+        return self._offsets
+
+    def end_offset(self) -> int:
+        return self.offset(len(self._durations))
+
+    def index_at(self, offset: float) -> int:
+        """Index of the segment on air at ``offset`` seconds, or -1 in a gap."""
+
+        index = self._locate(offset)
+        if index < 0 or offset >= self.offset(index) + self._durations[index]:
+            return -1
+        return index
+
+    def index_after(self, offset: float) -> int:
+        """Index of the first segment starting strictly after ``offset``."""
+
+        return self._locate(offset) + 1
+
+    def index_range(self, start: float, end: float) -> range:
+        """Indices of the segments overlapping ``[start, end)``."""
+
+        first = self._locate(start)
+        if first < 0 or start >= self.offset(first) + self._durations[first]:
+            first += 1
+        if end <= start:
+            return range(first, first)
+        return range(first, max(first, self._locate(end, strict=True) + 1))
+
+    def encoding_cache(self, name: str, start: datetime) -> List[Optional[Tuple[int, bytes]]]:
+        """Per-row cache of encoded bytes for serialization format ``name``.
+
+        Rows are cleared when they are replaced; entries also remember the
+        start offset they were encoded with, so callers must treat an entry
+        whose offset differs from ``offset(index)`` as stale.
+        """
+
+        if start != self._encoded_start:
+            self._encoded.clear()
+            self._encoded_start = start
+        cache = self._encoded.get(name)
+        if cache is None:
+            cache = self._encoded[name] = [None] * len(self._durations)
+        return cache
+
+    def clear_encoding_cache(self) -> None:
+        self._encoded.clear()
+
+    def segment(self, index: int, start: datetime) -> ShowSegment:
+        from .generator import ShowSegment
+
+        return ShowSegment(
+            kind=self.kind(index),
+            title=self._titles[index],
+            description=self._descriptions[index],
+            start=start + timedelta(seconds=self.offset(index)),
+            duration=timedelta(seconds=self._durations[index]),
+            payload=self.payload(index),
+        )
+
+    def _push(
+        self,
+        index: int,
+        kind: str,
+        title: str,
+        description: str,
+        duration_seconds: int,
+        payload: Optional[dict],
+        lead: int,
+    ) -> None:
+        if lead and self._leads is None:
+            self._leads = array("q", bytes(8 * len(self._durations)))
+        if self._leads is not None:
+            self._leads.insert(index, lead)
+        self._kinds.insert(index, self._kind_code(kind))
+        self._durations.insert(index, duration_seconds)
+        self._titles.insert(index, self._intern(title))
+        self._descriptions.insert(index, self._intern(description))
+        self._payloads.insert(index, self._pack(payload))
+        for cache in self._encoded.values():
+            cache.insert(index, None)
+
+    def _locate(self, offset: float, *, strict: bool = False) -> int:
+        """Last index starting at (or, if ``strict``, before) ``offset``; -1 if none.
+
+        Pending deltas split the offset array into runs that share one
+        correction, so this is a bisect inside the matching run.
+        """
+
+        base = self._offsets
+        count = len(self._durations)
+        bounds = self._delta_index
+        search = bisect_left if strict else bisect_right
+        for run in range(len(bounds), -1, -1):
+            lo = bounds[run - 1] if run else 0
+            hi = min(bounds[run], count) if run < len(bounds) else count
+            if lo >= hi:
+                continue
+            correction = self._delta_prefix[run - 1] if run else 0
+            first = base[lo] + correction
+            if first < offset or (not strict and first == offset):
+                return search(base, offset - correction, lo, hi) - 1
+        return -1
+
+    def _delta_before(self, index: int) -> int:
+        position = bisect_right(self._delta_index, index)
+        return self._delta_prefix[position - 1] if position else 0
+
+    def _add_delta(self, index: int, value: int) -> None:
+        if not value:
+            return
+        position = bisect_left(self._delta_index, index)
+        if position < len(self._delta_index) and self._delta_index[position] == index:
+            self._delta_value[position] += value
+        else:
+            self._delta_index.insert(position, index)
+            self._delta_value.insert(position, value)
+        self._delta_prefix = list(accumulate(self._delta_value))
+        if len(self._delta_index) > self._MAX_DELTAS:
+            self._fold()
+
+    def _renumber(self, index: int, step: int) -> None:
+        """Moves pending deltas at or after ``index`` by ``step`` positions."""
+
+        indices = self._delta_index
+        position = bisect_left(indices, index)
+        for k in range(position, len(indices)):
+            indices[k] += step
+        if step < 0 and 0 < position < len(indices) and indices[position] == indices[position - 1]:
+            self._delta_value[position - 1] += self._delta_value.pop(position)
+            del indices[position]
+            self._delta_prefix = list(accumulate(self._delta_value))
+
+    def _fold(self) -> None:
+        """Recomputes the offsets from the first pending delta on and drops the deltas."""
+
+        if not self._delta_index:
+            return
+        stale = min(self._delta_index[0], len(self._durations))
+        offsets = self._offsets
+        del offsets[stale:]
+        end = offsets[stale - 1] + self._durations[stale - 1] if stale else 0
+        if self._leads is None:
+            offsets.extend(accumulate(self._durations[stale:], initial=end))
+        else:
+            leads = self._leads[stale:]
+            ends = accumulate(
+                (lead + duration for lead, duration in zip(leads, self._durations[stale:])),
+                initial=end,
+            )
+            offsets.extend(end + lead for end, lead in zip(ends, leads))
+            offsets.append(offsets[-1] + self._durations[-1] if len(offsets) > stale else end)
+        self._delta_index.clear()
+        self._delta_value.clear()
+        self._delta_prefix.clear()
+
+    def _moved(self, index: int) -> None:
+        # Everything from ``index`` on changed its start.
+        if index < len(self._keys):
+            self._log("m", self._keys[index])
+
+    def _log(self, op: str, value: int) -> None:
+        self._changes.append((self.revision, op, value))
+        if len(self._changes) > self._MAX_CHANGES:
+            drop = len(self._changes) // 2
+            self._horizon = self._changes[drop][0]
+            del self._changes[:drop]
+
+    def _check_index(self, index: int) -> None:
+        if not 0 <= index < len(self._durations):
+            raise IndexError("segment index out of range")
+
+    def _kind_code(self, kind: str) -> int:
+        code = self._kind_codes.get(kind)
+        if code is None:
+            code = len(self._kind_table)
+            self._kind_table.append(kind)
+            self._kind_codes[kind] = code
+        return code
+
+    def _intern(self, value: str) -> str:
+        return self._strings.setdefault(value, value)
+
+    def _pack(self, payload: Optional[dict]) -> Optional[Tuple[int, tuple]]:
+        if payload is None:
+            return None
+        keys = tuple(payload)
+        code = self._schema_codes.get(keys)
+        if code is None:
+            code = len(self._schemas)
+            self._schemas.append(keys)
+            self._schema_codes[keys] = code
+        return code, tuple(self._intern(v) if isinstance(v, str) else v for v in payload.values())
+
+
+class SegmentView(Sequence):
+    """Read-only ``ShowSegment`` sequence materialized from a ``SegmentStore``.
+
+    List mutators raise ``TypeError``; edit the show with
+    ``RadioShow.replace``/``insert``/``remove``/``shift`` instead.
+    """
+
+    __slots__ = ("_store", "_start")
+
+    def __init__(self, store: SegmentStore, start: datetime) -> None:
+        self._store = store
+        self._start = start
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    @overload
+    def __getitem__(self, index: int) -> ShowSegment: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[ShowSegment]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[ShowSegment, List[ShowSegment]]:
+        if isinstance(index, slice):
+            return [self._store.segment(i, self._start) for i in range(*index.indices(len(self._store)))]
+        if index < 0:
+            index += len(self._store)
+        if not 0 <= index < len(self._store):
+            raise IndexError("segment index out of range")
+        return self._store.segment(index, self._start)
+
+    def __iter__(self) -> Iterator[ShowSegment]:
+        for index in range(len(self._store)):
+            yield self._store.segment(index, self._start)
+
+    def __repr__(self) -> str:
+        return f"SegmentView({list(self)!r})"
+
+    def _read_only(self, *args: object, **kwargs: object) -> NoReturn:
+        raise TypeError("show segments are read-only; use RadioShow.replace/insert/remove/shift")
+
+    __setitem__ = __delitem__ = __iadd__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
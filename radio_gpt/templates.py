@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from string import Formatter
+from typing import Callable, Dict, Iterable, Mapping, Optional, Tuple, Union
+
+DEFAULT_BANKS: Dict[str, list] = {
+    "intro": ["{greeting} Ich bin {host}. {promise}"],
+    "intro_greeting": [
+        "Guten Abend und willkommen zu einer neuen Ausgabe RadioGPT!",
+        "Schön, dass ihr eingeschaltet habt — hier ist RadioGPT!",
+        "Hallo zusammen, hier ist RadioGPT mit frischen Vibes für euren Tag!",
+    ],
+    "intro_promise": [
+        "Wir liefern euch die besten neuen Tracks, dazu schnelle News und lokale Tipps.",
+        "Euch erwartet eine Stunde voller Energie, entspannter Stimmen und smarter Stories.",
+        "Wir bringen euch durch die Stunde mit neuen Releases, Updates und guten Geschichten.",
+    ],
+    "music_intro": ["{hook} {fact}"],
+    "music_intro_hook": [
+        "Gleich hört ihr {artist} mit '{title}', perfekt für euren Moment gerade.",
+        "{title} von {artist} passt großartig in die Stimmung — viel Spaß!",
+        "Noch ein Highlight in unserer Rotation: {artist} und '{title}'.",
+    ],
+    "music_intro_fact": [
+        "Die Band hat die Nummer live in einer einzigen Nacht aufgenommen.",
+        "Der Track trendet gerade auf mehreren Indie-Playlists.",
+        "Das Stück wurde komplett analog produziert.",
+    ],
+    "backannounce": ["{artist} mit '{title}'. {closer}"],
+    "backannounce_closer": [
+        "Ihr habt es bei uns zuerst gehört.",
+        "Perfekt, um weiter in den Abend zu starten.",
+        "So klingt der Soundtrack zu eurem Wochenende.",
+    ],
+    "news_header": ["Kurz und knackig — hier sind die aktuellen Themen:"],
+    "news_item": ["• {headline}: {summary}"],
+    "news_footer": ["Mehr Updates jederzeit auf radiogpt.fm."],
+    "outro": ["{thanks} {cta}"],
+    "outro_thanks": [
+        "Danke fürs Einschalten!",
+        "Das war's für diese Stunde — schön, dass ihr dabei wart.",
+        "Wir hören uns in der nächsten Stunde wieder.",
+    ],
+    "outro_cta": [
+        "Checkt die Playlist in der App, falls ihr etwas verpasst habt.",
+        "Folgt uns auf Social für Bonusinhalte hinter den Kulissen.",
+        "Schickt uns eure Musikwünsche per Sprachmessage — wir hören rein.",
+    ],
+}
+
+# Placeholders ScriptWriter fills per bank; ``station`` and ``host`` are always available.
+COMMON_FIELDS: Tuple[str, ...] = ("station", "host")
+BANK_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "intro": ("greeting", "promise"),
+    "intro_greeting": (),
+    "intro_promise": (),
+    "music_intro": ("hook", "fact"),
+    "music_intro_hook": ("artist", "title"),
+    "music_intro_fact": ("artist", "title"),
+    "backannounce": ("artist", "title", "closer"),
+    "backannounce_closer": ("artist", "title"),
+    "news_header": (),
+    "news_item": ("headline", "summary"),
+    "news_footer": (),
+    "outro": ("thanks", "cta"),
+    "outro_thanks": (),
+    "outro_cta": (),
+}
+
+
+@dataclass(frozen=True, eq=False)
+class Template:
+    """A phrase template compiled once into a render callable."""
+
+    text: str
+    fields: Tuple[str, ...]
+    render: Callable[[Mapping[str, str]], str]
+
+
+def compile_template(text: str) -> Template:
+    fields = []
+    for _, name, spec, conversion in Formatter().parse(text):
+        if name is None:
+            continue
+        if not name.isidentifier() or spec or conversion:
+            raise ValueError(f"unsupported placeholder {{{name}}} in template {text!r}")
+        fields.append(name)
+    if not fields:
+        return Template(text, (), lambda _context, _text=text: _text)
+    return Template(text, tuple(fields), text.format_map)
+
+
+class PhraseBook:
+    """Named banks of precompiled templates for one station/language.
+
+    Each bank is a non-empty list of strings. Templates of the banks in
+    ``BANK_FIELDS`` may only use the placeholders ScriptWriter passes to
+    them, so a typo fails when the book is loaded, not mid-show.
+    """
+
+    def __init__(self, banks: Mapping[str, Iterable[str]], *, fallback: Optional["PhraseBook"] = None) -> None:
+        self._banks: Dict[str, Tuple[Template, ...]] = dict(fallback._banks) if fallback else {}
+        for name, texts in banks.items():
+            if not isinstance(texts, (list, tuple)) or not all(isinstance(text, str) for text in texts):
+                raise ValueError(f"phrase bank {name!r} must be a list of strings")
+            compiled = tuple(compile_template(text) for text in texts)
+            if not compiled:
+                raise ValueError(f"phrase bank {name!r} is empty")
+            allowed = BANK_FIELDS.get(name)
+            if allowed is not None:
+                for template in compiled:
+                    for field in template.fields:
+                        if field not in allowed and field not in COMMON_FIELDS:
+                            raise ValueError(f"phrase bank {name!r}: unknown placeholder {{{field}}} in template {template.text!r}")
+            self._banks[name] = compiled
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._banks
+
+    def __len__(self) -> int:
+        return sum(len(bank) for bank in self._banks.values())
+
+    def fingerprint(self) -> str:
+        """Hash of all bank names and template texts."""
+
+        digest = hashlib.blake2b(digest_size=16)
+        for name in sorted(self._banks):
+            digest.update(name.encode("utf-8") + b"\1")
+            for template in self._banks[name]:
+                digest.update(template.text.encode("utf-8") + b"\0")
+        return digest.hexdigest()
+
+    def bank(self, name: str) -> Tuple[Template, ...]:
+        try:
+            return self._banks[name]
+        except KeyError:
+            raise KeyError(f"unknown phrase bank {name!r}") from None
+
+
+_DEFAULT_BOOK: Optional[PhraseBook] = None
+_LOADED: Dict[Tuple[str, float], PhraseBook] = {}
+
+
+def default_phrasebook() -> PhraseBook:
+    global _DEFAULT_BOOK
+    if _DEFAULT_BOOK is None:
+        _DEFAULT_BOOK = PhraseBook(DEFAULT_BANKS)
+    return _DEFAULT_BOOK
+
+
+def load_phrasebook(path: Union[str, os.PathLike]) -> PhraseBook:
+    """Loads a JSON phrase bank file once per modification time.
+
+    The file maps bank names to lists of templates (optionally wrapped in
+    ``{"banks": {...}}``); banks it does not define fall back to the
+    built-in German defaults.
+    """
+
+    resolved = Path(path).resolve()
+    key = (str(resolved), resolved.stat().st_mtime)
+    book = _LOADED.get(key)
+    if book is None:
+        with resolved.open(encoding="utf-8") as handle:
+            data = json.load(handle)
+        if isinstance(data, dict) and "banks" in data:
+            data = data["banks"]
+        if not isinstance(data, dict):
+            raise ValueError(f"{path}: expected a JSON object mapping bank names to templates")
+        book = PhraseBook(data, fallback=default_phrasebook())
+        _LOADED[key] = book
+    return book
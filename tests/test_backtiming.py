@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta, timezone
+
+from radio_gpt.backtiming import Backtimer, BacktimeRules
+from radio_gpt.catalog import SongCatalog
+from radio_gpt.generator import ShowGenerator
+from radio_gpt.playlist import SONG_LIBRARY
+
+
+def test_target_shorter_than_outro_plans_only_the_outro():
+    plan = Backtimer(SongCatalog(SONG_LIBRARY)).solve(-200, song_overhead=25, closing_overhead=70, jingles=[5])
+    assert plan.songs == []
+    assert plan.error == 270
+
+
+def test_error_counts_the_outro_when_nothing_fits():
+    plan = Backtimer(SongCatalog(SONG_LIBRARY)).solve(40, song_overhead=25, closing_overhead=70, jingles=[5])
+    assert plan.songs == []
+    assert plan.error == 30
+
+
+def test_show_shorter_than_outro_builds():
+    generator = ShowGenerator(seed=1, backtime=BacktimeRules())
+    show = generator.build_show(duration_minutes=1, start=datetime(2026, 1, 1, tzinfo=timezone.utc))
+    assert show.segments[len(show.segments) - 1].title == "Abmoderation"
+    assert show.timing_error > timedelta(0)
@@ -0,0 +1,30 @@
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from radio_gpt.batch import parse_args, plan_jobs
+
+START = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+
+def test_plan_jobs_rejects_colliding_station_slugs():
+    stations = [{"station": "Radio A"}, {"station": "radio-a"}]
+    with pytest.raises(ValueError, match="radio-a"):
+        plan_jobs(stations, hours=1, day_start=START, output_dir=Path("out"))
+
+
+def test_plan_jobs_gives_each_station_its_own_outputs():
+    stations = [{"station": "Radio A"}, {"station": "Radio B"}]
+    jobs = plan_jobs(stations, hours=2, day_start=START, output_dir=Path("out"))
+    assert len({job.output for job in jobs}) == 4
+
+
+@pytest.mark.parametrize("value", ["2024-05-01T00:00:00Z", "2024-05-01T00:00:00", "2024-05-01T02:00:00+02:00"])
+def test_start_is_parsed_like_the_other_commands(value):
+    assert parse_args(["--stations", "s.json", "--start", value]).start == START
+
+
+def test_unnamed_stations_fall_back_to_a_generic_slug():
+    (job,) = plan_jobs([{"station": "!!!"}], hours=1, day_start=START, output_dir=Path("out"))
+    assert Path(job.output) == Path("out") / "station-000.json"
@@ -0,0 +1,60 @@
+import itertools
+import random
+
+import pytest
+
+from radio_gpt.bench import synthetic_library
+from radio_gpt.catalog import SongCatalog
+from radio_gpt.playlist import SONG_LIBRARY, PlaylistPlanner
+
+
+class ListScanPlanner:
+    """The planner as it was before ``SongCatalog``: plain scans over the song list."""
+
+    def __init__(self, songs, seed):
+        self.songs = list(songs)
+        self.random = random.Random(seed)
+        shuffled = self.songs.copy()
+        self.random.shuffle(shuffled)
+        self._rotation = itertools.cycle(shuffled)
+
+    def next_song(self):
+        return next(self._rotation)
+
+    def pick_energy_song(self, *, min_energy):
+        candidates = [song for song in self.songs if song.energy >= min_energy]
+        if not candidates:
+            return self.next_song()
+        return self.random.choice(candidates)
+
+    def search(self, tag):
+        lowered = tag.lower()
+        return [song for song in self.songs if lowered in (t.lower() for t in song.tags)]
+
+
+@pytest.mark.parametrize("songs", [SONG_LIBRARY, synthetic_library(2000)], ids=["builtin", "synthetic"])
+@pytest.mark.parametrize("seed", [0, 11])
+def test_indexed_planner_matches_the_list_scan(songs, seed):
+    indexed = PlaylistPlanner(seed=seed, catalog=SongCatalog(songs))
+    baseline = ListScanPlanner(songs, seed)
+    steps = random.Random(seed)
+    for _ in range(300):
+        if steps.random() < 0.5:
+            assert indexed.next_song() == baseline.next_song()
+        else:
+            threshold = steps.choice([0.0, 0.3, 0.55, 0.8, 0.95, 1.5])
+            assert indexed.pick_energy_song(min_energy=threshold) == baseline.pick_energy_song(min_energy=threshold)
+
+
+@pytest.mark.parametrize("tag", ["pop", "Indie", "JAZZ", "late-night", "unbekannt"])
+def test_search_and_query_match_the_list_scan(tag):
+    songs = synthetic_library(2000)
+    catalog = SongCatalog(songs)
+    assert catalog.search(tag) == ListScanPlanner(songs, 0).search(tag)
+    wanted = {tag.lower(), "soul"}
+    assert catalog.query(min_energy=0.6, tags=[tag, "soul"]) == [
+        song for song in songs if song.energy >= 0.6 and wanted.intersection(t.lower() for t in song.tags)
+    ]
+    assert catalog.query(tags=[tag, "soul"], match_all=True) == [
+        song for song in songs if wanted <= {t.lower() for t in song.tags}
+    ]
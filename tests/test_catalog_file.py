@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from radio_gpt import catalog_file, cli
+from radio_gpt.catalog import SongCatalog
+from radio_gpt.catalog_file import MappedCatalog, write_catalog
+from radio_gpt.generator import ShowGenerator
+from radio_gpt.playlist import Song
+
+
+def _songs(count=20):
+    return [
+        Song(f"Titel {n}", f"Artist {n % 7}", timedelta(seconds=150 + 7 * n), (n % 10) / 10, [f"tag{n % 5}", "pop"])
+        for n in range(count)
+    ]
+
+
+@pytest.fixture
+def catalog_path(tmp_path):
+    path = tmp_path / "songs.rgcat"
+    write_catalog(_songs(), path)
+    return path
+
+
+@pytest.mark.parametrize("size", [0, 5, 12, 40, -16])
+def test_damaged_files_raise_value_error(tmp_path, catalog_path, size):
+    data = catalog_path.read_bytes()
+    damaged = tmp_path / "damaged.rgcat"
+    damaged.write_bytes(data[:size])
+    with pytest.raises(ValueError, match="damaged.rgcat"):
+        MappedCatalog(damaged)
+
+
+def test_cli_reports_unreadable_catalogs(tmp_path):
+    for path in (tmp_path / "missing.rgcat", tmp_path / "junk.rgcat"):
+        if path.name == "junk.rgcat":
+            path.write_text("kein Katalog")
+        with pytest.raises(SystemExit, match="kann nicht geöffnet werden"):
+            cli.main(["--catalog", str(path), "--seed", "1"])
+
+
+def test_more_than_64_distinct_tags(tmp_path):
+    songs = [
+        Song(f"Titel {n}", "Artist", timedelta(seconds=180), n / 300, [f"tag{n}", f"tag{n + 1}", "pop"]) for n in range(300)
+    ]
+    path = tmp_path / "many-tags.rgcat"
+    write_catalog(songs, path)
+    catalog = MappedCatalog(path)
+    assert len(catalog.tags) == 302
+    assert catalog[150].tags == ["tag150", "tag151", "pop"]
+    assert [song.title for song in catalog.search("TAG151")] == ["Titel 150", "Titel 151"]
+    masks, _ = catalog.feature_columns()
+    assert bin(masks[150]).count("1") == 3
+    assert masks[150] & masks[151] != 0
+
+
+def test_convert_open_build_show_round_trip(tmp_path):
+    source = tmp_path / "export.csv"
+    lines = ["title,artist,duration,energy,tags,platform,source_id"]
+    for song in _songs(40):
+        minutes, seconds = divmod(int(song.duration.total_seconds()), 60)
+        lines.append(f"{song.title},{song.artist},{minutes}:{seconds:02d},{song.energy},{';'.join(song.tags)},INTERNAL,")
+    source.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    path = tmp_path / "songs.rgcat"
+    assert catalog_file.main([str(source), str(path)]) == 0
+
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    expected = ShowGenerator(seed=4, catalog=SongCatalog(_songs(40))).build_show(start=start)
+    with MappedCatalog(path) as catalog:
+        show = ShowGenerator(seed=4, catalog=catalog).build_show(start=start)
+        first = catalog[0]
+    assert show.as_dict() == expected.as_dict()
+    assert first.title == "Titel 0"
+    with pytest.raises(ValueError):
+        catalog.ids_for_tag("pop")[0]
+    catalog.close()
@@ -0,0 +1,43 @@
+import asyncio
+import json
+import stat
+from datetime import datetime, timezone
+
+from radio_gpt import daemon
+from radio_gpt.daemon import GenerationDaemon, GeneratorPool
+from radio_gpt.generator import ShowGenerator
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _round_trip(path, *payloads):
+    async def run():
+        listener = await GenerationDaemon(GeneratorPool()).start(str(path))
+        mode = stat.S_IMODE(path.stat().st_mode)
+        loop = asyncio.get_running_loop()
+        async with listener:
+            replies = [await loop.run_in_executor(None, lambda p=p: daemon.request(p, path=str(path), timeout=10)) for p in payloads]
+        return mode, replies
+
+    return asyncio.run(run())
+
+
+def test_socket_is_private_from_the_start(tmp_path):
+    mode, (reply,) = _round_trip(tmp_path / "d.sock", {"op": "ping"})
+    assert mode == 0o600
+    assert reply == {"ok": True}
+
+
+def test_client_gets_the_same_show_as_a_direct_build(tmp_path):
+    request = {"seed": 4, "duration": 30, "start": "2026-01-01T00:00:00Z", "fresh": True}
+    _, (fresh, cached, stats) = _round_trip(tmp_path / "d.sock", request, request, {"op": "stats"})
+    expected = json.loads(ShowGenerator(seed=4).build_show(duration_minutes=30, start=START).to_json())
+    assert fresh == cached == {"ok": True, "show": expected}
+    assert stats["served"] == 2
+    assert stats["cache"]["hits"] == 1
+
+
+def test_bad_requests_get_an_error_reply(tmp_path):
+    _, replies = _round_trip(tmp_path / "d.sock", {"op": "nope"}, {"format": "pdf"}, {"seed": "x"})
+    assert [reply["ok"] for reply in replies] == [False, False, False]
+    assert "unknown op" in replies[0]["error"]
@@ -0,0 +1,89 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from radio_gpt.generator import ShowGenerator, ShowSegment
+from radio_gpt.store import SegmentStore
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _show(seed=1):
+    return ShowGenerator(seed=seed).build_show(duration_minutes=240, start=START)
+
+
+def _jingle(seconds=10):
+    return ShowSegment("jingle", "Live-Einstieg", "Kurz", START, timedelta(seconds=seconds))
+
+
+def _sync(show, items, revision, epoch):
+    """Applies one delta to a client's ``{id: item}`` copy, as a web player would."""
+
+    document = show.timeline_delta(revision, epoch)
+    assert json.loads(show.delta_json(revision, epoch)) == document
+    if document["full"]:
+        items = {}
+    for item in document.get("items", []) + document.get("added", []) + document.get("changed", []):
+        items[item["id"]] = item
+    for key in document.get("removed", []):
+        del items[key]
+    return document, items, document["revision"], document["epoch"]
+
+
+def _snapshot(show):
+    return {item["id"]: item for item in show.timeline_delta(0)["items"]}
+
+
+@pytest.mark.parametrize(
+    "edit",
+    [
+        lambda show: show.insert(-2, _jingle()),
+        lambda show: show.remove(-3),
+        lambda show: show.remove(-1),
+        lambda show: show.shift(-2, timedelta(seconds=30)),
+        lambda show: show.replace(-4, _jingle(25)),
+    ],
+)
+def test_delta_brings_client_up_to_date(edit):
+    show = _show()
+    _, items, revision, epoch = _sync(show, {}, 0, None)
+    edit(show)
+    document, items, revision, epoch = _sync(show, items, revision, epoch)
+    assert document["full"] is False
+    assert items == _snapshot(show)
+
+
+def test_unchanged_show_sends_an_empty_delta():
+    show = _show()
+    document = show.timeline_delta(show.revision, show.epoch)
+    assert (document["full"], document["added"], document["changed"], document["removed"]) == (False, [], [], [])
+
+
+def test_revision_from_another_show_gets_a_full_snapshot():
+    show, restarted = _show(), _show()
+    assert show.revision == restarted.revision
+    assert show.epoch != restarted.epoch
+    assert restarted.timeline_delta(show.revision, show.epoch)["full"] is True
+    assert restarted.timeline_delta(restarted.revision)["full"] is True
+
+
+def test_revision_from_the_future_gets_a_full_snapshot():
+    show = _show()
+    assert show.timeline_delta(show.revision + 5, show.epoch)["full"] is True
+
+
+def test_revision_past_the_change_log_horizon_gets_a_full_snapshot(monkeypatch):
+    monkeypatch.setattr(SegmentStore, "_MAX_CHANGES", 8)
+    show = _show()
+    _, items, revision, epoch = _sync(show, {}, 0, None)
+    first = revision
+    for _ in range(6):
+        show.replace(-2, _jingle(20))
+        show.replace(-2, _jingle(10))
+        _, items, revision, epoch = _sync(show, items, revision, epoch)
+        assert items == _snapshot(show)
+    assert show.timeline_delta(first, epoch)["full"] is True
+    document, items, _, _ = _sync(show, items, revision - 1, epoch)
+    assert document["full"] is False
+    assert items == _snapshot(show)
@@ -0,0 +1,82 @@
+import random
+from datetime import timedelta
+
+import pytest
+
+from radio_gpt.catalog import SongCatalog
+from radio_gpt.energy import EnergyCurve, EnergyPlanner
+from radio_gpt.playlist import Song
+
+OVERHEADS = [65 + 10, 65 + 15]
+
+
+def _catalog(count=400, seed=0):
+    rng = random.Random(seed)
+    return SongCatalog(
+        Song(f"Titel {n}", f"Artist {n % 40}", timedelta(seconds=rng.randint(150, 300)), rng.random(), ["pop"])
+        for n in range(count)
+    )
+
+
+def _slots(planner, ids):
+    return sum(planner.slot_seconds(song_id, OVERHEADS[step % len(OVERHEADS)]) for step, song_id in enumerate(ids))
+
+
+def test_parse_points_and_flat_curves():
+    assert EnergyCurve.parse("0:0.6, 0.5:0.85,1:0.65").points == ((0.0, 0.6), (0.5, 0.85), (1.0, 0.65))
+    assert EnergyCurve.parse("0.4").points == ((0.0, 0.4),)
+
+
+@pytest.mark.parametrize("text", ["0:0.5,0.2", "0.2,0:0.5", "0.5:0.5,0.2:0.3", "0:0.5,1.5:0.3", "-0.1:0.5", "", "0:nan", "a:b"])
+def test_parse_rejects_malformed_curves(text):
+    with pytest.raises(ValueError):
+        EnergyCurve.parse(text)
+
+
+def test_curve_interpolates_between_points():
+    curve = EnergyCurve(((0.0, 0.2), (0.5, 0.8), (1.0, 0.4)))
+    assert curve.at(0.0) == 0.2
+    assert curve.at(0.25) == pytest.approx(0.5)
+    assert curve.at(0.75) == pytest.approx(0.6)
+    assert curve.at(1.5) == 0.4
+
+
+def test_plan_fills_the_window_without_repeats():
+    planner = EnergyPlanner(_catalog())
+    ids = planner.plan(3000, OVERHEADS, curve=EnergyCurve(), after=7)
+    assert abs(_slots(planner, ids) - 3000) <= planner.fill_tolerance
+    assert len(set(ids)) == len(ids)
+    assert 7 not in ids
+
+
+def test_plan_follows_the_curve():
+    catalog = _catalog()
+    planner = EnergyPlanner(catalog)
+    ids = planner.plan(3600, OVERHEADS, curve=EnergyCurve(((0.0, 0.1), (1.0, 0.9))))
+    energies = [catalog.energies[song_id] for song_id in ids]
+    third = len(energies) // 3
+    assert sum(energies[:third]) / third < 0.4 < 0.6 < sum(energies[-third:]) / third
+
+
+def test_plan_respects_allowed_and_spans_blocks():
+    planner = EnergyPlanner(_catalog(), block_seconds=1200)
+    ids = planner.plan(3600, OVERHEADS, curve=EnergyCurve(), allowed=lambda song_id: song_id % 2 == 0)
+    assert ids and all(song_id % 2 == 0 for song_id in ids)
+    assert len(set(ids)) == len(ids)
+    assert abs(_slots(planner, ids) - 3600) <= 3 * planner.fill_tolerance
+
+
+def test_plan_is_deterministic_without_rng():
+    catalog = _catalog()
+    first = EnergyPlanner(catalog).plan(2400, OVERHEADS, curve=EnergyCurve())
+    assert EnergyPlanner(catalog).plan(2400, OVERHEADS, curve=EnergyCurve()) == first
+    assert EnergyPlanner(catalog).plan(2400, OVERHEADS, curve=EnergyCurve(), rng=random.Random(1)) == EnergyPlanner(
+        catalog
+    ).plan(2400, OVERHEADS, curve=EnergyCurve(), rng=random.Random(1))
+
+
+def test_plan_handles_empty_inputs():
+    planner = EnergyPlanner(_catalog(10))
+    assert planner.plan(0, OVERHEADS, curve=EnergyCurve()) == []
+    assert planner.plan(600, [], curve=EnergyCurve()) == []
+    assert EnergyPlanner(SongCatalog([])).plan(600, OVERHEADS, curve=EnergyCurve()) == []
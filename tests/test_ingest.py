@@ -0,0 +1,37 @@
+import pytest
+
+from radio_gpt.ingest import ingest, read_jsonl
+
+
+def _write(path, *lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def test_null_fields_raise_value_error_by_default(tmp_path):
+    path = _write(tmp_path / "news.jsonl", '{"title": null, "duration": null}')
+    with pytest.raises(ValueError, match="news.jsonl:1"):
+        list(read_jsonl(path))
+
+
+def test_null_fields_are_counted_as_rejected(tmp_path):
+    path = _write(
+        tmp_path / "news.jsonl",
+        '{"headline": "Brücke gesperrt", "summary": "Umleitung"}',
+        '{"title": null, "duration": null}',
+        '{"headline": "Stadtrat tagt", "relevance": null}',
+        '{"headline": "Neues Freibad", "relevance": 0.8}',
+    )
+    rejected = []
+    items = list(read_jsonl(path, rejected=rejected))
+    assert [item.headline for item in items] == ["Brücke gesperrt", "Neues Freibad"]
+    assert len(rejected) == 2
+    assert rejected[0].startswith(f"{path}:2:")
+
+
+def test_ingest_keeps_valid_rows(tmp_path):
+    path = _write(tmp_path / "news.jsonl", '{"title": null}', '{"headline": "Marktplatz wird saniert"}')
+    rejected = []
+    feed = ingest([path], rejected=rejected)
+    assert len(rejected) == 1
+    assert len(feed) == 1
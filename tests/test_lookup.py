@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from radio_gpt import cli
+from radio_gpt.generator import RadioShow, ShowSegment
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _at(seconds):
+    return START + timedelta(seconds=seconds)
+
+
+def _show():
+    """Songs A (0-60 s), B (60-180 s) and C (180-210 s)."""
+
+    segments, start = [], START
+    for title, seconds in (("A", 60), ("B", 120), ("C", 30)):
+        segments.append(ShowSegment("song", title, "", start, timedelta(seconds=seconds)))
+        start += timedelta(seconds=seconds)
+    return RadioShow("RadioGPT", "Alex", START, segments)
+
+
+def _titles(segments):
+    return [segment.title for segment in segments]
+
+
+@pytest.mark.parametrize(
+    "seconds, expected",
+    [(-1, None), (0, "A"), (59, "A"), (60, "B"), (179.5, "B"), (180, "C"), (209, "C"), (210, None), (500, None)],
+)
+def test_segment_at_boundaries(seconds, expected):
+    segment = _show().segment_at(_at(seconds))
+    assert (segment.title if segment else None) == expected
+
+
+@pytest.mark.parametrize(
+    "seconds, expected",
+    [(-1, "A"), (0, "B"), (30, "B"), (60, "C"), (180, None), (210, None)],
+)
+def test_next_after_starts_strictly_later(seconds, expected):
+    segment = _show().next_after(_at(seconds))
+    assert (segment.title if segment else None) == expected
+
+
+def test_upcoming_boundaries():
+    show = _show()
+    assert _titles(show.upcoming(_at(-1))) == ["A", "B", "C"]
+    assert _titles(show.upcoming(_at(-1), 2)) == ["A", "B"]
+    assert _titles(show.upcoming(_at(0))) == ["B", "C"]
+    assert _titles(show.upcoming(_at(180))) == []
+    assert _titles(show.upcoming(_at(0), 0)) == []
+
+
+@pytest.mark.parametrize(
+    "start, end, expected",
+    [
+        (-10, 0, []),
+        (-10, 1, ["A"]),
+        (0, 60, ["A"]),
+        (59, 61, ["A", "B"]),
+        (60, 180, ["B"]),
+        (180, 210, ["C"]),
+        (209, 300, ["C"]),
+        (210, 300, []),
+        (-100, 1000, ["A", "B", "C"]),
+        (100, 100, []),
+    ],
+)
+def test_window_is_half_open(start, end, expected):
+    assert _titles(_show().window(_at(start), _at(end))) == expected
+
+
+def test_naive_times_are_taken_as_utc():
+    assert _show().segment_at(datetime(2026, 1, 1, 0, 1)).title == "B"
+
+
+@pytest.mark.parametrize("value", ["-1", "drei"])
+def test_cli_rejects_bad_upcoming_counts(capsys, value):
+    with pytest.raises(SystemExit):
+        cli.parse_args(["--now-playing", "--upcoming", value])
+    assert "ungültige Anzahl" in capsys.readouterr().err
+    assert cli.parse_args(["--upcoming", "0"]).upcoming == 0
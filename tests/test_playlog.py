@@ -0,0 +1,16 @@
+from radio_gpt.bench import synthetic_library
+from radio_gpt.catalog_file import MappedCatalog, write_catalog
+from radio_gpt.playlist import PlaylistPlanner
+from radio_gpt.playlog import PlayLog, song_key
+from radio_gpt.rotation import RotationRules
+
+
+def test_priming_a_mapped_catalog_only_loads_logged_songs(tmp_path):
+    songs = synthetic_library(200)
+    write_catalog(songs, tmp_path / "catalog.rgcat")
+    with PlayLog(tmp_path / "plays.db") as log:
+        log.record([(1000.0, "song", song_key(songs[5]), songs[5].artist.casefold(), songs[5].title, 200)])
+        catalog = MappedCatalog(tmp_path / "catalog.rgcat")
+        planner = PlaylistPlanner(seed=1, catalog=catalog, rotation=RotationRules(), history=log)
+    assert catalog.materialized == 1
+    assert planner.scheduler.last_played(5) == 1000.0
@@ -0,0 +1,17 @@
+from datetime import datetime, timedelta, timezone
+
+from radio_gpt.catalog import SongCatalog
+from radio_gpt.generator import ShowGenerator
+from radio_gpt.playlist import Song
+from radio_gpt.prefetch import build_manifest
+
+
+def test_tracks_without_source_id_stay_distinct():
+    songs = [Song(f"Track {n}", "Artist", timedelta(seconds=180), n / 10, ["pop"]) for n in range(1, 10)]
+    show = ShowGenerator(seed=1, catalog=SongCatalog(songs)).build_show(
+        duration_minutes=60, start=datetime(2026, 1, 1, tzinfo=timezone.utc)
+    )
+    tracks = [asset for asset in build_manifest(show).assets if asset.kind == "track"]
+    played = {segment.title for segment in show.segments if segment.payload.get("platform")}
+    assert len(tracks) == len(played) > 1
+    assert all(asset.as_dict(show.start, 0)["title"] for asset in tracks)
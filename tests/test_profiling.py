@@ -0,0 +1,57 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from radio_gpt import cli
+from radio_gpt.generator import ShowGenerator
+from radio_gpt.profiling import Profiler
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _build():
+    return ShowGenerator(seed=6).build_show(duration_minutes=120, start=START)
+
+
+def test_profiler_collects_stage_times_and_counters():
+    build_show = ShowGenerator.__dict__["build_show"]
+    with Profiler() as profiler:
+        show = _build()
+        show.to_json()
+    assert ShowGenerator.__dict__["build_show"] is build_show
+    assert show.as_dict() == _build().as_dict()
+
+    counters = profiler.counters
+    assert counters["shows_built"] == 1
+    assert counters["segments_stored"] == len(show.segments)
+    assert counters["songs_picked"] == sum(segment.kind.endswith("_track") for segment in show.segments)
+    assert counters["bytes_serialized"] == len(show.to_json())
+    assert counters["slug_calls"] > 0
+    assert {"generator", "playlist", "script", "store", "serialization"} <= set(profiler.stages)
+    assert profiler.stages["generator"].calls == 1
+    assert sum(stats.seconds for stats in profiler.stages.values()) <= profiler.wall_seconds
+    assert profiler.peak_bytes is None
+
+
+def test_profilers_do_not_nest():
+    with Profiler():
+        with pytest.raises(RuntimeError):
+            Profiler().__enter__()
+
+
+@pytest.mark.parametrize("name, marker", [("profile.json", '"counters"'), ("profile.prom", "# TYPE radio_gpt_")])
+def test_cli_profile_goes_to_stderr_and_file(tmp_path, capsysbinary, name, marker):
+    argv = ["--seed", "6", "--duration", "60", "--start", "2026-01-01T00:00:00Z", "--json"]
+    cli.main(argv)
+    plain = capsysbinary.readouterr()
+    path = tmp_path / name
+    cli.main(argv + ["--profile", str(path), "--profile-memory"])
+    profiled = capsysbinary.readouterr()
+    assert profiled.out == plain.out
+    assert plain.err == b""
+    assert b"shows_built" in profiled.err and b"peak memory" in profiled.err
+    content = path.read_text(encoding="utf-8")
+    assert marker in content
+    if name.endswith(".json"):
+        assert json.loads(content)["counters"]["shows_built"] == 1
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+import pytest
+
+from radio_gpt.providers import PARSERS, ContentProviders, Provider, parse_catalog, parse_news
+
+
+class FakePool:
+    def __init__(self, bodies):
+        self.bodies = bodies
+
+    async def get(self, url):
+        return self.bodies[url]
+
+    async def close(self):
+        pass
+
+
+def _gather(providers):
+    async def run():
+        try:
+            return await providers.gather()
+        finally:
+            await providers.close()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"songs": [{"title": "A", "artist": "B", "duration": 200, "energy": None}]},
+        {"songs": [{"title": None, "artist": "B", "duration": 200, "energy": 0.5}]},
+        {"songs": [None]},
+    ],
+)
+def test_parse_catalog_rejects_null_fields(body):
+    with pytest.raises(ValueError):
+        parse_catalog(json.dumps(body).encode())
+
+
+@pytest.mark.parametrize("row", [{"title": None}, {"headline": "A", "relevance": None}, None])
+def test_parse_news_rejects_null_fields(row):
+    with pytest.raises(ValueError):
+        parse_news(json.dumps({"items": [row]}).encode())
+
+
+def test_null_fields_fall_back_to_built_in_content():
+    bodies = {
+        "/catalog": json.dumps({"songs": [{"title": "A", "artist": "B", "duration": None, "energy": None}]}).encode(),
+        "/news": json.dumps({"items": [{"title": None, "relevance": None}]}).encode(),
+        "/weather": json.dumps({"forecasts": ["Sonnig"]}).encode(),
+    }
+    providers = ContentProviders(
+        [Provider(url.strip("/"), url, PARSERS[url.strip("/")]) for url in bodies],
+        pool=FakePool(bodies),
+    )
+    inputs = _gather(providers)
+    assert inputs.catalog is None
+    assert inputs.news is None
+    assert inputs.weather == ["Sonnig"]
+    assert providers.stats["catalog"].errors == 1
+    assert providers.stats["news"].fallbacks == 1
@@ -0,0 +1,107 @@
+import random
+from datetime import timedelta
+
+import pytest
+
+from radio_gpt.catalog import SongCatalog
+from radio_gpt.playlist import Song
+from radio_gpt.rotation import RotationRules, RotationScheduler
+
+TAGS = ["pop", "rock", "jazz", "soul", "indie", "folk"]
+SLOT = 200.0
+
+
+def _catalog(count=120, artists=30):
+    rng = random.Random(0)
+    return SongCatalog(
+        Song(f"Titel {n}", f"Artist {n % artists}", timedelta(seconds=200), rng.random(), [TAGS[n % len(TAGS)]])
+        for n in range(count)
+    )
+
+
+def _scheduler(catalog, seed=1, **rules):
+    return RotationScheduler(catalog, RotationRules(**rules), random.Random(seed))
+
+
+def _ids(catalog, songs):
+    index = {(song.title, song.artist): song_id for song_id, song in enumerate(catalog)}
+    return [index[song.title, song.artist] for song in songs]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_song_artist_and_tag_separation_hold(seed):
+    catalog = _catalog()
+    rules = dict(song_repeat=60 * 60, artist_separation=30 * 60, tag_separation=10 * 60)
+    scheduler = _scheduler(catalog, seed, **rules)
+    song_last, artist_last, tag_last = {}, {}, {}
+    for step in range(400):
+        now = step * SLOT
+        song = scheduler.next(now)
+        (song_id,) = _ids(catalog, [song])
+        assert now - song_last.get(song_id, -1e9) >= rules["song_repeat"]
+        assert now - artist_last.get(song.artist, -1e9) >= rules["artist_separation"]
+        assert all(now - tag_last.get(tag, -1e9) >= rules["tag_separation"] for tag in song.tags)
+        assert scheduler.last_played(song_id) == now
+        song_last[song_id], artist_last[song.artist] = now, now
+        tag_last.update(dict.fromkeys(song.tags, now))
+
+
+def test_every_song_plays_once_before_any_repeats():
+    catalog = _catalog()
+    scheduler = _scheduler(catalog, song_repeat=0, artist_separation=0)
+    first = _ids(catalog, [scheduler.next(step * SLOT) for step in range(len(catalog))])
+    assert sorted(first) == list(range(len(catalog)))
+    second = _ids(catalog, [scheduler.next((len(catalog) + step) * SLOT) for step in range(len(catalog))])
+    assert second == first
+
+
+def test_plays_recorded_outside_next_are_respected():
+    catalog = _catalog()
+    scheduler = _scheduler(catalog, song_repeat=60 * 60, artist_separation=30 * 60)
+    for step in range(20):
+        scheduler.pick_from(range(0, 60), step * SLOT)
+    blocked = {catalog[song_id].artist for song_id in range(60) if scheduler.last_played(song_id) is not None}
+    now = 20 * SLOT
+    for step in range(5):
+        song = scheduler.next(now + step * SLOT)
+        assert song.artist not in blocked
+        blocked.add(song.artist)
+
+
+def test_falls_back_to_the_least_recently_played_song():
+    catalog = SongCatalog(
+        [Song(f"Titel {n}", "Solo", timedelta(seconds=200), 0.5, ["pop"]) for n in range(3)]
+    )
+    scheduler = _scheduler(catalog, song_repeat=24 * 60 * 60, artist_separation=60 * 60)
+    picks = _ids(catalog, [scheduler.next(step * SLOT) for step in range(6)])
+    # Nothing satisfies the rules after the first pick, so the oldest song comes back.
+    assert picks[:3] == picks[3:]
+    assert sorted(picks[:3]) == [0, 1, 2]
+    assert not scheduler.allows(picks[0], 6 * SLOT)
+
+
+def test_unsatisfiable_tag_rule_falls_back_to_plain_rotation():
+    catalog = SongCatalog(
+        Song(f"Titel {n}", f"Artist {n}", timedelta(seconds=200), 0.5, ["pop"]) for n in range(40)
+    )
+    strict = _scheduler(catalog, song_repeat=0, artist_separation=0, tag_separation=10**6, max_deferrals=4)
+    plain = _scheduler(catalog, song_repeat=0, artist_separation=0)
+    steps = [step * SLOT for step in range(60)]
+    assert [strict.next(now) for now in steps] == [plain.next(now) for now in steps]
+
+
+def test_state_round_trip_continues_the_rotation():
+    catalog = _catalog()
+    rules = dict(song_repeat=60 * 60, artist_separation=30 * 60, tag_separation=5 * 60)
+    scheduler = _scheduler(catalog, 5, **rules)
+    for step in range(50):
+        scheduler.next(step * SLOT)
+    restored = _scheduler(catalog, 99, **rules)
+    restored.restore(scheduler.state(include_order=True))
+    later = [50 * SLOT + step * SLOT for step in range(80)]
+    assert [restored.next(now) for now in later] == [scheduler.next(now) for now in later]
+
+
+def test_empty_catalog_raises():
+    with pytest.raises(LookupError):
+        _scheduler(SongCatalog([])).next(0.0)
@@ -0,0 +1,85 @@
+import dataclasses
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from radio_gpt import cli, serialization
+from radio_gpt.generator import RadioShow, ShowGenerator, ShowSegment
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _show():
+    return ShowGenerator(seed=2).build_show(duration_minutes=120, start=START)
+
+
+def _fresh(show, *, timeline=False):
+    """Encodes a copy of ``show`` whose rows have never been cached."""
+
+    copy = RadioShow(show.station, show.host, show.start, list(show.segments), target_duration=show.target_duration)
+    return serialization.show_json(copy, timeline=timeline)
+
+
+def _without_server_time(body):
+    document = json.loads(body)
+    document.pop("server_time")
+    return document
+
+
+@pytest.mark.parametrize("timeline", [False, True])
+def test_cached_rows_match_fresh_output_after_edits(timeline):
+    show = _show()
+    show.to_json(timeline=timeline)
+    show.replace(3, dataclasses.replace(show.segments[3], title="Neu", duration=timedelta(seconds=75)))
+    show.insert(5, ShowSegment("jingle", "Live-Einstieg", "Kurz", START, timedelta(seconds=12)))
+    show.shift(9, timedelta(seconds=30))
+    show.remove(-2)
+    cached, fresh = show.to_json(timeline=timeline), _fresh(show, timeline=timeline)
+    if timeline:
+        assert _without_server_time(cached) == _without_server_time(fresh)
+    else:
+        assert cached == fresh
+        assert json.loads(cached) == show.as_dict()
+
+
+def test_unchanged_rows_are_reused():
+    show = _show()
+    before = serialization.encode_rows(show)
+    show.replace(-1, dataclasses.replace(show.segments[-1], title="Neu"))
+    after = serialization.encode_rows(show)
+    assert all(old is new for old, new in zip(before[:-1], after[:-1]))
+    assert before[-1] != after[-1]
+
+
+@pytest.mark.parametrize("timeline", [False, True])
+def test_ndjson_rows_match_the_document(timeline):
+    show = _show()
+    show.remove(4)
+    lines = list(show.iter_ndjson(timeline=timeline))
+    assert all(line.endswith(b"\n") and line.count(b"\n") == 1 for line in lines)
+    document = show.as_timeline()["items"] if timeline else show.as_dict()["segments"]
+    assert [json.loads(line) for line in lines] == document
+
+
+@pytest.mark.parametrize("flags", [["--json"], ["--timeline"]])
+def test_cli_compact_and_ndjson_formats(capsysbinary, flags):
+    common = ["--seed", "2", "--duration", "120", "--start", "2026-01-01T00:00:00Z", *flags]
+    cli.main([*common, "--format", "compact"])
+    compact = capsysbinary.readouterr().out
+    cli.main([*common, "--format", "ndjson"])
+    ndjson = capsysbinary.readouterr().out.splitlines()
+    document = json.loads(compact)
+    assert compact.count(b"\n") == 1
+    assert [json.loads(line) for line in ndjson] == document["items" if "--timeline" in flags else "segments"]
+
+
+def test_refresh_server_time_rewrites_only_the_time():
+    body = _show().to_json(timeline=True)
+    stale = body.replace(json.loads(body)["server_time"].encode(), b"2000-01-01T00:00:00+00:00")
+    refreshed = serialization.refresh_server_time(stale)
+    head, _, tail = stale.partition(b"2000-01-01T00:00:00+00:00")
+    assert refreshed.startswith(head) and refreshed.endswith(tail)
+    stamp = datetime.fromisoformat(json.loads(refreshed)["server_time"])
+    assert abs(datetime.now(timezone.utc) - stamp) < timedelta(minutes=1)
+    assert _without_server_time(refreshed) == _without_server_time(body)
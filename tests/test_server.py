@@ -0,0 +1,110 @@
+import asyncio
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from radio_gpt.generator import ShowGenerator, ShowSegment
+from radio_gpt.server import TimelineResponder, TimelineServer
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _show():
+    return ShowGenerator(seed=1).build_show(duration_minutes=60, start=START)
+
+
+def _get(responder, target, **headers):
+    return responder.respond("GET", target, {name.replace("_", "-"): value for name, value in headers.items()})
+
+
+def test_edits_reach_full_and_window_replies():
+    show = _show()
+    responder = TimelineResponder(show)
+    _, before, _ = _get(responder, "/timeline")
+    window = "/timeline?from=2026-01-01T00:30:00Z&to=2026-01-01T00:40:00Z"
+    _get(responder, window)
+
+    show.shift(3, timedelta(seconds=45))
+    show.insert(1, ShowSegment("jingle", "Live-Einstieg", "Kurz", START, timedelta(seconds=10)))
+
+    status, headers, body = _get(responder, "/timeline", if_none_match=before["ETag"])
+    assert status == 200
+    assert headers["ETag"] != before["ETag"]
+    assert json.loads(body)["items"] == json.loads(show.to_json(timeline=True))["items"]
+    _, _, body = _get(responder, window)
+    expected = show.window(datetime(2026, 1, 1, 0, 30, tzinfo=timezone.utc), datetime(2026, 1, 1, 0, 40, tzinfo=timezone.utc))
+    assert [item["start_utc"] for item in json.loads(body)["items"]] == [segment.start.isoformat() for segment in expected]
+
+
+async def _exchange(port, *requests):
+    """Sends raw requests over one connection and reads a response to each."""
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    responses = []
+    for raw in requests:
+        writer.write(raw)
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        responses.append((status, headers, await reader.readexactly(int(headers["content-length"]))))
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+
+def _serve(show, *requests):
+    async def run():
+        listener = await TimelineServer(TimelineResponder(show)).start("127.0.0.1", 0)
+        async with listener:
+            return await _exchange(listener.sockets[0].getsockname()[1], *requests)
+
+    return asyncio.run(run())
+
+
+def _get_request(target, *headers):
+    return "\r\n".join([f"GET {target} HTTP/1.1", "Host: localhost", *headers, "", ""]).encode("latin-1")
+
+
+def test_server_answers_gzip_and_conditional_requests():
+    show = _show()
+    (status, headers, body), = _serve(show, _get_request("/timeline", "Accept-Encoding: gzip"))
+    assert status == 200
+    assert headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(body))["items"] == json.loads(show.to_json(timeline=True))["items"]
+
+    responses = _serve(
+        show,
+        _get_request("/timeline", f"If-None-Match: {headers['etag']}"),
+        _get_request("/timeline?from=2026-01-01T00:30:00Z&to=2026-01-01T00:31:00Z"),
+        _get_request(f"/timeline?since={show.revision}&epoch={show.epoch}"),
+        _get_request("/nowhere"),
+    )
+    assert [status for status, _, _ in responses] == [304, 200, 200, 404]
+    assert responses[0][2] == b""
+    window = json.loads(responses[1][2])["items"]
+    assert [item["start_utc"] for item in window] == [
+        segment.start.isoformat()
+        for segment in show.window(datetime(2026, 1, 1, 0, 30, tzinfo=timezone.utc), datetime(2026, 1, 1, 0, 31, tzinfo=timezone.utc))
+    ]
+    delta = json.loads(responses[2][2])
+    assert (delta["full"], delta["added"], delta["changed"], delta["removed"]) == (False, [], [], [])
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        b"GARBAGE\r\n\r\n",
+        b"GET /timeline\r\n\r\n",
+        b"GET /timeline HTTP/1.1\r\nno colon here\r\n\r\n",
+        b"GET /" + b"x" * 70000 + b" HTTP/1.1\r\n\r\n",
+    ],
+)
+def test_malformed_requests_get_400(raw):
+    (status, headers, _), = _serve(_show(), raw)
+    assert status == 400
+    assert headers["connection"] == "close"
@@ -0,0 +1,47 @@
+from datetime import datetime, timezone
+
+from radio_gpt import showcache
+from radio_gpt.generator import ShowGenerator
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def test_key_covers_built_in_news(monkeypatch):
+    before = ShowGenerator(seed=1).cache_key(start=START)
+    monkeypatch.setattr(showcache, "GLOBAL_NEWS", showcache.GLOBAL_NEWS[1:])
+    monkeypatch.setattr(showcache, "_BUILTIN_CONTENT", None)
+    assert ShowGenerator(seed=1).cache_key(start=START) != before
+
+
+def test_default_and_explicit_built_in_content_share_a_key():
+    generator = ShowGenerator(seed=1)
+    assert generator.cache_key(start=START) == showcache.show_key(
+        station=generator.station,
+        host=generator.host,
+        seed=1,
+        duration_minutes=60,
+        start=START,
+        output="json",
+        voice=generator.voice,
+    )
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    key = ShowGenerator(seed=1).cache_key(start=START)
+    first = showcache.ShowCache(tmp_path, max_bytes=0)
+    body = first.fetch(key, lambda: b'{"show":1}')
+    assert (tmp_path / key[:2] / f"{key}.json").read_bytes() == body
+
+    second = showcache.ShowCache(tmp_path)
+    assert second.fetch(key, lambda: b"neu") == body
+    assert (second.stats.disk_hits, second.stats.misses) == (1, 0)
+    assert second.get(key) == body
+    assert second.stats.hits == 1
+
+
+def test_disk_tier_is_bounded_in_bytes(tmp_path):
+    cache = showcache.ShowCache(tmp_path, max_bytes=0, disk_bytes=25)
+    for n in range(4):
+        cache.put(f"{n:02x}" * 16, b"x" * 10)
+    assert (len(cache.disk), cache.disk.total_bytes) == (2, 20)
+    assert sorted(path.name[:2] for path in tmp_path.rglob("*.json")) == ["02", "03"]
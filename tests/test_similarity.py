@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from radio_gpt.bench import synthetic_library
+from radio_gpt.catalog import SongCatalog
+from radio_gpt.similarity import SimilarityIndex, TransitionRules
+
+CATALOG = SongCatalog(synthetic_library(2_000, seed=3))
+
+
+def _brute_force(index, song_id, k, banned=frozenset()):
+    others = (other for other in range(len(CATALOG)) if other != song_id and other not in banned)
+    return sorted(index.distance(song_id, other) for other in others)[:k]
+
+
+@pytest.mark.parametrize("rules", [TransitionRules(), TransitionRules(tags=0.01, platform=3.0)])
+def test_nearest_is_exact_by_default(rules):
+    index = SimilarityIndex(CATALOG, rules)
+    rng = random.Random(1)
+    for _ in range(50):
+        song_id, k = rng.randrange(len(CATALOG)), rng.choice([1, 3, 25])
+        banned = frozenset(rng.sample(range(len(CATALOG)), 500))
+        found = index.nearest(song_id, k, allowed=lambda other: other not in banned)
+        assert [index.distance(song_id, other) for other in found] == pytest.approx(_brute_force(index, song_id, k, banned))
+
+
+def test_vector_distance_matches_distance():
+    index = SimilarityIndex(CATALOG)
+    first, second = index.vector(10), index.vector(20)
+    assert sum((a - b) ** 2 for a, b in zip(first, second)) == pytest.approx(index.distance(10, 20))
+
+
+def test_max_scan_bounds_the_search():
+    exact = SimilarityIndex(CATALOG)
+    capped = SimilarityIndex(CATALOG, TransitionRules(max_scan=5))
+    misses = 0
+    for song_id in range(0, len(CATALOG), 40):
+        found = capped.nearest(song_id, 10)
+        # At most max_scan songs are compared, so at most that many come back ...
+        assert 0 < len(found) <= 5
+        distances = [capped.distance(song_id, other) for other in found]
+        assert distances == sorted(distances)
+        # ... and they need not be the true nearest ones.
+        misses += distances[0] > exact.distance(song_id, exact.nearest(song_id, 1)[0])
+    assert misses > 0
+
+
+def test_precomputed_table_matches_search():
+    index = SimilarityIndex(CATALOG)
+    expected = [index.nearest(song_id, 3) for song_id in range(0, len(CATALOG), 97)]
+    index.precompute(4)
+    assert [index.nearest(song_id, 3) for song_id in range(0, len(CATALOG), 97)] == expected
@@ -0,0 +1,46 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from radio_gpt.generator import ShowGenerator
+from radio_gpt.state import STATE_VERSION, load_state, save_state
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _continue(generator):
+    return generator.build_show(duration_minutes=90, start=generator.resume_at).as_dict()
+
+
+@pytest.mark.parametrize("seed", [7, None])
+def test_restored_generator_continues_like_an_uninterrupted_one(tmp_path, seed):
+    generator = ShowGenerator(seed=seed)
+    generator.build_show(duration_minutes=120, start=START)
+    save_state(generator.snapshot(), tmp_path / "state.json")
+
+    restored = ShowGenerator(seed=seed)
+    restored.restore(load_state(tmp_path / "state.json"))
+    assert restored.resume_at == generator.resume_at
+    for _ in range(3):
+        assert _continue(restored) == _continue(generator)
+
+
+def test_unknown_version_is_rejected(tmp_path):
+    generator = ShowGenerator(seed=7)
+    snapshot = generator.snapshot()
+    snapshot["version"] = STATE_VERSION + 1
+    with pytest.raises(ValueError, match="unsupported state version"):
+        ShowGenerator(seed=7).restore(snapshot)
+    (tmp_path / "state.json").write_text(json.dumps(snapshot), encoding="utf-8")
+    with pytest.raises(ValueError, match="unsupported state version"):
+        load_state(tmp_path / "state.json")
+
+
+def test_mismatched_seed_is_rejected():
+    with pytest.raises(ValueError, match="seed"):
+        ShowGenerator(seed=8).restore(ShowGenerator(seed=7).snapshot())
+
+
+def test_missing_state_file_means_a_fresh_start(tmp_path):
+    assert load_state(tmp_path / "state.json") is None
@@ -0,0 +1,156 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from radio_gpt.generator import RadioShow, ShowSegment
+from radio_gpt.store import SegmentStore
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class Model:
+    """Plain list of (start, duration) offsets that every edit rewrites in full."""
+
+    def __init__(self):
+        self.rows = []
+
+    def end(self, index):
+        return self.rows[index - 1][0] + self.rows[index - 1][1] if index else 0
+
+    def move(self, first, seconds):
+        self.rows[first:] = [(start + seconds, duration) for start, duration in self.rows[first:]]
+
+
+def _assert_matches(store, model):
+    rows = model.rows
+    assert [(store.offset(i), store.duration(i)) for i in range(len(store))] == rows
+    assert store.end_offset() == (rows[-1][0] + rows[-1][1] if rows else 0)
+    probes = {-1, 0}
+    for start, duration in rows:
+        probes.update((start - 1, start, start + duration - 1, start + duration))
+    for t in sorted(probes):
+        on_air = [i for i, (start, duration) in enumerate(rows) if start <= t < start + duration]
+        assert store.index_at(t) == (on_air[0] if on_air else -1)
+        later = [i for i, (start, _) in enumerate(rows) if start > t]
+        assert store.index_after(t) == (later[0] if later else len(rows))
+        for length in (0, 1, 90):
+            overlap = [i for i, (start, duration) in enumerate(rows) if start < t + length and start + duration > t and length]
+            assert list(store.index_range(t, t + length)) == overlap
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_edits_keep_lookups_consistent(seed):
+    rng = random.Random(seed)
+    store, model = SegmentStore(), Model()
+    for _ in range(30):
+        duration = rng.randint(1, 120)
+        store.append("song", "t", "d", duration)
+        model.rows.append((model.end(len(model.rows)), duration))
+    # Enough edits to cross SegmentStore._MAX_DELTAS several times.
+    for step in range(4 * SegmentStore._MAX_DELTAS):
+        op = rng.choice("irxs")
+        count = len(model.rows)
+        duration = rng.randint(1, 120)
+        if op == "i" or not count:
+            index = rng.randint(0, count)
+            store.insert(index, "jingle", "t", "d", duration)
+            model.move(index, duration)
+            model.rows.insert(index, (model.end(index), duration))
+            continue
+        index = rng.randrange(count)
+        start, old = model.rows[index]
+        if op == "r":
+            store.replace(index, "song", "t", "d", duration)
+            model.rows[index] = (start, duration)
+            model.move(index + 1, duration - old)
+        elif op == "x":
+            store.remove(index)
+            del model.rows[index]
+            model.move(index, -old)
+        else:
+            seconds = rng.randint(0, 40)
+            store.shift(index, seconds)
+            model.move(index, seconds)
+        if step % 8 == 0:
+            _assert_matches(store, model)
+    store.offsets()
+    _assert_matches(store, model)
+
+
+def _show(*durations):
+    segments, start = [], START
+    for n, seconds in enumerate(durations):
+        segments.append(ShowSegment("song", f"Song {n}", "", start, timedelta(seconds=seconds)))
+        start += timedelta(seconds=seconds)
+    return RadioShow("RadioGPT", "Alex", START, segments, target_duration=timedelta(seconds=sum(durations)))
+
+
+def test_removing_the_last_segment_shortens_the_show():
+    show = _show(60, 120, 30)
+    removed = show.remove(-1)
+    assert removed.title == "Song 2"
+    assert show.duration == timedelta(seconds=180)
+    assert show.segment_at(START + timedelta(seconds=190)) is None
+    assert show.fits_target
+
+
+def test_removing_the_last_segment_drops_its_gap():
+    show = _show(60, 120, 30)
+    show.shift(-1, timedelta(seconds=15))
+    show.remove(-1)
+    assert show.duration == timedelta(seconds=180)
+
+
+def test_shifting_the_last_segment_moves_the_end():
+    show = _show(60, 120, 30)
+    show.shift(-1, timedelta(seconds=20))
+    assert show.duration == timedelta(seconds=230)
+    assert show.timing_error == timedelta(seconds=20)
+    assert not show.fits_target
+    assert show.segment_at(START + timedelta(seconds=185)) is None
+    assert show.segment_at(START + timedelta(seconds=200)).title == "Song 2"
+
+
+def test_edits_are_visible_to_lookups():
+    show = _show(60, 120, 30)
+    show.insert(1, ShowSegment("jingle", "Jingle", "", START, timedelta(seconds=10)))
+    show.replace(0, ShowSegment("song", "Neu", "", START, timedelta(seconds=50)))
+    assert [segment.title for segment in show.segments] == ["Neu", "Jingle", "Song 1", "Song 2"]
+    assert [int((s.start - START).total_seconds()) for s in show.segments] == [0, 50, 60, 180]
+    assert show.segment_at(START + timedelta(seconds=55)).title == "Jingle"
+    assert show.next_after(START + timedelta(seconds=55)).title == "Song 1"
+    assert [s.title for s in show.window(START + timedelta(seconds=59), START + timedelta(seconds=61))] == [
+        "Jingle",
+        "Song 1",
+    ]
+
+
+def test_shift_into_the_previous_segment_is_rejected():
+    show = _show(60, 120, 30)
+    show.shift(2, timedelta(seconds=10))
+    show.shift(2, timedelta(seconds=-10))
+    with pytest.raises(ValueError):
+        show.shift(2, timedelta(seconds=-1))
+    with pytest.raises(ValueError):
+        show.shift(0, timedelta(seconds=-1))
+    assert show.duration == timedelta(seconds=210)
+
+
+@pytest.mark.parametrize("edit", ["replace", "remove", "shift"])
+@pytest.mark.parametrize("index", [3, -4])
+def test_bad_indices_raise(edit, index):
+    show = _show(60, 120, 30)
+    segment = ShowSegment("jingle", "Jingle", "", START, timedelta(seconds=10))
+    args = {"replace": (segment,), "remove": (), "shift": (timedelta(seconds=5),)}[edit]
+    with pytest.raises(IndexError):
+        getattr(show, edit)(index, *args)
+    assert show.revision == 3
+
+
+def test_segments_view_is_read_only():
+    show = _show(60, 120)
+    with pytest.raises(TypeError):
+        show.segments.append(show.segments[0])
+    with pytest.raises(TypeError):
+        show.segments[0] = show.segments[1]
@@ -0,0 +1,29 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from radio_gpt import cli
+from radio_gpt.generator import ShowGenerator
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _built(seed, duration):
+    return ShowGenerator(seed=seed).build_show(duration_minutes=duration, start=START)
+
+
+@pytest.mark.parametrize("seed", [1, 5])
+def test_iter_segments_yields_the_built_show(seed):
+    streamed = [segment.as_dict() for segment in ShowGenerator(seed=seed).iter_segments(duration_minutes=180, start=START)]
+    assert streamed == _built(seed, 180).as_dict()["segments"]
+
+
+@pytest.mark.parametrize("timeline", [False, True])
+def test_cli_stream_matches_the_built_show(capsysbinary, timeline):
+    argv = ["--seed", "4", "--duration", "90", "--start", "2026-01-01T00:00:00Z", "--stream"]
+    assert cli.main(argv + ["--timeline"] * timeline) == 0
+    lines = capsysbinary.readouterr().out.splitlines()
+    show = _built(4, 90)
+    expected = show.as_timeline()["items"] if timeline else show.as_dict()["segments"]
+    assert [json.loads(line) for line in lines] == expected
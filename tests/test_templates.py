@@ -0,0 +1,41 @@
+import pytest
+
+from radio_gpt import cli
+
+from radio_gpt.templates import DEFAULT_BANKS, PhraseBook, default_phrasebook
+
+
+def test_default_banks_are_valid():
+    assert len(PhraseBook(DEFAULT_BANKS)) == len(default_phrasebook())
+
+
+@pytest.mark.parametrize(
+    "banks, message",
+    [
+        ({"music_intro_hook": ["{artist} mit {tittle}"]}, r"'music_intro_hook': unknown placeholder \{tittle\}"),
+        ({"news_item": ["{headline} von {artist}"]}, r"'news_item': unknown placeholder \{artist\}"),
+        ({"outro_cta": "Bis gleich!"}, "'outro_cta' must be a list of strings"),
+        ({"outro_cta": ["Bis gleich!", None]}, "'outro_cta' must be a list of strings"),
+        ({"outro_cta": []}, "'outro_cta' is empty"),
+    ],
+)
+def test_invalid_banks_fail_at_load_time(banks, message):
+    with pytest.raises(ValueError, match=message):
+        PhraseBook(banks, fallback=default_phrasebook())
+
+
+def test_common_fields_are_allowed_everywhere():
+    book = PhraseBook({"outro_cta": ["{station} mit {host}"]}, fallback=default_phrasebook())
+    assert book.bank("outro_cta")[0].fields == ("station", "host")
+
+
+@pytest.mark.parametrize(
+    "content",
+    [None, "{nicht json", '["outro_cta"]', '{"banks": ["outro_cta"]}', '{"outro_cta": []}'],
+)
+def test_cli_exits_with_a_message_for_unusable_templates(tmp_path, content):
+    path = tmp_path / "banks.json"
+    if content is not None:
+        path.write_text(content, encoding="utf-8")
+    with pytest.raises(SystemExit, match="Vorlagen aus .* können nicht geladen werden"):
+        cli.main(["--templates", str(path), "--duration", "10"])
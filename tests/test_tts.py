@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from radio_gpt.generator import RadioShow, ShowGenerator, ShowSegment
+from radio_gpt.tts import ClipCache, LocalToneEngine, TTSRenderer, clip_id
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class CountingEngine(LocalToneEngine):
+    """Records every render call; slow enough for the workers to overlap."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def render(self, text, voice):
+        with self._lock:
+            self.calls.append((voice, text))
+        time.sleep(0.002)
+        return super().render(text, voice)
+
+
+def _breaks(*texts):
+    segments, start = [], START
+    for text in texts:
+        segments.append(ShowSegment("tts_break", "Moderation", text, start, timedelta(seconds=10)))
+        start += timedelta(seconds=10)
+    return RadioShow("RadioGPT", "Alex", START, segments)
+
+
+def test_clip_ids_are_content_addressed():
+    assert clip_id("Hallo", "Alex") == clip_id("Hallo", "Alex")
+    assert len({clip_id("Hallo", "Alex"), clip_id("Hallo!", "Alex"), clip_id("Hallo", "Sam")}) == 3
+    engine = LocalToneEngine()
+    assert engine.render("Hallo", "Alex") == engine.render("Hallo", "Alex")
+
+
+def test_payload_urls_point_at_rendered_clips(tmp_path):
+    generator = ShowGenerator(seed=3, tts_suffix=".wav")
+    show = generator.build_show(duration_minutes=60, start=START)
+    cache = ClipCache(tmp_path)
+    TTSRenderer(LocalToneEngine(), cache).render_show(show, voice=generator.voice)
+    urls = [segment.payload["url"] for segment in show.segments if segment.kind == "tts_break"]
+    assert urls
+    for url in urls:
+        key = url.rsplit("/", 1)[1][: -len(".wav")]
+        assert cache.get(key) == tmp_path / key[:2] / f"{key}.wav"
+
+
+def test_duplicate_lines_render_once_across_workers(tmp_path):
+    texts = [f"Zeile {n % 5}" for n in range(40)]
+    engine = CountingEngine()
+    renderer = TTSRenderer(engine, ClipCache(tmp_path), workers=8)
+    stats = renderer.render_show(_breaks(*texts), voice="Alex")
+    assert (stats.clips, stats.rendered, stats.cached) == (5, 5, 0)
+    assert sorted(engine.calls) == [("Alex", f"Zeile {n}") for n in range(5)]
+
+    stats = renderer.render_show(_breaks(*texts, "Neu"), voice="Alex")
+    assert (stats.clips, stats.rendered, stats.cached) == (6, 1, 5)
+    assert len(engine.calls) == 6
+
+
+def test_concurrent_renders_leave_a_consistent_cache(tmp_path):
+    show = _breaks(*(f"Zeile {n}" for n in range(30)))
+    cache = ClipCache(tmp_path)
+    threads = [
+        threading.Thread(target=TTSRenderer(LocalToneEngine(), cache, workers=4).render_show, args=(show,), kwargs={"voice": "Alex"})
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(cache) == 30
+    assert cache.total_bytes == sum(path.stat().st_size for path in tmp_path.rglob("*.wav"))
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_eviction_by_size_drops_least_recently_used(tmp_path):
+    cache = ClipCache(tmp_path, max_bytes=250)
+    for key in ("aa01", "bb02", "cc03"):
+        cache.put(key, b"x" * 100)
+    assert "aa01" not in cache and not cache.path("aa01").exists()
+    assert cache.get("bb02") is not None
+    cache.put("dd04", b"x" * 100)
+    assert "cc03" not in cache and "bb02" in cache
+    assert cache.total_bytes == 200
+    cache.put("ee05", b"x" * 1000)
+    assert list(tmp_path.rglob("*.wav")) == [cache.path("ee05")]
+
+
+def test_index_is_rebuilt_from_disk_in_use_order(tmp_path):
+    cache = ClipCache(tmp_path, max_bytes=1000)
+    for offset, key in enumerate(("aa01", "bb02", "cc03")):
+        os.utime(cache.put(key, b"x" * 100), ns=(10**18 + offset, 10**18 + offset))
+    cache.get("aa01")
+    reopened = ClipCache(tmp_path, max_bytes=250)
+    assert (len(reopened), reopened.total_bytes) == (2, 200)
+    assert "bb02" not in reopened and "aa01" in reopened